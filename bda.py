@@ -3,9 +3,39 @@ from mysql.connector import errorcode
 from faker import Faker
 import time
 import matplotlib.pyplot as plt
+import numpy as np
 import os
+import sys
 from dotenv import load_dotenv
 import csv
+import argparse
+import itertools
+import math
+import threading
+import json
+import hashlib
+import inspect
+import re
+import sqlite3
+import tempfile
+import subprocess
+import multiprocessing
+import queue
+import cProfile
+import pstats
+import tracemalloc
+import atexit
+import random
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from decimal import Decimal
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage(), o pico de memória não é reportado
+    resource = None
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -14,295 +44,4079 @@ DB_HOST = os.getenv('DB_HOST', 'localhost')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'root')
 DB_NAME = os.getenv('DB_NAME', 'indice_teste')
-N_RUNS = int(os.getenv('N_RUNS', 5))  # Número de execuções por teste
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')  # 'mysql' ou 'sqlite' (embutido, biblioteca padrão)
+SQLITE_PATH = os.getenv('SQLITE_PATH', f"{DB_NAME}.sqlite")  # Arquivo do backend SQLite
+SQLITE_PROGRESS_STEP = 100  # Instruções da VM do SQLite por chamada do contador
+N_RUNS = int(os.getenv('N_RUNS', 5))  # Número mínimo de execuções por teste
+TIMING_MAX_RUNS = int(os.getenv('TIMING_MAX_RUNS', 200))  # Teto de execuções por medição
+TIMING_BUDGET = float(os.getenv('TIMING_BUDGET', 5.0))  # Orçamento de tempo por medição (s)
+TIMING_CI_TARGET = float(os.getenv('TIMING_CI_TARGET', 0.05))  # IC95 alvo, relativo à média
+FETCH_MODE = os.getenv('FETCH_MODE', 'cext')  # 'cext', 'buffered', 'unbuffered' ou 'raw'
+FETCH_BATCH = int(os.getenv('FETCH_BATCH', 1000))  # Linhas por fetchmany() nos modos em streaming
+LATENCY_PRECISION = float(os.getenv('LATENCY_PRECISION', 0.01))  # Erro relativo dos histogramas
+LOAD_PARAM_SAMPLE = int(os.getenv('LOAD_PARAM_SAMPLE', 10000))  # Chaves sorteadas para a carga
+LOAD_MAX_ERRORS = int(os.getenv('LOAD_MAX_ERRORS', 50))  # Erros seguidos que encerram um cliente da carga
+WORKLOAD_DIST = os.getenv('WORKLOAD_DIST', 'uniform')  # 'uniform', 'zipf' ou 'hot' (chaves sorteadas)
+ZIPF_S = float(os.getenv('ZIPF_S', 1.1))  # Expoente da distribuição Zipf
+HOT_KEYS = float(os.getenv('HOT_KEYS', 0.01))  # Fração de chaves quentes
+HOT_TRAFFIC = float(os.getenv('HOT_TRAFFIC', 0.9))  # Fração dos acessos que vai para as chaves quentes
+SELECTIVITY_TARGETS = [float(t) for t in os.getenv(
+    'SELECTIVITY_TARGETS', '0.0001,0.001,0.01,0.05,0.1,0.25,0.5,0.9').split(',')]  # Frações de linhas
+SELECTIVITY_SAMPLES = int(os.getenv('SELECTIVITY_SAMPLES', 20))  # Parâmetros sorteados por alvo
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))  # Linhas por página no teste de paginação
+PAGINATION_POINTS = int(os.getenv('PAGINATION_POINTS', 12))  # Profundidades de página medidas, até a última
+PREFIX_LENGTHS = [int(n) for n in os.getenv('PREFIX_LENGTHS', '4,8,12,16,24,32').split(',')]  # Prefixos varridos
+FULLTEXT_SAMPLE = int(os.getenv('FULLTEXT_SAMPLE', 10000))  # Descrições amostradas para a DF dos termos
+FULLTEXT_INSERT_FRACTION = float(os.getenv('FULLTEXT_INSERT_FRACTION', 0.2))  # Inserções antes do OPTIMIZE
+RESULT_CACHE_ENTRIES = int(os.getenv('RESULT_CACHE_ENTRIES', 10000))  # Entradas do cache de resultados (LRU)
+RESULT_CACHE_MB = float(os.getenv('RESULT_CACHE_MB', 128))  # Memória máxima do cache de resultados (MB)
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 30))  # Validade das entradas (s, 0 = sem expiração)
+RESULT_CACHE_WRITES = float(os.getenv('RESULT_CACHE_WRITES', 0.05))  # Fração de escritas na carga mista
+INDEX_TOGGLE = os.getenv('INDEX_TOGGLE', 'drop')  # 'drop' (DROP/CREATE INDEX), 'invisible' ou 'auto'
+ABAB_ROUNDS = int(os.getenv('ABAB_ROUNDS', 2))  # Pares sem/com índice intercalados no modo invisível
+CACHE_MODE = os.getenv('CACHE_MODE', 'warm')  # 'warm' ou 'cold' (cache esvaziado antes de cada execução)
+COLD_EVICTION = os.getenv('COLD_EVICTION', 'scan')  # 'scan', 'resize' ou 'restart'
+MYSQL_RESTART_CMD = os.getenv('MYSQL_RESTART_CMD', 'sudo systemctl restart mysql')  # Usado com COLD_EVICTION=restart
+COLLECT_COUNTERS = os.getenv('COLLECT_COUNTERS', '1') == '1'  # Contadores do servidor por execução
+SEED = int(os.getenv('SEED', 42))  # Semente do gerador de dados (mesma semente = mesmo dataset)
+DATA_GENERATOR = os.getenv('DATA_GENERATOR', 'numpy')  # 'numpy' (vetorizado) ou 'faker' (por linha)
+VOCAB_POOL_SIZE = int(os.getenv('VOCAB_POOL_SIZE', 5000))  # Tamanho dos pools de texto do Faker
+DATA_REF_DATE = os.getenv('DATA_REF_DATE', '2025-12-31')  # "Hoje" usado pelo gerador (fixo: dataset reprodutível)
+LOAD_MODE = os.getenv('LOAD_MODE', 'executemany')  # 'executemany' ou 'infile' (LOAD DATA LOCAL INFILE)
+LOAD_RELAXED = os.getenv('LOAD_RELAXED', '0') == '1'  # Carga sem checks, FK recriada depois
+INCREMENTAL_TIERS = os.getenv('INCREMENTAL_TIERS', '1') == '1'  # Cada volume só acrescenta o delta
+POP_WORKERS = int(os.getenv('POP_WORKERS', 1))  # Processos/conexões usados para popular
+SNAPSHOTS = os.getenv('SNAPSHOTS', '1') == '1'  # Reaproveita tabelas já populadas entre execuções
+SNAPSHOT_DB = os.getenv('SNAPSHOT_DB', f"{DB_NAME}_snapshots")  # Banco onde ficam os snapshots
+PROFILE_PHASES = [p for p in os.getenv('PROFILE_PHASES', '').split(',') if p]  # Fases com cProfile ('all' = todas)
+TRACE_MEMORY = os.getenv('TRACE_MEMORY', '0') == '1'  # Pico de memória Python por fase (tracemalloc)
 
 # Diretórios para resultados
 EXPLAIN_DIR = "explain_plans"
 CHARTS_DIR = "graficos"
 TIMES_DIR = "tempos"
+LOAD_DIR = "carga"
+PLANS_DB = os.path.join(EXPLAIN_DIR, "plans.sqlite")
+JOURNAL_DB = os.path.join(TIMES_DIR, "journal.sqlite")
+BASELINE_DIR = os.path.join(TIMES_DIR, "baselines")
+PROFILE_DIR = "perfis"
+METRICS_JSONL = os.path.join(TIMES_DIR, "metrics.jsonl")
+METRICS_PROM = os.getenv('METRICS_PROM', os.path.join(TIMES_DIR, "bda.prom"))  # Textfile do node_exporter
+
+# Identifica esta execução no banco de planos
+RUN_ID = datetime.now().strftime('%Y%m%d-%H%M%S')
+SERVER_VERSION = None  # Versão do MySQL medido, definida por set_server_version()
 
 # Cria diretórios se não existirem
 os.makedirs(EXPLAIN_DIR, exist_ok=True)
 os.makedirs(CHARTS_DIR, exist_ok=True)
 os.makedirs(TIMES_DIR, exist_ok=True)
+os.makedirs(LOAD_DIR, exist_ok=True)
+os.makedirs(BASELINE_DIR, exist_ok=True)
+if PROFILE_PHASES:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+# Fases instrumentadas do harness: nome -> {'calls', 'seconds', 'rows', 'py_peak'}
+PHASES = {}
+_phase_profiles = {}  # cProfile acumulado por fase (PROFILE_PHASES)
+_phase_profiling = False  # só um cProfile ativo por vez (fases aninhadas não são perfiladas)
+_phase_peaks = []  # pico do tracemalloc de cada fase aberta, da externa para a interna
+_phase_lock = threading.Lock()  # a carga paralela abre fases a partir de threads
+RUN_STARTED = time.perf_counter()
+
+def record_phase(name, seconds, rows=0, py_peak=0):
+    """Acumula uma duração (medida pelo chamador ou por phase()) na fase `name`."""
+    with _phase_lock:
+        entry = PHASES.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'py_peak': 0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['rows'] += rows
+        entry['py_peak'] = max(entry['py_peak'], py_peak)
+
+@contextmanager
+def phase(name, rows=0):
+    """
+    Cronometra um trecho do harness como a fase `name` (acumulada em PHASES).
+    Com PROFILE_PHASES, o trecho roda sob cProfile (um perfil por fase); com
+    TRACE_MEMORY, registra o pico de memória alocada pelo Python na fase.
+    Fora da thread principal (carga paralela) a fase só é cronometrada.
+    """
+    global _phase_profiling
+    profile = None
+    main = threading.current_thread() is threading.main_thread()
+    trace = TRACE_MEMORY and main
+    if main and not _phase_profiling and (name in PROFILE_PHASES or 'all' in PROFILE_PHASES):
+        profile = _phase_profiles.setdefault(name, cProfile.Profile())
+        _phase_profiling = True
+        profile.enable()
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if _phase_peaks:
+            _phase_peaks[-1] = max(_phase_peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _phase_peaks.append(0)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        py_peak = 0
+        if trace:
+            # O pico da fase também conta para as fases que a contêm
+            py_peak = max(_phase_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if _phase_peaks:
+                _phase_peaks[-1] = max(_phase_peaks[-1], py_peak)
+            tracemalloc.reset_peak()
+        if profile is not None:
+            profile.disable()
+            _phase_profiling = False
+        record_phase(name, elapsed, rows, py_peak)
+
+def _prom_labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def write_metrics(command):
+    """
+    Exporta as fases desta execução: uma linha JSON por fase (e uma de resumo)
+    acrescentada em METRICS_JSONL, e o arquivo METRICS_PROM no formato
+    textfile do Prometheus (reescrito de forma atômica). Com PROFILE_PHASES,
+    grava os perfis em perfis/ e imprime as funções mais caras de cada fase.
+    """
+    if not PHASES:
+        return
+    total = time.perf_counter() - RUN_STARTED
+    own_rss, workers_rss = peak_rss_mb()
+    now = datetime.now()
+    base = {'run_id': RUN_ID, 'command': command, 'backend': DB_BACKEND, 'timestamp': now.isoformat(timespec='seconds')}
+    with open(METRICS_JSONL, 'a', encoding='utf-8') as f:
+        for name, entry in sorted(PHASES.items()):
+            f.write(json.dumps(dict(
+                base, type='phase', phase=name, calls=entry['calls'], seconds=round(entry['seconds'], 6),
+                share=round(entry['seconds'] / total, 4) if total else None, rows=entry['rows'],
+                rows_per_s=round(entry['rows'] / entry['seconds'], 1) if entry['rows'] and entry['seconds'] else None,
+                py_peak_mb=round(entry['py_peak'] / 1024 ** 2, 2) if TRACE_MEMORY else None,
+            ), ensure_ascii=False) + "\n")
+        f.write(json.dumps(dict(base, type='run', seconds=round(total, 3),
+                                peak_rss_mb=round(own_rss, 1) if own_rss is not None else None,
+                                workers_peak_rss_mb=round(workers_rss, 1) if workers_rss is not None else None), ensure_ascii=False) + "\n")
+
+    run = {'command': command, 'backend': DB_BACKEND}
+    gauges = [
+        ('bda_phase_seconds', "Tempo acumulado na fase (s)", lambda e: e['seconds']),
+        ('bda_phase_calls', "Execuções da fase", lambda e: e['calls']),
+        ('bda_phase_rows', "Linhas processadas na fase", lambda e: e['rows']),
+        ('bda_phase_rows_per_second', "Vazão da fase (linhas/s)",
+         lambda e: e['rows'] / e['seconds'] if e['rows'] and e['seconds'] else None),
+    ]
+    if TRACE_MEMORY:
+        gauges.append(('bda_phase_python_peak_bytes', "Pico de memória Python na fase (tracemalloc)",
+                       lambda e: e['py_peak']))
+    lines = []
+    for metric, help_text, value in gauges:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        lines += [f"{metric}{_prom_labels(**run, phase=name)} {value(entry)}"
+                  for name, entry in sorted(PHASES.items()) if value(entry) is not None]
+    lines += ["# HELP bda_run_seconds Duração da execução (s)", "# TYPE bda_run_seconds gauge",
+              f"bda_run_seconds{_prom_labels(**run)} {total}",
+              "# HELP bda_run_timestamp_seconds Fim da execução (epoch)", "# TYPE bda_run_timestamp_seconds gauge",
+              f"bda_run_timestamp_seconds{_prom_labels(**run)} {now.timestamp()}"]
+    if own_rss is not None:
+        lines += ["# HELP bda_peak_rss_bytes Pico de memória residente", "# TYPE bda_peak_rss_bytes gauge",
+                  f"bda_peak_rss_bytes{_prom_labels(**run, process='main')} {own_rss * 1024 ** 2:.0f}",
+                  f"bda_peak_rss_bytes{_prom_labels(**run, process='workers')} {workers_rss * 1024 ** 2:.0f}"]
+    tmp = METRICS_PROM + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, METRICS_PROM)
+
+    # Fases se aninham (ex.: populate contém load.* e populate.generate)
+    print("\nFases (s, % da execução; fases aninhadas somam mais de 100%):")
+    for name, entry in sorted(PHASES.items(), key=lambda item: -item[1]['seconds']):
+        print(f"  {name:<20} {entry['seconds']:10.2f}s {entry['seconds'] / total * 100 if total else 0:5.1f}%"
+              f"  ({entry['calls']} chamadas)")
+    for name, profile in _phase_profiles.items():
+        path = os.path.join(PROFILE_DIR, f"{RUN_ID}_{name}.prof")
+        profile.dump_stats(path)
+        print(f"\nPerfil de {name} ({path}):")
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(8)
+    print(f"Métricas em {METRICS_JSONL} e {METRICS_PROM}")
+
+# Valores possíveis de orders.status (mesma distribuição uniforme do Faker)
+ORDER_STATUSES = ['Pendente', 'Processando', 'Enviado', 'Entregue']
+
+# Linhas por bloco do gerador vetorizado. Cada coluna de cada bloco tem
+# semente própria, derivada de (SEED, tabela, índice do bloco, coluna), então a
+# linha N é sempre a mesma independentemente de como as inserções são fatiadas.
+GEN_BLOCK_SIZE = 10000
+# Versão dos dados gerados: incrementar sempre que a mesma semente passar a
+# gerar outras linhas (entra na chave dos snapshots e no hash do journal).
+# 2: ids explícitos e contíguos em customers, emails derivados do número da linha
+# 3: um fluxo aleatório por coluna, avançado até a 1ª linha do lote
+GENERATOR_VERSION = 3
+_TABLE_CODES = {'customers': 1, 'orders': 2}
+_COLUMN_CODES = {'name': 1, 'email_user': 2, 'email_domain': 3, 'address': 4, 'birth_date': 5,
+                 'customer_id': 6, 'total': 7, 'cents': 8, 'description': 9, 'order_date': 10, 'status': 11}
+
+@lru_cache(maxsize=None)
+def build_vocab(seed=SEED, pool_size=VOCAB_POOL_SIZE):
+    """Pré-gera pools de valores textuais com Faker para o gerador vetorizado."""
+    fake = Faker('pt_BR')
+    fake.seed_instance(seed)
+    return {
+        'names': np.array([fake.name() for _ in range(pool_size)], dtype=object),
+        'addresses': np.array([fake.address() for _ in range(pool_size)], dtype=object),
+        'texts': np.array([fake.text(max_nb_chars=200) for _ in range(pool_size)], dtype=object),
+        'email_users': np.array([fake.user_name() for _ in range(pool_size)], dtype=object),
+        'email_domains': np.array([fake.safe_domain_name() for _ in range(pool_size)], dtype=object),
+    }
+
+def _iter_blocks(table, start, count, seed):
+    """
+    Percorre os blocos que cobrem [start, start + count). Para cada bloco,
+    draw(coluna, low, high) sorteia inteiros uniformes em [low, high) só para
+    as linhas [lo, hi) do bloco: o fluxo da coluna é avançado até a linha lo,
+    então um lote de 1000 linhas gera 1000 valores por coluna, não o bloco todo.
+    """
+    end = start + count
+    block = start // GEN_BLOCK_SIZE
+    while block * GEN_BLOCK_SIZE < end:
+        block_start = block * GEN_BLOCK_SIZE
+        lo = max(start, block_start) - block_start
+        hi = min(end, block_start + GEN_BLOCK_SIZE) - block_start
+
+        def draw(column, low, high, block=block, lo=lo, hi=hi):
+            bits = np.random.PCG64([seed, _TABLE_CODES[table], block, _COLUMN_CODES[column]])
+            bits.advance(lo)  # random() consome exatamente um valor de 64 bits por amostra
+            return low + (np.random.Generator(bits).random(hi - lo) * (high - low)).astype(np.int64)
+
+        yield draw, block_start, lo, hi
+        block += 1
+
+def _ref_datetime():
+    """Data de referência ("agora") do gerador, fixa para o dataset ser reprodutível."""
+    return np.datetime64(DATA_REF_DATE, 's')
+
+def generate_customers(start, count, seed=SEED):
+    """
+    Gera as linhas [start, start + count) de customers em colunas NumPy.
+    Mesmas distribuições do caminho Faker: nome e endereço dos pools,
+    email único derivado do número da linha e nascimento uniforme em 0–115 anos.
+    """
+    vocab = build_vocab(seed)
+    pool = len(vocab['names'])
+    ref = _ref_datetime().astype('datetime64[D]')
+    # date_of_birth(): uniforme entre (hoje - 116 anos) e hoje
+    span_days = int(116 * 365.2425)
+
+    parts = {'name': [], 'email': [], 'birth_date': [], 'address': []}
+    for draw, block_start, lo, hi in _iter_blocks('customers', start, count, seed):
+        rows = np.arange(block_start + lo, block_start + hi)
+        parts['name'].append(vocab['names'][draw('name', 0, pool)])
+        parts['email'].append(np.array(
+            [f"{u}.{r}@{d}" for u, r, d in zip(vocab['email_users'][draw('email_user', 0, pool)], rows,
+                                              vocab['email_domains'][draw('email_domain', 0, pool)])],
+            dtype=object))
+        parts['birth_date'].append(ref - draw('birth_date', 0, span_days + 1).astype('timedelta64[D]'))
+        parts['address'].append(vocab['addresses'][draw('address', 0, pool)])
+    return {col: np.concatenate(chunks) for col, chunks in parts.items()}
+
+def generate_orders(start, count, customer_ids, seed=SEED):
+    """
+    Gera as linhas [start, start + count) de orders em colunas NumPy.
+    total segue pydecimal(min_value=10, max_value=1000): parte inteira uniforme
+    em 10–1000 mais centavos uniformes, limitada a 1000. order_date é uniforme
+    entre 1º de janeiro e a data de referência (date_time_this_year()).
+    customer_ids é um range de ids contíguos (customer_id_range()); uma lista
+    explícita também é aceita.
+    """
+    vocab = build_vocab(seed)
+    pool = len(vocab['texts'])
+    if not isinstance(customer_ids, range):
+        customer_ids = np.asarray(customer_ids)
+    ref = _ref_datetime()
+    year_start = np.datetime64(f"{str(ref)[:4]}-01-01T00:00:00", 's')
+    span_seconds = max(int((ref - year_start).astype(int)), 1)
+
+    parts = {'customer_id': [], 'total': [], 'description': [], 'order_date': [], 'status': []}
+    for draw, _, lo, hi in _iter_blocks('orders', start, count, seed):
+        customers = draw('customer_id', 0, len(customer_ids))
+        cents = draw('total', 10, 1001) * 100 + draw('cents', 0, 100)
+        if isinstance(customer_ids, range):
+            parts['customer_id'].append(customer_ids.start + customers)
+        else:
+            parts['customer_id'].append(customer_ids[customers])
+        parts['total'].append(np.minimum(cents, 100000) / 100)
+        parts['description'].append(vocab['texts'][draw('description', 0, pool)])
+        parts['order_date'].append(year_start + draw('order_date', 0, span_seconds).astype('timedelta64[s]'))
+        parts['status'].append(np.asarray(ORDER_STATUSES, dtype=object)[draw('status', 0, len(ORDER_STATUSES))])
+    return {col: np.concatenate(chunks) for col, chunks in parts.items()}
+
+def columns_to_rows(columns, names):
+    """Converte colunas NumPy em tuplas de tipos Python, prontas para o conector."""
+    converted = []
+    for name in names:
+        col = columns[name]
+        if np.issubdtype(col.dtype, np.datetime64):
+            converted.append(np.char.replace(np.datetime_as_string(col), 'T', ' ').tolist())
+        else:
+            converted.append(col.tolist())
+    return list(zip(*converted))
+
+def faker_customers(fake, start, count):
+    """
+    Gera os clientes [start, start + count) linha a linha com Faker (caminho
+    original, mais lento). O email leva o número da linha, como no gerador
+    numpy, em vez de fake.unique (que guarda todos os emails já emitidos).
+    """
+    return [
+        (fake.name(), f"{fake.user_name()}.{row}@{fake.safe_domain_name()}", fake.date_of_birth(), fake.address())
+        for row in range(start, start + count)
+    ]
+
+def faker_orders(fake, ids, count):
+    """
+    Gera pedidos linha a linha com Faker (caminho original, mais lento). ids é
+    o range de customer_id_range(), ou a lista de ids quando há buracos.
+    """
+    if isinstance(ids, range):
+        pick_id = lambda: fake.random_int(ids.start, ids.stop - 1)
+    else:
+        pick_id = lambda: fake.random_element(ids)
+    return [
+        (
+            pick_id(),
+            round(fake.pydecimal(left_digits=4, right_digits=2, min_value=10, max_value=1000), 2),
+            fake.text(max_nb_chars=200),
+            fake.date_time_this_year(),
+            fake.random_element(ORDER_STATUSES)
+        )
+        for _ in range(count)
+    ]
+
+CUSTOMER_COLUMNS = ['name', 'email', 'birth_date', 'address']
+ORDER_COLUMNS = ['customer_id', 'total', 'description', 'order_date', 'status']
+
+def with_customer_ids(rows, start, id_offset):
+    """
+    Prefixa as linhas [start, ...) de customers com ids explícitos
+    (id_offset + linha + 1): os ids ficam contíguos em qualquer modo de
+    carga, e os pedidos podem sorteá-los de um range sem buscá-los no banco.
+    """
+    return [(id_offset + start + i + 1,) + row for i, row in enumerate(rows)]
+
+def customer_batches(fake, start, n_customers, batch_size, generator, timer, id_offset=0):
+    """Gera lotes de clientes [start, n_customers), com ids, sob demanda, acumulando o tempo em timer['gen']."""
+    for i in range(start, n_customers, batch_size):
+        batch = min(batch_size, n_customers - i)
+        t0 = time.perf_counter()
+        if generator == 'faker':
+            rows = faker_customers(fake, i, batch)
+        else:
+            rows = columns_to_rows(generate_customers(i, batch), CUSTOMER_COLUMNS)
+        rows = with_customer_ids(rows, i, id_offset)
+        timer['gen'] += time.perf_counter() - t0
+        yield rows
+
+def order_batches(fake, ids, start, n_orders, batch_size, generator, timer):
+    """Gera lotes de pedidos [start, n_orders) sob demanda, acumulando o tempo em timer['gen']."""
+    for i in range(start, n_orders, batch_size):
+        batch = min(batch_size, n_orders - i)
+        t0 = time.perf_counter()
+        if generator == 'faker':
+            rows = faker_orders(fake, ids, batch)
+        else:
+            rows = columns_to_rows(generate_orders(i, batch, ids), ORDER_COLUMNS)
+        timer['gen'] += time.perf_counter() - t0
+        yield rows
+
+def _tsv_value(value):
+    """Formata um valor no formato padrão do LOAD DATA (TAB, escape com barra invertida)."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def load_executemany(conn, cursor, table, columns, batches, total, verbose=True):
+    """Insere lotes com executemany e commit a cada lote (caminho original)."""
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    done = 0
+    for rows in batches:
+        with phase('load.insert', len(rows)):
+            cursor.executemany(sql, rows)
+        with phase('load.commit'):
+            conn.commit()
+        done += len(rows)
+        if verbose:
+            print(f"Inseridos {done} de {total} em {table}")
+    return done
+
+def load_infile(conn, cursor, table, columns, batches, total, verbose=True):
+    """
+    Grava os lotes gerados em um arquivo TSV temporário, à medida que são
+    produzidos, e ingere tudo com um único LOAD DATA LOCAL INFILE e um commit.
+    """
+    fd, path = tempfile.mkstemp(prefix=f"{table}_", suffix=".tsv")
+    done = 0
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            for rows in batches:
+                f.writelines('\t'.join(map(_tsv_value, row)) + '\n' for row in rows)
+                done += len(rows)
+        with phase('load.load_data', done):
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE {table} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                f"({', '.join(columns)})"
+            )
+            conn.commit()
+        if verbose:
+            print(f"Carregados {done} de {total} em {table} via LOAD DATA")
+    finally:
+        os.remove(path)
+    return done
+
+LOADERS = {
+    'executemany': load_executemany,
+    'infile': load_infile,
+}
+
+def set_load_checks(cursor, enabled):
+    """Liga/desliga unique_checks e foreign_key_checks na sessão."""
+    flag = 1 if enabled else 0
+    cursor.execute(f"SET SESSION unique_checks = {flag}")
+    cursor.execute(f"SET SESSION foreign_key_checks = {flag}")
+
+def restore_load_checks(conn, cursor):
+    """
+    Fim da carga com LOAD_RELAXED: religa os checks da sessão e recria a FK
+    (e seu índice) de orders.customer_id, uma única vez. Os checks voltam
+    antes do ADD CONSTRAINT para que as linhas carregadas sejam validadas.
+    """
+    t0 = time.perf_counter()
+    set_load_checks(cursor, True)
+    cursor.execute("""
+    ALTER TABLE orders ADD CONSTRAINT fk_orders_customer
+        FOREIGN KEY (customer_id) REFERENCES customers(id)
+    """)
+    conn.commit()
+    print(f"FK/índice de orders.customer_id recriados em {time.perf_counter() - t0:.2f}s")
+
+def table_count(cursor, table):
+    """Retorna o número de linhas de uma tabela."""
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+# Estado dos processos geradores do modo paralelo (preenchido pelo initializer)
+_worker_ids = None
+
+def _init_gen_worker(ids):
+    global _worker_ids
+    _worker_ids = ids
+
+def _generate_rows_task(task):
+    """Executado nos processos do pool: gera as linhas [start, start + count) de uma tabela."""
+    table, start, count, id_offset = task
+    if table == 'customers':
+        # ids explícitos: blocos inseridos fora de ordem continuam com ids contíguos
+        return with_customer_ids(columns_to_rows(generate_customers(start, count), CUSTOMER_COLUMNS), start, id_offset)
+    return columns_to_rows(generate_orders(start, count, _worker_ids), ORDER_COLUMNS)
+
+def open_connection_pool(size, **overrides):
+    """Abre `size` conexões com get_connection() e as disponibiliza em uma fila."""
+    pool = queue.Queue()
+    for _ in range(size):
+        conn = get_connection(**overrides)
+        if LOAD_RELAXED:
+            cur = conn.cursor()
+            set_load_checks(cur, False)
+            cur.close()
+        pool.put(conn)
+    return pool
+
+def close_connection_pool(pool):
+    """Fecha todas as conexões do pool."""
+    while not pool.empty():
+        pool.get_nowait().close()
+
+def _insert_chunk(conn_pool, table, columns, rows, load_mode):
+    """Executado nas threads de inserção: carrega um bloco com uma conexão do pool."""
+    conn = conn_pool.get()
+    try:
+        cursor = conn.cursor()
+        if load_mode == 'executemany':
+            batches = (rows[i:i + 1000] for i in range(0, len(rows), 1000))
+        else:
+            batches = iter([rows])
+        LOADERS[load_mode](conn, cursor, table, columns, batches, len(rows), verbose=False)
+        cursor.close()
+    finally:
+        conn_pool.put(conn)
+    return len(rows)
+
+def load_parallel(table, start, end, workers, load_mode, ids=None, id_offset=0):
+    """
+    Carrega as linhas [start, end) de uma tabela em paralelo: um pool de
+    processos gera blocos disjuntos de GEN_BLOCK_SIZE linhas e um pool de
+    `workers` conexões os insere concorrentemente.
+    """
+    columns = ['id'] + CUSTOMER_COLUMNS if table == 'customers' else ORDER_COLUMNS
+    tasks = [(table, i, min(GEN_BLOCK_SIZE, end - i), id_offset) for i in range(start, end, GEN_BLOCK_SIZE)]
+    conn_pool = open_connection_pool(workers)
+    done = 0
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_gen_worker, initargs=(ids,)) as procs, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for rows in procs.imap_unordered(_generate_rows_task, tasks):
+                pending.add(executor.submit(_insert_chunk, conn_pool, table, columns, rows, load_mode))
+                # Limita blocos em memória aguardando inserção
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    done += sum(f.result() for f in finished)
+                    print(f"Inseridos {done} de {end - start} em {table} ({workers} workers)")
+            done += sum(f.result() for f in pending)
+    finally:
+        close_connection_pool(conn_pool)
+    print(f"Inseridos {done} de {end - start} em {table} ({workers} workers)")
+    return done
+
+def populate(conn, cursor, n_customers, n_orders, generator=DATA_GENERATOR, load_mode=LOAD_MODE,
+             incremental=INCREMENTAL_TIERS, workers=POP_WORKERS):
+    """
+    Popula as tabelas com dados fictícios. O gerador 'numpy' monta cada lote
+    em colunas vetorizadas a partir da SEED; 'faker' mantém o caminho original
+    com uma chamada do Faker por campo. load_mode escolhe entre executemany
+    (lotes de 1000 com commit) e LOAD DATA LOCAL INFILE; com LOAD_RELAXED, a
+    carga roda sem unique/foreign_key_checks e a FK de orders é recriada no fim.
+
+    Com incremental=True e gerador 'numpy', as linhas já existentes são
+    mantidas e só o delta até (n_customers, n_orders) é gerado. Cada linha
+    depende apenas da sua posição; o customer_id dos pedidos novos é sorteado
+    entre os clientes existentes no volume em que foram gerados.
+
+    Com workers > 1 (gerador 'numpy'), a carga usa load_parallel().
+
+    A memória não cresce com o volume: os clientes recebem ids explícitos e
+    contíguos, os pedidos sorteiam customer_id desse range (sem buscar os ids
+    no banco), os emails derivam do número da linha e as linhas são geradas
+    sob demanda, lote a lote. O pico de RSS é impresso ao final.
+    """
+    try:
+        start_c = start_o = 0
+        if incremental and generator == 'numpy':
+            start_c, start_o = table_count(cursor, 'customers'), table_count(cursor, 'orders')
+            if start_c > n_customers or start_o > n_orders:
+                start_c = start_o = 0
+
+        if start_c or start_o:
+            print(f"Crescimento incremental: +{n_customers - start_c} clientes, "
+                  f"+{n_orders - start_o} pedidos")
+        else:
+            cursor.execute("DELETE FROM orders")
+            cursor.execute("DELETE FROM customers")
+            conn.commit()
+
+        if load_mode == 'infile' and not supports('infile'):
+            load_mode = 'executemany'
+        if workers > 1 and not supports('parallel'):
+            workers = 1
+        relaxed = LOAD_RELAXED and supports('relaxed')
+
+        fake = Faker('pt_BR')
+        fake.seed_instance(SEED)
+        loader = LOADERS[load_mode]
+        batch_size = 1000 if load_mode == 'executemany' else GEN_BLOCK_SIZE
+        timer = {'gen': 0.0}
+        parallel = workers > 1 and generator == 'numpy'
+        if workers > 1 and not parallel:
+            print("Modo paralelo requer DATA_GENERATOR=numpy; populando com 1 worker")
+
+        if relaxed:
+            set_load_checks(cursor, False)
+            cursor.execute("ALTER TABLE orders DROP FOREIGN KEY fk_orders_customer")
+            cursor.execute("DROP INDEX fk_orders_customer ON orders")
+            conn.commit()
+
+        try:
+            # Insere clientes, com ids explícitos na sequência dos já existentes
+            t0 = time.perf_counter()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM customers")
+            id_offset = cursor.fetchone()[0] - start_c
+            if parallel:
+                load_parallel('customers', start_c, n_customers, workers, load_mode, id_offset=id_offset)
+            else:
+                loader(conn, cursor, 'customers', ['id'] + CUSTOMER_COLUMNS,
+                       customer_batches(fake, start_c, n_customers, batch_size, generator, timer, id_offset),
+                       n_customers - start_c)
+            report_load('customers', load_mode, n_customers - start_c, time.perf_counter() - t0)
+
+            ids = customer_id_range(cursor)
+
+            # Insere pedidos
+            t0 = time.perf_counter()
+            if parallel:
+                load_parallel('orders', start_o, n_orders, workers, load_mode, ids=ids)
+            else:
+                loader(conn, cursor, 'orders', ORDER_COLUMNS,
+                       order_batches(fake, ids, start_o, n_orders, batch_size, generator, timer),
+                       n_orders - start_o)
+            report_load('orders', load_mode, n_orders - start_o, time.perf_counter() - t0)
+        finally:
+            if relaxed:
+                restore_load_checks(conn, cursor)
+
+        n_rows = (n_customers - start_c) + (n_orders - start_o)
+        record_phase('populate.generate', timer['gen'], n_rows)
+        if timer['gen']:
+            print(f"Geração de dados ({generator}): {n_rows / timer['gen']:,.0f} linhas/s ({timer['gen']:.2f}s)")
+        report_peak_rss(workers=parallel)
+    except DB_ERRORS as err:
+        print(f"Erro ao popular banco: {err}")
+        raise
+
+def customer_id_range(cursor):
+    """
+    Ids de customers como range (a carga atribui ids contíguos). Tabelas com
+    buracos na sequência (ex.: snapshots antigos, carregados com
+    AUTO_INCREMENT) caem na lista explícita de ids.
+    """
+    cursor.execute("SELECT MIN(id), MAX(id), COUNT(*) FROM customers")
+    first, last, count = cursor.fetchone()
+    if count and last - first + 1 != count:
+        print("Aviso: ids de customers não são contíguos; buscando a lista de ids")
+        cursor.execute("SELECT id FROM customers")
+        return [r[0] for r in cursor.fetchall()]
+    return range(first or 1, (first or 1) + count)
+
+def peak_rss_mb():
+    """
+    Pico de memória residente (MB) deste processo e dos processos filhos já
+    encerrados (geradores do modo paralelo), ou (None, None) sem getrusage().
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+def report_peak_rss(workers=False):
+    """Imprime o pico de RSS até aqui (e o dos processos geradores, com workers=True)."""
+    own, children = peak_rss_mb()
+    if own is not None:
+        print(f"Pico de memória (RSS): {own:,.0f} MB" + (f", workers {children:,.0f} MB" if workers else ""))
+
+def report_load(table, load_mode, n_rows, elapsed):
+    """Imprime a vazão de carga (geração + inserção) de uma tabela."""
+    rate = n_rows / elapsed if elapsed else 0
+    print(f"Carga de {table} ({load_mode}): {n_rows} linhas em {elapsed:.2f}s — {rate:,.0f} linhas/s")
+
+def snapshot_key(n_customers, n_orders, generator=DATA_GENERATOR, seed=SEED):
+    """
+    Identifica um dataset populado: gerador, modo, semente e volumes, mais um
+    resumo de GENERATOR_VERSION, data de referência, VOCAB_POOL_SIZE e
+    GEN_BLOCK_SIZE (por extenso, o nome passaria de 64 caracteres).
+    """
+    mode = 'inc' if INCREMENTAL_TIERS and generator == 'numpy' else 'full'
+    params = f"{GENERATOR_VERSION}|{DATA_REF_DATE}|{VOCAB_POOL_SIZE}|{GEN_BLOCK_SIZE}"
+    digest = hashlib.sha1(params.encode()).hexdigest()[:8]
+    return f"{generator}_{mode}_s{seed}_c{n_customers}_o{n_orders}_{digest}"
+
+def _snapshot_tables(key):
+    return f"{SNAPSHOT_DB}.customers_{key}", f"{SNAPSHOT_DB}.orders_{key}"
+
+def restore_snapshot(conn, cursor, n_customers, n_orders):
+    """
+    Restaura customers/orders a partir do snapshot do volume, se existir.
+    Retorna True quando a geração de dados pode ser pulada.
+    """
+    if not SNAPSHOTS:
+        return False
+    key = snapshot_key(n_customers, n_orders)
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN (%s, %s)",
+        (SNAPSHOT_DB, f"customers_{key}", f"orders_{key}")
+    )
+    if cursor.fetchone()[0] < 2:
+        return False
+
+    snap_customers, snap_orders = _snapshot_tables(key)
+    t0 = time.perf_counter()
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("TRUNCATE TABLE orders")
+        cursor.execute("TRUNCATE TABLE customers")
+        cursor.execute(f"INSERT INTO customers SELECT * FROM {snap_customers}")
+        cursor.execute(f"INSERT INTO orders SELECT * FROM {snap_orders}")
+        conn.commit()
+    finally:
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+    record_phase('snapshot.restore', time.perf_counter() - t0, n_customers + n_orders)
+    print(f"Snapshot {key} restaurado em {time.perf_counter() - t0:.2f}s")
+    return True
+
+def save_snapshot(conn, cursor, n_customers, n_orders):
+    """Clona customers/orders recém-populadas para o banco de snapshots."""
+    if not SNAPSHOTS:
+        return
+    key = snapshot_key(n_customers, n_orders)
+    t0 = time.perf_counter()
+    try:
+        for table, snap in zip(('customers', 'orders'), _snapshot_tables(key)):
+            cursor.execute(f"DROP TABLE IF EXISTS {snap}")
+            cursor.execute(f"CREATE TABLE {snap} LIKE {table}")
+            cursor.execute(f"INSERT INTO {snap} SELECT * FROM {table}")
+        conn.commit()
+        record_phase('snapshot.save', time.perf_counter() - t0, n_customers + n_orders)
+        print(f"Snapshot {key} salvo em {time.perf_counter() - t0:.2f}s")
+    except DB_ERRORS as err:
+        # Snapshot é só um cache: a falha não interrompe os testes
+        print(f"Erro ao salvar snapshot {key}: {err}")
+
+def benchmark_generators(n_customers, n_orders):
+    """Compara a vazão (linhas/s) do gerador Faker por linha com o vetorizado, sem banco."""
+    ids = range(1, n_customers + 1)
+    results = {}
+
+    fake = Faker('pt_BR')
+    fake.seed_instance(SEED)
+    t0 = time.perf_counter()
+    faker_customers(fake, 0, n_customers)
+    faker_orders(fake, ids, n_orders)
+    results['faker'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    build_vocab(SEED)  # pools são pré-gerados uma única vez por execução
+    vocab_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    columns_to_rows(generate_customers(0, n_customers), CUSTOMER_COLUMNS)
+    columns_to_rows(generate_orders(0, n_orders, ids), ORDER_COLUMNS)
+    results['numpy'] = time.perf_counter() - t0
+
+    n_rows = n_customers + n_orders
+    print(f"\nGeração de {n_customers} clientes e {n_orders} pedidos:")
+    for name, elapsed in results.items():
+        print(f"  {name:<6} {elapsed:8.2f}s  {n_rows / elapsed:12,.0f} linhas/s")
+    print(f"  (pools do Faker para o gerador numpy: {vocab_time:.2f}s, pagos uma vez por execução)")
+    print(f"  Aceleração: {results['faker'] / results['numpy']:.1f}x")
+    return results
+
+def get_explain_plan(cursor, query, params=()):
+    """
+    Retorna o plano da query no backend configurado: no MySQL, EXPLAIN
+    FORMAT=JSON e EXPLAIN ANALYZE (linhas reais, loops e tempo por iterador;
+    executa a query uma vez); no SQLite, EXPLAIN QUERY PLAN.
+    """
+    return BACKEND.explain(cursor, query, params)
+
+def _plan_tables(node):
+    """Percorre o JSON do EXPLAIN e devolve os nós 'table', na ordem de acesso."""
+    if isinstance(node, dict):
+        if 'table_name' in node and 'access_type' in node:
+            yield node
+        for value in node.values():
+            yield from _plan_tables(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _plan_tables(item)
+
+def _table_access(table):
+    """
+    'tabela:acesso(índice)', marcando leitura só do índice ("Using index"),
+    partições lidas e o buffer de junção (ex.: hash join).
+    """
+    path = f"{table['table_name']}:{table['access_type']}"
+    if table.get('key'):
+        path += f"({table['key']}{', cobertura' if table.get('using_index') else ''})"
+    if table.get('partitions'):
+        path += f"[{len(table['partitions'])} partições]"
+    if table.get('using_join_buffer'):
+        path += f"[{table['using_join_buffer']}]"
+    return path
+
+def _plan_flags(node):
+    """Operações extras do plano: ordenação por filesort e tabela temporária."""
+    flags = []
+    if isinstance(node, dict):
+        if node.get('using_filesort'):
+            flags.append('filesort')
+        if node.get('using_temporary_table'):
+            flags.append('temporária')
+        for value in node.values():
+            flags += _plan_flags(value)
+    elif isinstance(node, list):
+        for item in node:
+            flags += _plan_flags(item)
+    return flags
+
+def summarize_json_plan(plan_json):
+    """Extrai caminho de acesso, custo estimado e linhas estimadas do EXPLAIN FORMAT=JSON."""
+    doc = json.loads(plan_json)
+    block = doc.get('query_block', {})
+    tables = list(_plan_tables(block))
+    access_path = ";".join([_table_access(t) for t in tables] + sorted(set(_plan_flags(block))))
+    cost = block.get('cost_info', {}).get('query_cost')
+    est_rows = sum(float(t.get('rows_produced_per_join', t.get('rows_examined_per_scan', 0))) for t in tables)
+    return access_path, float(cost) if cost is not None else None, est_rows
+
+_ANALYZE_ACTUAL = re.compile(r"actual time=([\d.]+)\.\.([\d.]+) rows=([\d.]+) loops=(\d+)")
+
+def summarize_analyze_plan(plan_analyze):
+    """Linhas reais, loops e tempo (ms) do iterador raiz do EXPLAIN ANALYZE."""
+    match = _ANALYZE_ACTUAL.search(plan_analyze.splitlines()[0]) if plan_analyze else None
+    if not match:
+        return None, None, None
+    _, last_row_ms, rows, loops = match.groups()
+    return float(rows), int(loops), float(last_row_ms)
+
+def open_plan_store():
+    """Abre (e cria, se preciso) o banco SQLite local com os planos de execução."""
+    store = sqlite3.connect(PLANS_DB)
+    store.execute("""
+    CREATE TABLE IF NOT EXISTS plans (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        scenario TEXT NOT NULL,
+        index_type TEXT NOT NULL,
+        size TEXT NOT NULL,
+        index_state TEXT NOT NULL,
+        access_path TEXT,
+        query_cost REAL,
+        est_rows REAL,
+        actual_rows REAL,
+        loops INTEGER,
+        actual_time_ms REAL,
+        query TEXT,
+        plan_json TEXT,
+        plan_analyze TEXT,
+        created_at TEXT NOT NULL
+    )
+    """)
+    columns = {row[1] for row in store.execute("PRAGMA table_info(plans)")}
+    for column, kind in (('backend', 'TEXT'), ('plan_text', 'TEXT')):
+        if column not in columns:
+            store.execute(f"ALTER TABLE plans ADD COLUMN {column} {kind}")
+    store.execute("""
+    CREATE INDEX IF NOT EXISTS idx_plans_scenario
+        ON plans(scenario, index_type, index_state, size, run_id)
+    """)
+    return store
+
+def save_explain_plan(plan, index_type, test_name, size_label, index_state, query):
+    """Grava o plano no banco de planos, com chave (cenário, volume, execução, estado do índice)."""
+    if plan is None or not any(plan.values()):
+        return
+    access_path, query_cost, est_rows, actual_rows, loops, actual_time_ms = BACKEND.summarize_plan(plan)
+
+    store = open_plan_store()
+    with store:
+        store.execute(
+            """
+            INSERT INTO plans (run_id, scenario, index_type, size, index_state, access_path, query_cost,
+                               est_rows, actual_rows, loops, actual_time_ms, query, plan_json,
+                               plan_analyze, plan_text, backend, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (RUN_ID, test_name, index_type, size_label, index_state, access_path, query_cost,
+             est_rows, actual_rows, loops, actual_time_ms, query, plan.get('json'), plan.get('analyze'),
+             plan.get('text'), BACKEND.name, datetime.now().isoformat(timespec='seconds'))
+        )
+    store.close()
+
+def _cost_changed(old, new, threshold):
+    if old is None or new is None:
+        return False
+    if old == 0:
+        return new != 0
+    return abs(new - old) / old > threshold
+
+def diff_plans(run_id=None, baseline_run=None, cost_threshold=0.2):
+    """
+    Sinaliza mudanças de plano. Entre volumes de uma mesma execução: só troca
+    do caminho de acesso (o custo cresce com o volume de forma diferente em
+    cada caminho — quase constante em um lookup, linear em um scan —, então
+    não é comparável entre volumes). Entre execuções (baseline_run → run_id):
+    troca do caminho de acesso ou do custo estimado no mesmo cenário e volume.
+    Retorna a lista de mudanças encontradas.
+    """
+    store = open_plan_store()
+    if run_id is None:
+        row = store.execute("SELECT MAX(run_id) FROM plans").fetchone()
+        run_id = row[0]
+    if run_id is None:
+        print("Nenhum plano armazenado.")
+        return []
+
+    query = """
+    SELECT scenario, index_type, index_state, size, access_path, query_cost
+    FROM plans WHERE run_id = ?
+    ORDER BY scenario, index_type, index_state, CAST(size AS INTEGER), id
+    """
+    current = {}
+    for scenario, index_type, state, size, path, cost in store.execute(query, (run_id,)):
+        # Mantém o último plano gravado para cada chave
+        current[(scenario, index_type, state, size)] = (path, cost)
+
+    changes = []
+    previous = {}
+    for (scenario, index_type, state, size), (path, cost) in current.items():
+        group = (scenario, index_type, state)
+        if group in previous:
+            prev_size, prev_path = previous[group]
+            if path != prev_path:
+                changes.append(f"{index_type} {scenario} [{state}] {prev_size} → {size}: "
+                               f"caminho de acesso {prev_path} → {path}")
+        previous[group] = (size, path)
+
+    if baseline_run:
+        baseline = {}
+        for scenario, index_type, state, size, path, cost in store.execute(query, (baseline_run,)):
+            baseline[(scenario, index_type, state, size)] = (path, cost)
+        for key, (path, cost) in current.items():
+            if key not in baseline:
+                continue
+            old_path, old_cost = baseline[key]
+            scenario, index_type, state, size = key
+            if path != old_path:
+                changes.append(f"{index_type} {scenario} [{state}] {size}: {baseline_run} → {run_id}: "
+                               f"caminho de acesso {old_path} → {path}")
+            elif _cost_changed(old_cost, cost, cost_threshold):
+                changes.append(f"{index_type} {scenario} [{state}] {size}: {baseline_run} → {run_id}: "
+                               f"custo {old_cost:.4g} → {cost:.4g}")
+    store.close()
+
+    print(f"Planos da execução {run_id}" + (f" comparados com {baseline_run}" if baseline_run else ""))
+    for change in changes:
+        print(f"  MUDANÇA: {change}")
+    if not changes:
+        print("  Nenhuma mudança de plano detectada.")
+    return changes
+
+# Contadores de SHOW SESSION STATUS capturados em cada execução medida.
+# Innodb_* são globais no servidor: os deltas só são limpos sem outros clientes.
+STATUS_COUNTERS = [
+    'Handler_read_key', 'Handler_read_next', 'Handler_read_rnd_next',
+    'Innodb_rows_read', 'Innodb_buffer_pool_reads', 'Innodb_buffer_pool_read_requests',
+    'Created_tmp_tables',
+]
+# Colunas vindas de performance_schema.events_statements_history (tempos em ps → s)
+PS_COUNTERS = ['ps_rows_examined', 'ps_lock_time', 'ps_timer_wait']
+
+# None = ainda não testado; False = performance_schema indisponível nesta sessão
+_ps_history_available = None
+
+def read_status(cursor):
+    """Lê os contadores de trabalho da sessão no backend configurado."""
+    return BACKEND.read_status(cursor)
+
+def read_last_statement(cursor):
+    """
+    Retorna rows_examined, lock_time e timer_wait do último SELECT desta
+    conexão em performance_schema.events_statements_history, ou {}.
+    """
+    global _ps_history_available
+    if _ps_history_available is False:
+        return {}
+    try:
+        cursor.execute("""
+        SELECT ROWS_EXAMINED, LOCK_TIME, TIMER_WAIT
+        FROM performance_schema.events_statements_history
+        WHERE THREAD_ID = (SELECT THREAD_ID FROM performance_schema.threads
+                           WHERE PROCESSLIST_ID = CONNECTION_ID())
+          AND EVENT_NAME = 'statement/sql/select'
+        ORDER BY EVENT_ID DESC LIMIT 1
+        """)
+        row = cursor.fetchone()
+    except DB_ERRORS as err:
+        print(f"performance_schema indisponível, seguindo só com SHOW STATUS: {err}")
+        _ps_history_available = False
+        return {}
+    _ps_history_available = True
+    if row is None:
+        return {}
+    rows_examined, lock_time, timer_wait = row
+    return {
+        'ps_rows_examined': int(rows_examined),
+        'ps_lock_time': int(lock_time) / 1e12,
+        'ps_timer_wait': int(timer_wait) / 1e12,
+    }
+
+def status_overhead(cursor):
+    """Delta causado pelo próprio SHOW STATUS, descontado de cada medição."""
+    before = read_status(cursor)
+    after = read_status(cursor)
+    return {name: after[name] - before[name] for name in after}
+
+def counters_delta(cursor, before, overhead):
+    """Delta dos contadores desde `before`, já sem o custo do SHOW STATUS."""
+    after = read_status(cursor)
+    delta = {name: after[name] - before[name] - overhead.get(name, 0) for name in after}
+    delta.update(BACKEND.read_last_statement(cursor))
+    return delta
+
+def summarize_counters(deltas):
+    """Mediana, por contador, dos deltas de todas as execuções."""
+    if not deltas:
+        return {}
+    names = [name for name in BACKEND.counters if all(name in d for d in deltas)]
+    return {name: float(np.median([d[name] for d in deltas])) for name in names}
+
+# Erros de banco tratados pelo harness, em qualquer backend
+DB_ERRORS = (mysql.connector.Error, sqlite3.Error)
+
+class MySQLBackend:
+    """
+    Backend padrão: servidor MySQL via mysql.connector. Os recursos em
+    `features` (carga em massa, snapshots, índices invisíveis, MEMORY, buffer
+    pool, particionamento, hash join, adaptive hash index) só existem neste backend.
+    """
+    name = 'mysql'
+    features = {'infile', 'relaxed', 'parallel', 'snapshots', 'invisible', 'memory', 'buffer_pool', 'partitions',
+                'hash_join', 'ahi'}
+    counters = STATUS_COUNTERS + PS_COUNTERS
+    # Índice de orders.customer_id: o InnoDB o cria junto com a FK e só o
+    # remove depois da constraint. {presente: comandos}
+    fk_index_sql = {
+        True: ["ALTER TABLE orders ADD CONSTRAINT fk_orders_customer "
+               "FOREIGN KEY (customer_id) REFERENCES customers(id)"],
+        False: ["ALTER TABLE orders DROP FOREIGN KEY fk_orders_customer",
+                "DROP INDEX fk_orders_customer ON orders"],
+    }
+    fk_indexed = True  # o esquema já cria o índice da FK
+
+    def create_database(self):
+        root_cnx = mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD
+        )
+        root_cur = root_cnx.cursor()
+        root_cur.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
+        if SNAPSHOTS:
+            root_cur.execute(f"CREATE DATABASE IF NOT EXISTS {SNAPSHOT_DB}")
+        root_cur.close()
+        root_cnx.close()
+
+    def connect(self, **overrides):
+        return mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            database=DB_NAME,
+            allow_local_infile=(LOAD_MODE == 'infile'),
+            **overrides
+        )
+
+    schema = [
+        """
+        CREATE TABLE customers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100),
+            email VARCHAR(100),
+            birth_date DATE,
+            address TEXT
+        ) ENGINE=InnoDB;
+        """,
+        """
+        CREATE TABLE orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT,
+            total DECIMAL(10,2),
+            description TEXT,
+            order_date DATETIME,
+            status VARCHAR(20),
+            CONSTRAINT fk_orders_customer FOREIGN KEY (customer_id) REFERENCES customers(id)
+        ) ENGINE=InnoDB;
+        """,
+    ]
+
+    def index_sql(self, name, scenario):
+        """(create_sql, drop_sql) do índice do cenário neste backend."""
+        return scenario['create_sql'], scenario['drop_sql']
+
+    def index_hint(self, name, use):
+        return f"FORCE INDEX ({name})" if use else f"IGNORE INDEX ({name})"
+
+    def analyze_sql(self, table):
+        return f"ANALYZE TABLE {table}"
+
+    def explain(self, cursor, query, params=()):
+        """EXPLAIN FORMAT=JSON e EXPLAIN ANALYZE (linhas reais, loops e tempo por iterador; executa a query uma vez)."""
+        plan = {'json': None, 'analyze': None}
+        try:
+            cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+            plan['json'] = cursor.fetchone()[0]
+        except DB_ERRORS as err:
+            print(f"Erro ao obter plano EXPLAIN: {err}")
+        try:
+            cursor.execute("EXPLAIN ANALYZE " + query, params)
+            plan['analyze'] = "\n".join(row[0] for row in cursor.fetchall())
+        except DB_ERRORS as err:
+            # EXPLAIN ANALYZE só existe a partir do MySQL 8.0.18
+            print(f"Erro ao obter EXPLAIN ANALYZE: {err}")
+        return plan
+
+    def summarize_plan(self, plan):
+        """(caminho de acesso, custo, linhas estimadas, linhas reais, loops, ms) do plano."""
+        access_path = query_cost = est_rows = None
+        if plan['json']:
+            access_path, query_cost, est_rows = summarize_json_plan(plan['json'])
+        return (access_path, query_cost, est_rows) + summarize_analyze_plan(plan['analyze'])
+
+    def access_path(self, cursor, query, params=()):
+        """Só o caminho de acesso, pelo EXPLAIN FORMAT=JSON (sem executar a query)."""
+        cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+        return summarize_json_plan(cursor.fetchone()[0])[0]
+
+    def read_status(self, cursor):
+        """Lê os contadores STATUS_COUNTERS da sessão."""
+        names = ", ".join(f"'{name}'" for name in STATUS_COUNTERS)
+        cursor.execute(f"SHOW SESSION STATUS WHERE Variable_name IN ({names})")
+        return {name: int(value) for name, value in cursor.fetchall()}
+
+    def read_last_statement(self, cursor):
+        return read_last_statement(cursor)
+
+class _SQLiteCursor:
+    """Cursor sqlite3 com a interface que o harness usa do mysql.connector (placeholders %s)."""
+
+    def __init__(self, conn):
+        self.connection = conn
+        self._cursor = conn.db.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params))
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql.replace('%s', '?'), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class _SQLiteConnection:
+    """
+    Conexão sqlite3 com a interface do mysql.connector usada pelo harness.
+    Um progress handler conta as instruções da VM do SQLite, o contador de
+    trabalho deste backend (equivalente aos Handler_read_* do MySQL).
+    """
+
+    def __init__(self, path):
+        sqlite3.register_adapter(Decimal, str)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.create_function('RAND', 0, random.random)  # ORDER BY RAND() dos sorteios de chaves
+        self.vm_steps = 0
+        self.db.set_progress_handler(self._tick, SQLITE_PROGRESS_STEP)
+
+    def _tick(self):
+        self.vm_steps += SQLITE_PROGRESS_STEP
+        return 0
+
+    def cursor(self, **kwargs):
+        # buffered/raw/prepared não se aplicam: o sqlite3 sempre lê linha a linha
+        return _SQLiteCursor(self)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.db.close()
+
+    def reconnect(self, **kwargs):
+        pass
+
+    def get_server_info(self):
+        return f"SQLite {sqlite3.sqlite_version}"
+
+    def get_server_version(self):
+        return tuple(int(part) for part in sqlite3.sqlite_version.split('.'))
+
+class SQLiteBackend:
+    """
+    Backend embutido (sqlite3 da biblioteca padrão), em SQLITE_PATH. Serve
+    para comparar os mesmos cenários entre engines e como substituto local
+    rápido para desenvolver o harness. Planos vêm de EXPLAIN QUERY PLAN; o
+    contador de trabalho é o número de instruções da VM.
+    """
+    name = 'sqlite'
+    features = set()
+    counters = ['sqlite_vm_steps']
+    # O SQLite não indexa a coluna da FK sozinho
+    fk_index_sql = {
+        True: ["CREATE INDEX IF NOT EXISTS fk_orders_customer ON orders(customer_id)"],
+        False: ["DROP INDEX IF EXISTS fk_orders_customer"],
+    }
+    fk_indexed = False
+
+    def create_database(self):
+        pass
+
+    def connect(self, **overrides):
+        return _SQLiteConnection(SQLITE_PATH)
+
+    schema = [
+        """
+        CREATE TABLE customers (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(100),
+            email VARCHAR(100),
+            birth_date DATE,
+            address TEXT
+        )
+        """,
+        """
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            total DECIMAL(10,2),
+            description TEXT,
+            order_date DATETIME,
+            status VARCHAR(20),
+            CONSTRAINT fk_orders_customer FOREIGN KEY (customer_id) REFERENCES customers(id)
+        )
+        """,
+    ]
+
+    def index_sql(self, name, scenario):
+        """
+        (create_sql, drop_sql) no SQLite: 'sqlite' no cenário sobrescreve o SQL;
+        B-Trees usam o mesmo CREATE INDEX; FULLTEXT não existe (None).
+        """
+        if 'sqlite' in scenario:
+            return scenario['sqlite']['create_sql'], scenario['sqlite']['drop_sql']
+        if scenario['index_type'] == 'FULLTEXT':
+            return None
+        return scenario['create_sql'], f"DROP INDEX IF EXISTS {name}"
+
+    def index_hint(self, name, use):
+        return f"INDEXED BY {name}" if use else "NOT INDEXED"
+
+    def analyze_sql(self, table):
+        return f"ANALYZE {table}"
+
+    def explain(self, cursor, query, params=()):
+        plan = {'json': None, 'analyze': None, 'text': None}
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            plan['text'] = "\n".join(row[3] for row in cursor.fetchall())
+        except sqlite3.Error as err:
+            print(f"Erro ao obter EXPLAIN QUERY PLAN: {err}")
+        return plan
+
+    def summarize_plan(self, plan):
+        access_path = ";".join(plan['text'].splitlines()) if plan['text'] else None
+        return access_path, None, None, None, None, None
+
+    def access_path(self, cursor, query, params=()):
+        return self.summarize_plan(self.explain(cursor, query, params))[0]
+
+    def read_status(self, cursor):
+        return {'sqlite_vm_steps': cursor.connection.vm_steps}
+
+    def read_last_statement(self, cursor):
+        return {}
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+BACKEND = BACKENDS[DB_BACKEND]()
+
+def supports(feature):
+    """True se o backend configurado (DB_BACKEND) tem o recurso."""
+    return feature in BACKEND.features
+
+def create_database():
+    """Cria o banco de dados caso não exista."""
+    try:
+        BACKEND.create_database()
+    except DB_ERRORS as err:
+        print(f"Erro ao criar banco de dados: {err}")
+        raise
+
+def set_server_version(conn):
+    """Registra a versão do servidor, que entra no hash das células do journal."""
+    global SERVER_VERSION
+    SERVER_VERSION = conn.get_server_info()
+
+def get_connection(**overrides):
+    """Retorna conexão com o banco de dados (overrides repassados ao conector, ex.: use_pure)."""
+    return BACKEND.connect(**overrides)
+
+def reset_schema(conn, cursor):
+    """Cria esquema limpo com as tabelas customers e orders."""
+    try:
+        cursor.execute("DROP TABLE IF EXISTS orders")
+        cursor.execute("DROP TABLE IF EXISTS customers")
+        for ddl in BACKEND.schema:
+            cursor.execute(ddl)
+        conn.commit()
+    except DB_ERRORS as err:
+        print(f"Erro ao resetar schema: {err}")
+        raise
+
+def reject_outliers(samples):
+    """Remove amostras fora das cercas de Tukey (Q1 - 1.5·IQR, Q3 + 1.5·IQR)."""
+    arr = np.asarray(samples, dtype=float)
+    if len(arr) < 4:
+        return arr
+    q1, q3 = np.percentile(arr, [25, 75])
+    iqr = q3 - q1
+    return arr[(arr >= q1 - 1.5 * iqr) & (arr <= q3 + 1.5 * iqr)]
+
+def _ci_half_width(arr):
+    """Meia largura do intervalo de confiança de 95% da média."""
+    if len(arr) < 2:
+        return float('inf')
+    return 1.96 * arr.std(ddof=1) / np.sqrt(len(arr))
+
+def summarize_samples(samples_ns):
+    """Estatísticas (em segundos) das amostras em nanossegundos, após remover outliers."""
+    kept = reject_outliers(samples_ns) / 1e9
+    return {
+        'mean': float(kept.mean()),
+        'median': float(np.median(kept)),
+        'p95': float(np.percentile(kept, 95)),
+        'p99': float(np.percentile(kept, 99)),
+        'stddev': float(kept.std(ddof=1)) if len(kept) > 1 else 0.0,
+        'ci95': float(_ci_half_width(kept)) if len(kept) > 1 else 0.0,
+        'runs': len(samples_ns),
+        'outliers': len(samples_ns) - len(kept),
+        'samples': kept.tolist(),
+    }
+
+# Cursor usado pelas consultas medidas em cada modo de fetch. 'cext' é o
+# caminho original (extensão C, cursor sem buffer); os demais usam o
+# protocolo em Python puro para expor o custo do cliente: 'buffered' traz
+# tudo no execute(), 'unbuffered' e 'raw' (sem conversão de tipos) fazem
+# streaming. Nos modos com streaming (inclusive 'cext') o resultado é lido
+# com fetchmany(FETCH_BATCH).
+FETCH_CURSORS = {
+    'cext': {},
+    'buffered': {'buffered': True},
+    'unbuffered': {'buffered': False},
+    'raw': {'raw': True},
+}
+STREAMING_FETCH_MODES = ('cext', 'unbuffered', 'raw')
+
+def connection_options(fetch_mode=FETCH_MODE):
+    """Opções de get_connection() para a conexão que executa as consultas medidas."""
+    return {'use_pure': fetch_mode != 'cext'}
+
+def execute_and_fetch(query_cursor, query_sql, params=(), fetch_mode=FETCH_MODE):
+    """
+    Executa a query e consome todo o resultado. Retorna (tempo até a 1ª linha,
+    tempo total) em ns. Nos modos com streaming a 1ª linha é marcada após o
+    primeiro fetchmany(); no 'buffered' o resultado já chega inteiro no execute().
+    """
+    t0 = time.perf_counter_ns()
+    query_cursor.execute(query_sql, params)
+    if fetch_mode in STREAMING_FETCH_MODES:
+        rows = query_cursor.fetchmany(FETCH_BATCH)
+        first = time.perf_counter_ns()
+        while rows:
+            rows = query_cursor.fetchmany(FETCH_BATCH)
+    else:
+        first = time.perf_counter_ns()
+        query_cursor.fetchall()
+    end = time.perf_counter_ns()
+    return first - t0, end - t0
+
+def time_query(conn, cursor, query_sql, params=(), counters=COLLECT_COUNTERS, fetch_mode=FETCH_MODE,
+               cache_mode=CACHE_MODE, budget=TIMING_BUDGET):
+    """
+    Motor de medição comum a todos os cenários. Faz um warm-up descartado e
+    repete a query (perf_counter_ns) por pelo menos N_RUNS execuções, até que
+    o IC de 95% da média fique abaixo de TIMING_CI_TARGET (relativo à média),
+    o orçamento `budget` (s, padrão TIMING_BUDGET) acabe ou TIMING_MAX_RUNS seja atingido.
+    Com counters=True, cada execução também registra o delta dos contadores
+    do servidor (fora da janela cronometrada); a mediana vai em 'counters'.
+    A query roda em um cursor do modo fetch_mode; `cursor` fica para os
+    contadores. 'ttfr' guarda a mediana do tempo até a 1ª linha. Com
+    cache_mode='cold' não há warm-up e o buffer pool é esvaziado antes de
+    cada execução (evict_buffer_pool(), fora da janela cronometrada).
+    """
+    cold = cache_mode == 'cold'
+    query_cursor = conn.cursor(**FETCH_CURSORS[fetch_mode])
+
+    # Warm-up
+    if not cold:
+        execute_and_fetch(query_cursor, query_sql, params, fetch_mode)
+
+    min_runs = max(N_RUNS, 1)
+    budget_ns = budget * 1e9
+    samples = []
+    first_row = []
+    deltas = []
+    overhead = status_overhead(cursor) if counters else None
+    started = time.perf_counter_ns()
+    while True:
+        if cold:
+            evict_buffer_pool(conn, cursor)
+        before = read_status(cursor) if counters else None
+        ttfr, total = execute_and_fetch(query_cursor, query_sql, params, fetch_mode)
+        samples.append(total)
+        first_row.append(ttfr)
+        if counters:
+            deltas.append(counters_delta(cursor, before, overhead))
+
+        n = len(samples)
+        if n >= TIMING_MAX_RUNS:
+            break
+        if n >= min_runs:
+            if time.perf_counter_ns() - started >= budget_ns:
+                break
+            kept = reject_outliers(samples)
+            if len(kept) >= 2 and _ci_half_width(kept) <= TIMING_CI_TARGET * kept.mean():
+                break
+    query_cursor.close()
+    stats = summarize_samples(samples)
+    stats['ttfr'] = float(np.median(first_row)) / 1e9
+    stats['fetch_mode'] = fetch_mode
+    stats['cache_mode'] = cache_mode
+    stats['counters'] = summarize_counters(deltas)
+    return stats
+
+def buffer_pool_size(cursor):
+    """Tamanho atual do buffer pool do InnoDB, em bytes."""
+    cursor.execute("SELECT @@GLOBAL.innodb_buffer_pool_size")
+    return int(cursor.fetchone()[0])
+
+def set_buffer_pool_size(cursor, size_bytes, timeout=600):
+    """
+    Redimensiona o buffer pool online e espera o fim do redimensionamento.
+    O InnoDB arredonda para múltiplos de innodb_buffer_pool_chunk_size ×
+    instâncias; retorna o tamanho efetivo.
+    """
+    cursor.execute("SET GLOBAL innodb_buffer_pool_size = %s", (int(size_bytes),))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_buffer_pool_resize_status'")
+        row = cursor.fetchone()
+        status = row[1] if row else ''
+        if not status or 'Completed' in status or 'did not change' in status:
+            break
+        time.sleep(0.2)
+    else:
+        print(f"Redimensionamento do buffer pool não terminou em {timeout}s")
+    return buffer_pool_size(cursor)
+
+def ensure_filler_table(conn, cursor, min_bytes):
+    """Garante uma tabela bp_filler com pelo menos min_bytes de dados, usada para expulsar páginas."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bp_filler (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        pad VARCHAR(1000)
+    ) ENGINE=InnoDB
+    """)
+    if table_count(cursor, 'bp_filler') == 0:
+        cursor.execute("INSERT INTO bp_filler (pad) VALUES (REPEAT('x', 1000))")
+    while True:
+        cursor.execute(
+            "SELECT DATA_LENGTH FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'bp_filler'",
+            (DB_NAME,)
+        )
+        if int(cursor.fetchone()[0]) >= min_bytes:
+            break
+        cursor.execute("INSERT INTO bp_filler (pad) SELECT pad FROM bp_filler")
+        conn.commit()
+        cursor.execute("ANALYZE TABLE bp_filler")
+        cursor.fetchall()
+
+def evict_buffer_pool(conn, cursor):
+    """
+    Esvazia o cache antes de uma execução a frio. COLD_EVICTION='restart'
+    reinicia o mysqld local com MYSQL_RESTART_CMD e reconecta. O padrão,
+    'scan', varre bp_filler (1,5× o buffer pool) com innodb_old_blocks_time
+    = 0, para que as páginas da varredura expulsem também a sublista "young".
+    'resize' antes encolhe o buffer pool ao mínimo e o restaura (mais lento).
+    """
+    if not supports('buffer_pool'):
+        return
+    if COLD_EVICTION == 'restart':
+        subprocess.run(MYSQL_RESTART_CMD, shell=True, check=True)
+        conn.reconnect(attempts=60, delay=1)
+        return
+
+    size = buffer_pool_size(cursor)
+    if COLD_EVICTION == 'resize':
+        cursor.execute("SELECT @@GLOBAL.innodb_buffer_pool_chunk_size * @@GLOBAL.innodb_buffer_pool_instances")
+        minimum = int(cursor.fetchone()[0])
+        if size > minimum:
+            set_buffer_pool_size(cursor, minimum)
+            set_buffer_pool_size(cursor, size)
+
+    ensure_filler_table(conn, cursor, int(size * 1.5))
+    cursor.execute("SELECT @@GLOBAL.innodb_old_blocks_time")
+    old_blocks_time = cursor.fetchone()[0]
+    try:
+        cursor.execute("SET GLOBAL innodb_old_blocks_time = 0")
+        cursor.execute("SELECT COUNT(pad) FROM bp_filler")
+        cursor.fetchall()
+    finally:
+        cursor.execute("SET GLOBAL innodb_old_blocks_time = %s", (old_blocks_time,))
+
+def data_size_bytes(cursor):
+    """Tamanho de dados + índices de customers e orders, em bytes."""
+    cursor.execute("ANALYZE TABLE customers, orders")
+    cursor.fetchall()
+    cursor.execute("""
+    SELECT SUM(DATA_LENGTH + INDEX_LENGTH) FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ('customers', 'orders')
+    """, (DB_NAME,))
+    return int(cursor.fetchone()[0])
+
+BP_SWEEP_HEADER = ['Volume', 'Dados (MB)', 'Buffer Pool Alvo (%)', 'Buffer Pool (MB)', 'Buffer Pool Efetivo (%)',
+                   'Cache', 'Cenário', 'Tipo', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)']
+
+def buffer_pool_sweep(fractions):
+    """
+    Reexecuta os cenários de SCENARIOS com o buffer pool em cada fração do
+    tamanho dos dados (ex.: 10%, 50%, 200%), em cada volume, e grava
+    tempos/bp_sweep.csv. O tamanho original do buffer pool é restaurado no fim.
+    """
+    create_database()
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    reset_schema(conn, cursor)
+    original = buffer_pool_size(cursor)
+    filename = os.path.join(TIMES_DIR, 'bp_sweep.csv')
+    file_exists = os.path.isfile(filename)
+    try:
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(BP_SWEEP_HEADER)
+            for nc, no in SIZES:
+                size_label = f"{no}"
+                prepare_tier(conn, cursor, nc, no)
+                data_bytes = data_size_bytes(cursor)
+                for fraction in fractions:
+                    actual = set_buffer_pool_size(cursor, data_bytes * fraction)
+                    print(f"\n{no} pedidos, buffer pool em {fraction:.0%} dos dados: "
+                          f"{actual / 2**20:.0f} MB efetivos ({actual / data_bytes:.0%})")
+                    for name in backend_scenarios():
+                        ni, wi = run_scenario(conn, cursor, name, size_label, record=False)
+                        if ni is None or wi is None:
+                            continue
+                        improvement = ((ni - wi) / ni * 100) if ni else 0
+                        writer.writerow([size_label, round(data_bytes / 2**20, 1), round(fraction * 100),
+                                         round(actual / 2**20, 1), round(actual / data_bytes * 100, 1),
+                                         CACHE_MODE, name, SCENARIOS[name]['index_type'],
+                                         round(ni, 6), round(wi, 6), round(improvement, 2)])
+                        csvfile.flush()
+    finally:
+        set_buffer_pool_size(cursor, original)
+        cursor.close()
+        conn.close()
+
+# Cabeçalho dos CSVs de tempos: as 4 primeiras colunas são as originais
+TIMES_STATS = [('median', 'Mediana (s)'), ('p95', 'P95 (s)'), ('p99', 'P99 (s)'),
+               ('stddev', 'Desvio (s)'), ('ci95', 'IC95 (s)'), ('runs', 'Execuções'),
+               ('outliers', 'Outliers'), ('ttfr', '1ª Linha Mediana (s)')]
+TIMES_HEADER = ['Volume', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)'] + [
+    f"{state} {label}" for state in ('Sem Índice', 'Com Índice') for _, label in TIMES_STATS
+] + ['Fetch', 'Cache']
+
+def _stat_value(stats, key):
+    value = stats.get(key, '')
+    if value == '':
+        return value
+    return value if isinstance(value, int) else round(value, 6)
+
+def times_row(size_label, no_stats, with_stats):
+    """Linha do CSV de tempos (dict por coluna de TIMES_HEADER) a partir das estatísticas."""
+    no_avg, with_avg = no_stats['mean'], with_stats['mean']
+    improvement = ((no_avg - with_avg) / no_avg * 100) if no_avg else 0
+    row = [size_label, round(no_avg, 6), round(with_avg, 6), round(improvement, 2)]
+    row += [_stat_value(stats, key) for stats in (no_stats, with_stats) for key, _ in TIMES_STATS]
+    row += [with_stats.get('fetch_mode', ''), with_stats.get('cache_mode', '')]
+    return dict(zip(TIMES_HEADER, row))
+
+
+def counter_rows(size_label, no_stats, with_stats):
+    """Linhas do CSV de contadores, uma por estado (sem/com índice)."""
+    if not no_stats.get('counters') and not with_stats.get('counters'):
+        return []
+    return [[size_label, state] + [stats.get('counters', {}).get(name, '') for name in BACKEND.counters]
+            for state, stats in (('sem_indice', no_stats), ('com_indice', with_stats))]
+
+def save_times(index_type, test_name, size_label, no_stats, with_stats):
+    """
+    Registra a medição no journal (a célula passa a 'done'); os CSVs de
+    tempos e de contadores são gerados a partir do journal por export_results().
+    """
+    if 'ttfr' in no_stats and 'ttfr' in with_stats:
+        print(f"{index_type} {test_name} ({size_label}) [{with_stats['fetch_mode']}]: "
+              f"sem índice 1ª linha {no_stats['ttfr']:.6f}s / total {no_stats['median']:.6f}s; "
+              f"com índice 1ª linha {with_stats['ttfr']:.6f}s / total {with_stats['median']:.6f}s")
+
+    no_rows = no_stats.get('counters', {}).get('Innodb_rows_read')
+    with_rows = with_stats.get('counters', {}).get('Innodb_rows_read')
+    if no_rows is not None and with_rows is not None:
+        print(f"{index_type} {test_name} ({size_label}): Innodb_rows_read por execução "
+              f"{no_rows:,.0f} sem índice vs {with_rows:,.0f} com índice")
+
+    journal_finish(index_type, test_name, size_label,
+                   times_row(size_label, no_stats, with_stats), counter_rows(size_label, no_stats, with_stats),
+                   {'no': no_stats.get('samples', []), 'with': with_stats.get('samples', [])})
+
+# Configuração que entra no hash de cada célula do journal: mudar qualquer
+# uma delas (ou o código de medição, a definição do cenário ou a versão do
+# servidor) invalida as células já medidas.
+JOURNAL_CONFIG = ['N_RUNS', 'TIMING_MAX_RUNS', 'TIMING_BUDGET', 'TIMING_CI_TARGET', 'FETCH_MODE', 'FETCH_BATCH',
+                  'CACHE_MODE', 'COLD_EVICTION', 'COLLECT_COUNTERS', 'DATA_GENERATOR', 'DATA_REF_DATE',
+                  'VOCAB_POOL_SIZE', 'GENERATOR_VERSION', 'GEN_BLOCK_SIZE', 'INCREMENTAL_TIERS', 'INDEX_TOGGLE',
+                  'ABAB_ROUNDS', 'DB_BACKEND']
+MEASUREMENT_CODE = ['execute_and_fetch', 'time_query', 'reject_outliers', 'summarize_samples',
+                    'measure_performance', 'measure_fulltext', 'run_scenario', 'measure_abab',
+                    '_measure_invisible']
+
+# Chaves dos cenários que não mudam a medição do journal (usadas só pela carga
+# e pela varredura de seletividade), fora do hash.
+UNHASHED_SCENARIO_KEYS = ('load_params', 'sweep')
+
+def config_hash(test_name, size_label):
+    """Hash da configuração, do código de medição e da definição do cenário (ou da função que o mede)."""
+    definition = SCENARIOS.get(test_name) or dict(
+        FK_SCENARIOS.get(test_name) or MEMORY_SCENARIOS.get(test_name) or {}, code=CUSTOM_CELLS[test_name][1])
+    parts = {
+        'config': {name: globals()[name] for name in JOURNAL_CONFIG},
+        'size': [size for size in SIZES if str(size[1]) == str(size_label)],
+        'scenario': {key: inspect.getsource(value) if callable(value) else value
+                     for key, value in definition.items() if key not in UNHASHED_SCENARIO_KEYS},
+        'code': [inspect.getsource(globals()[name]) for name in MEASUREMENT_CODE],
+        'server': SERVER_VERSION,
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+def open_journal():
+    """
+    Abre (e cria, se preciso) o journal de resultados: uma célula por
+    (cenário, tipo de índice, volume, semente, hash de configuração), com
+    status 'running' enquanto mede e 'done' ao terminar. Na criação, as
+    linhas dos CSVs de tempos existentes entram como células 'legacy'.
+    """
+    exists = os.path.isfile(JOURNAL_DB)
+    journal = sqlite3.connect(JOURNAL_DB)
+    journal.execute("""
+    CREATE TABLE IF NOT EXISTS cells (
+        id INTEGER PRIMARY KEY,
+        scenario TEXT NOT NULL,
+        index_type TEXT NOT NULL,
+        size TEXT NOT NULL,
+        seed TEXT NOT NULL,
+        config_hash TEXT NOT NULL,
+        status TEXT NOT NULL,
+        run_id TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        times_row TEXT,
+        counter_rows TEXT,
+        samples TEXT,
+        server_version TEXT,
+        backend TEXT,
+        UNIQUE (scenario, index_type, size, seed, config_hash)
+    )
+    """)
+    # Journals criados antes das colunas de amostras, versão do servidor e backend
+    columns = {row[1] for row in journal.execute("PRAGMA table_info(cells)")}
+    for column in ('samples', 'server_version', 'backend'):
+        if column not in columns:
+            journal.execute(f"ALTER TABLE cells ADD COLUMN {column} TEXT")
+    if not exists:
+        with journal:
+            _import_legacy_times(journal)
+    return journal
+
+def _import_legacy_times(journal):
+    """Importa as linhas de tempos/times_*.csv gravadas antes do journal."""
+    for filename in sorted(os.listdir(TIMES_DIR)):
+        match = re.fullmatch(r"times_(?:(sqlite)_)?(.+?)_(idx_.+)\.csv", filename)
+        if not match:
+            continue
+        backend, index_type, test_name = match.groups()
+        with open(os.path.join(TIMES_DIR, filename), newline='', encoding='utf-8') as csvfile:
+            for i, row in enumerate(csv.DictReader(csvfile)):
+                journal.execute(
+                    """
+                    INSERT INTO cells (scenario, index_type, size, seed, config_hash, status, times_row, backend)
+                    VALUES (?, ?, ?, 'legacy', ?, 'done', ?, ?)
+                    """,
+                    (test_name, index_type, row['Volume'], f"legacy-{i}", json.dumps(row), backend or 'mysql')
+                )
+
+def journal_done(index_type, test_name, size_label):
+    """True se a célula já foi medida com a semente e a configuração atuais."""
+    journal = open_journal()
+    row = journal.execute(
+        "SELECT status FROM cells WHERE scenario = ? AND index_type = ? AND size = ? AND seed = ? AND config_hash = ?",
+        (test_name, index_type, size_label, str(SEED), config_hash(test_name, size_label))
+    ).fetchone()
+    journal.close()
+    return row is not None and row[0] == 'done'
+
+def journal_start(index_type, test_name, size_label):
+    """Marca a célula como 'running'; uma célula que ficar assim (falha no meio) é refeita na próxima execução."""
+    journal = open_journal()
+    with journal:
+        journal.execute(
+            """
+            INSERT INTO cells (scenario, index_type, size, seed, config_hash, status, run_id, started_at, backend)
+            VALUES (?, ?, ?, ?, ?, 'running', ?, ?, ?)
+            ON CONFLICT (scenario, index_type, size, seed, config_hash) DO UPDATE SET
+                status = 'running', run_id = excluded.run_id, started_at = excluded.started_at,
+                finished_at = NULL, times_row = NULL, counter_rows = NULL
+            """,
+            (test_name, index_type, size_label, str(SEED), config_hash(test_name, size_label), RUN_ID,
+             datetime.now().isoformat(timespec='seconds'), DB_BACKEND)
+        )
+    journal.close()
+
+def journal_finish(index_type, test_name, size_label, row, counters, samples=None):
+    """Grava o resultado da célula (e as amostras de cada estado) e a marca como 'done'."""
+    journal = open_journal()
+    with journal:
+        journal.execute(
+            """
+            INSERT INTO cells (scenario, index_type, size, seed, config_hash, status, run_id, finished_at,
+                               times_row, counter_rows, samples, server_version, backend)
+            VALUES (?, ?, ?, ?, ?, 'done', ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (scenario, index_type, size, seed, config_hash) DO UPDATE SET
+                status = 'done', run_id = excluded.run_id, finished_at = excluded.finished_at,
+                times_row = excluded.times_row, counter_rows = excluded.counter_rows,
+                samples = excluded.samples, server_version = excluded.server_version
+            """,
+            (test_name, index_type, size_label, str(SEED), config_hash(test_name, size_label), RUN_ID,
+             datetime.now().isoformat(timespec='seconds'), json.dumps(row), json.dumps(counters),
+             json.dumps(samples) if samples else None, SERVER_VERSION, DB_BACKEND)
+        )
+    journal.close()
+
+def backend_prefix(backend=DB_BACKEND):
+    """Prefixo dos arquivos de resultado de um backend (vazio no MySQL, o caminho original)."""
+    return "" if backend == 'mysql' else f"{backend}_"
+
+def export_results():
+    """
+    Regera, a partir do journal, tempos/[<backend>_]times_*.csv e counters_*.csv
+    (a célula concluída mais recente de cada volume e semente; as importadas
+    dos CSVs antigos só entram nos volumes sem célula medida) e os gráficos
+    de cada índice (célula mais recente de cada volume, semente atual), além
+    do comparativo entre backends quando há células de mais de um.
+    """
+    journal = open_journal()
+    cells = journal.execute(
+        "SELECT COALESCE(backend, 'mysql'), scenario, index_type, size, seed, times_row, counter_rows FROM cells "
+        "WHERE status = 'done' ORDER BY finished_at, id"
+    ).fetchall()
+    journal.close()
+
+    groups = {}
+    for backend, scenario, index_type, size, seed, row, counters in cells:
+        groups.setdefault((backend, index_type, scenario), {})[(size, seed)] = (
+            json.loads(row), json.loads(counters) if counters else [])
+
+    for (backend, index_type, test_name), latest in groups.items():
+        measured = {size for size, seed in latest if seed != 'legacy'}
+        group = [cell for (size, seed), cell in sorted(latest.items(), key=lambda item: int(item[0][0]))
+                 if seed != 'legacy' or size not in measured]
+        prefix = backend_prefix(backend)
+        filename = os.path.join(TIMES_DIR, f'times_{prefix}{index_type}_{test_name}.csv')
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=TIMES_HEADER, restval='', extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(row for row, _ in group)
+
+        counters = [line for _, lines in group for line in lines]
+        if counters:
+            filename = os.path.join(TIMES_DIR, f'counters_{prefix}{index_type}_{test_name}.csv')
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(['Volume', 'Estado'] + BACKENDS[backend].counters)
+                writer.writerows(counters)
+
+    by_backend = {backend: latest_cells(backend) for backend in BACKENDS}
+    for backend, latest in by_backend.items():
+        for (index_type, test_name), current in latest.items():
+            sizes = [(nc, no) for nc, no in SIZES if str(no) in current]
+            if sizes:
+                results = [(float(current[str(no)][0]['Sem Índice (s)']), float(current[str(no)][0]['Com Índice (s)']))
+                           for _, no in sizes]
+                plot_results(results, sizes, test_name, index_type, backend)
+    for key in set.intersection(*(set(latest) for latest in by_backend.values())):
+        plot_backends(key, {backend: latest[key] for backend, latest in by_backend.items()})
+    print(f"CSVs e gráficos gerados a partir de {JOURNAL_DB} ({len(cells)} células)")
+
+def plot_backends(key, cells_by_backend):
+    """Melhoria percentual com índice, por volume, lado a lado em cada backend."""
+    index_type, test_name = key
+    plt.figure(figsize=(10, 6))
+    for backend, cells in cells_by_backend.items():
+        sizes = sorted(int(size) for size in cells)
+        improvements = [float(cells[str(size)][0]['Melhoria (%)']) for size in sizes]
+        plt.plot(sizes, improvements, '-o', label=backend)
+    plt.xlabel("Número de pedidos")
+    plt.ylabel("Melhoria Percentual (%)")
+    plt.title(f"{index_type} {test_name} — Ganho do índice por backend")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(CHARTS_DIR, f"backends_{index_type}_{test_name}.png"))
+    plt.close()
+
+def latest_cells(backend=DB_BACKEND):
+    """
+    Célula concluída mais recente de cada (tipo de índice, cenário, volume)
+    com a semente atual no backend: {(tipo, cenário): {volume: (linha de tempos, amostras)}}.
+    """
+    journal = open_journal()
+    cells = journal.execute(
+        "SELECT index_type, scenario, size, times_row, samples FROM cells "
+        "WHERE status = 'done' AND seed = ? AND COALESCE(backend, 'mysql') = ? ORDER BY finished_at, id",
+        (str(SEED), backend)
+    ).fetchall()
+    journal.close()
+    latest = {}
+    for index_type, scenario, size, row, samples in cells:
+        latest.setdefault((index_type, scenario), {})[size] = (json.loads(row), json.loads(samples) if samples else None)
+    return latest
+
+# Modelos de complexidade ajustados às amostras: nome -> colunas da matriz de projeto
+COMPLEXITY_MODELS = {
+    'O(1)': lambda n: [np.ones_like(n)],
+    'O(log n)': lambda n: [np.ones_like(n), np.log(n)],
+    'O(n)': lambda n: [np.ones_like(n), n],
+}
+
+def _fit_models(n, t):
+    """Mínimos quadrados de cada modelo; retorna {modelo: (coeficientes, AIC)}."""
+    fits = {}
+    for model, columns in COMPLEXITY_MODELS.items():
+        X = np.column_stack(columns(n))
+        coef, _, _, _ = np.linalg.lstsq(X, t, rcond=None)
+        rss = max(float(np.sum((t - X @ coef) ** 2)), 1e-300)
+        fits[model] = (coef, len(t) * math.log(rss / len(t)) + 2 * X.shape[1])
+    return fits
+
+def fit_complexity(samples_by_size, n_boot=500, seed=SEED):
+    """
+    Ajusta O(1), O(log n) e O(n) às amostras de todos os volumes e escolhe o
+    modelo de menor AIC. O IC de 95% do coeficiente de crescimento e a
+    confiança na escolha do modelo vêm de um bootstrap que reamostra as
+    execuções dentro de cada volume.
+    """
+    sizes = sorted(samples_by_size)
+    n = np.concatenate([np.full(len(samples_by_size[s]), float(s)) for s in sizes])
+    t = np.concatenate([np.asarray(samples_by_size[s], dtype=float) for s in sizes])
+    fits = _fit_models(n, t)
+    best = min(fits, key=lambda model: fits[model][1])
+    coef = fits[best][0]
+
+    rng = np.random.default_rng(seed)
+    slopes, picks = [], []
+    for _ in range(n_boot):
+        boot = {s: rng.choice(samples_by_size[s], len(samples_by_size[s])) for s in sizes}
+        bt = np.concatenate([boot[s] for s in sizes])
+        boot_fits = _fit_models(n, bt)
+        picks.append(min(boot_fits, key=lambda model: boot_fits[model][1]))
+        slopes.append(boot_fits[best][0][-1])
+    ss_tot = float(np.sum((t - t.mean()) ** 2))
+    X = np.column_stack(COMPLEXITY_MODELS[best](n))
+    return {
+        'model': best,
+        'intercept': float(coef[0]),
+        'slope': float(coef[-1]) if len(coef) > 1 else 0.0,
+        'slope_ci': tuple(float(v) for v in np.percentile(slopes, [2.5, 97.5])) if len(coef) > 1 else (0.0, 0.0),
+        'confidence': picks.count(best) / n_boot,
+        'r2': 1 - float(np.sum((t - X @ coef) ** 2)) / ss_tot if ss_tot else 1.0,
+        'aic': {model: fit[1] for model, fit in fits.items()},
+    }
+
+def mann_whitney(current, baseline):
+    """
+    Teste U de Mann-Whitney unilateral (aproximação normal, com correção de
+    empates): p-valor de `current` ser estocasticamente maior (mais lento)
+    que `baseline`.
+    """
+    x, y = np.asarray(current, dtype=float), np.asarray(baseline, dtype=float)
+    n1, n2 = len(x), len(y)
+    values = np.concatenate([x, y])
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    total = n1 + n2
+    variance = n1 * n2 / 12 * ((total + 1) - np.sum(counts ** 3 - counts) / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+SCALING_HEADER = ['Tipo', 'Cenário', 'Estado', 'Volumes', 'Modelo', 'Confiança do Modelo (%)', 'Intercepto (s)',
+                  'Coeficiente', 'Coeficiente IC95 Inf', 'Coeficiente IC95 Sup', 'R²',
+                  'AIC O(1)', 'AIC O(log n)', 'AIC O(n)']
+REGRESSION_HEADER = ['Tipo', 'Cenário', 'Volume', 'Estado', 'Mediana Base (s)', 'Mediana Atual (s)',
+                     'Variação (%)', 'p-valor', 'Regressão']
+STATES = (('no', 'sem_indice'), ('with', 'com_indice'))
+
+def analyze_scaling(latest):
+    """Ajusta os modelos de complexidade a cada cenário e estado; grava tempos/scaling.csv e os gráficos."""
+    rows = []
+    for (index_type, test_name), cells in sorted(latest.items()):
+        with_samples = {size: samples for size, (_, samples) in cells.items() if samples}
+        if len(with_samples) < 3:
+            continue
+        fits = {}
+        for key, state in STATES:
+            fit = fit_complexity({int(size): samples[key] for size, samples in with_samples.items()})
+            fits[key] = fit
+            rows.append([index_type, test_name, state, len(with_samples), fit['model'],
+                         round(fit['confidence'] * 100, 1), f"{fit['intercept']:.6g}", f"{fit['slope']:.6g}",
+                         f"{fit['slope_ci'][0]:.6g}", f"{fit['slope_ci'][1]:.6g}", round(fit['r2'], 4)]
+                        + [round(fit['aic'][model], 1) for model in COMPLEXITY_MODELS])
+            print(f"{index_type} {test_name} [{state}]: {fit['model']} (confiança {fit['confidence']:.0%}, "
+                  f"coeficiente {fit['slope']:.3g}, IC95 {fit['slope_ci'][0]:.3g}..{fit['slope_ci'][1]:.3g}, "
+                  f"R² {fit['r2']:.3f})")
+        plot_scaling(index_type, test_name, with_samples, fits)
+
+    with open(os.path.join(TIMES_DIR, f'{backend_prefix()}scaling.csv'), 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(SCALING_HEADER)
+        writer.writerows(rows)
+    return rows
+
+def plot_scaling(index_type, test_name, samples_by_size, fits):
+    """Amostras por volume com a curva do modelo escolhido, sem e com índice."""
+    sizes = sorted(int(size) for size in samples_by_size)
+    grid = np.linspace(sizes[0], sizes[-1], 100)
+    plt.figure(figsize=(10, 6))
+    for (key, state), style in zip(STATES, ('--', '-')):
+        fit = fits[key]
+        for size in sizes:
+            values = samples_by_size[str(size)][key]
+            plt.scatter([size] * len(values), values, s=8, alpha=0.4)
+        coef = [fit['intercept'], fit['slope']][:len(COMPLEXITY_MODELS[fit['model']](grid))]
+        curve = np.column_stack(COMPLEXITY_MODELS[fit['model']](grid)) @ np.asarray(coef)
+        label = 'Sem índice' if key == 'no' else 'Com índice'
+        plt.plot(grid, curve, style, label=f"{label}: {fit['model']}")
+    plt.xlabel("Número de pedidos")
+    plt.ylabel("Tempo de Execução (s)")
+    plt.yscale('log')
+    plt.title(f"{index_type} {test_name} — Modelo de escala")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(CHARTS_DIR, f"{backend_prefix()}{index_type}_{test_name}_scaling.png"))
+    plt.close()
+
+def _baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def save_baseline(name, latest):
+    """Grava as amostras das células atuais como baseline `name`."""
+    cells = [{'index_type': index_type, 'scenario': test_name, 'size': size, 'samples': samples}
+             for (index_type, test_name), by_size in sorted(latest.items())
+             for size, (_, samples) in by_size.items() if samples]
+    with open(_baseline_path(name), 'w', encoding='utf-8') as f:
+        json.dump({'name': name, 'created_at': datetime.now().isoformat(timespec='seconds'),
+                   'seed': SEED, 'cells': cells}, f)
+    print(f"Baseline '{name}' gravada com {len(cells)} células em {_baseline_path(name)}")
+
+def compare_baseline(name, latest, threshold=0.1, alpha=0.01):
+    """
+    Compara cada célula atual com a baseline `name`: há regressão quando a
+    mediana piora mais que `threshold` e o teste de Mann-Whitney rejeita, ao
+    nível `alpha`, que as amostras atuais não são mais lentas. Grava
+    tempos/regressions_<baseline>.csv e retorna o número de regressões.
+    """
+    with open(_baseline_path(name), encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows, regressions = [], 0
+    for cell in baseline['cells']:
+        current = latest.get((cell['index_type'], cell['scenario']), {}).get(cell['size'])
+        if not current or not current[1]:
+            print(f"{cell['index_type']} {cell['scenario']} ({cell['size']}): sem medição atual, ignorado")
+            continue
+        for key, state in STATES:
+            base, now = cell['samples'][key], current[1][key]
+            base_median, now_median = float(np.median(base)), float(np.median(now))
+            change = (now_median - base_median) / base_median if base_median else 0.0
+            p_value = mann_whitney(now, base)
+            regressed = change > threshold and p_value < alpha
+            regressions += regressed
+            rows.append([cell['index_type'], cell['scenario'], cell['size'], state, round(base_median, 6),
+                         round(now_median, 6), round(change * 100, 2), f"{p_value:.3g}", 'sim' if regressed else ''])
+            if regressed:
+                print(f"REGRESSÃO {cell['index_type']} {cell['scenario']} ({cell['size']}, {state}): "
+                      f"{base_median:.6f}s -> {now_median:.6f}s ({change:+.1%}, p={p_value:.3g})")
+
+    with open(os.path.join(TIMES_DIR, f'regressions_{name}.csv'), 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(REGRESSION_HEADER)
+        writer.writerows(rows)
+    print(f"{regressions} regressões em {len(rows)} comparações com a baseline '{name}' "
+          f"(limiar {threshold:.0%}, alfa {alpha})")
+    return regressions
+
+def analyze(baseline=None, save_as=None, threshold=0.1, alpha=0.01):
+    """Etapa de análise sobre o journal: modelos de escala, baseline e detecção de regressões."""
+    latest = latest_cells()
+    analyze_scaling(latest)
+    if save_as:
+        save_baseline(save_as, latest)
+    if baseline:
+        return compare_baseline(baseline, latest, threshold, alpha)
+    return 0
+
+def merge_stats(stats_list):
+    """Junta as estatísticas de várias rodadas da mesma consulta (modo ABAB) em uma só."""
+    merged = summarize_samples([s * 1e9 for stats in stats_list for s in stats['samples']])
+    merged['runs'] = sum(stats['runs'] for stats in stats_list)
+    merged['outliers'] += sum(stats['outliers'] for stats in stats_list)
+    merged['ttfr'] = float(np.median([stats['ttfr'] for stats in stats_list]))
+    merged['fetch_mode'] = stats_list[0]['fetch_mode']
+    merged['cache_mode'] = stats_list[0]['cache_mode']
+    counters = [stats['counters'] for stats in stats_list if stats.get('counters')]
+    merged['counters'] = {name: float(np.median([c[name] for c in counters]))
+                          for name in counters[0] if all(name in c for c in counters)} if counters else {}
+    return merged
+
+def invisible_indexes_supported(conn):
+    """Índices invisíveis existem a partir do MySQL 8.0 (o MariaDB usa IGNORED, com outra sintaxe)."""
+    return 'mariadb' not in conn.get_server_info().lower() and tuple(conn.get_server_version()[:2]) >= (8, 0)
+
+def index_toggle_mode(conn):
+    """Resolve INDEX_TOGGLE para 'drop' ou 'invisible', conforme o servidor."""
+    supported = supports('invisible') and invisible_indexes_supported(conn)
+    if INDEX_TOGGLE == 'drop' or (INDEX_TOGGLE == 'auto' and not supported):
+        return 'drop'
+    if not supported:
+        print(f"Servidor {conn.get_server_info()} sem índices invisíveis; usando DROP/CREATE INDEX")
+        return 'drop'
+    return 'invisible'
+
+def _index_target(drop_sql):
+    """(índice, tabela) a partir do 'DROP INDEX <índice> ON <tabela>' do cenário."""
+    return re.match(r"DROP INDEX (\w+) ON (\w+)", drop_sql).groups()
+
+def set_index_visible(conn, cursor, drop_sql, visible):
+    """Liga/desliga o índice para o otimizador (só metadados, sem reconstrução)."""
+    name, table = _index_target(drop_sql)
+    cursor.execute(f"ALTER TABLE {table} ALTER INDEX {name} {'VISIBLE' if visible else 'INVISIBLE'}")
+    conn.commit()
+
+def build_tier_indexes(conn, cursor, names):
+    """Cria, uma vez por volume, os índices dos cenários pedidos, todos invisíveis."""
+    for name in names:
+        scenario = SCENARIOS[name]
+        try:
+            cursor.execute(scenario['drop_sql'])
+            conn.commit()
+        except DB_ERRORS:
+            pass
+        t0 = time.perf_counter()
+        with phase('index_ddl'):
+            cursor.execute(scenario['create_sql'])
+            conn.commit()
+        set_index_visible(conn, cursor, scenario['drop_sql'], False)
+        print(f"Índice {name} criado (invisível) em {time.perf_counter() - t0:.2f}s")
+
+def drop_tier_indexes(conn, cursor, names):
+    """Remove os índices criados por build_tier_indexes() antes do próximo volume."""
+    for name in names:
+        try:
+            cursor.execute(SCENARIOS[name]['drop_sql'])
+            conn.commit()
+        except DB_ERRORS:
+            pass
+
+def measure_abab(conn, cursor, query_a, params_a, query_b, params_b, set_state):
+    """
+    Intercala ABAB_ROUNDS pares de medições sem índice (A) e com índice (B),
+    chamando set_state(False/True) antes de cada uma; a deriva do buffer pool
+    e do cache do SO afeta os dois lados igualmente. O orçamento de tempo é
+    dividido entre as rodadas. Retorna (estatísticas A, estatísticas B).
+    """
+    budget = TIMING_BUDGET / max(ABAB_ROUNDS, 1)
+    a_rounds, b_rounds = [], []
+    for _ in range(max(ABAB_ROUNDS, 1)):
+        set_state(False)
+        a_rounds.append(time_query(conn, cursor, query_a, params_a, budget=budget))
+        set_state(True)
+        b_rounds.append(time_query(conn, cursor, query_b, params_b, budget=budget))
+    return merge_stats(a_rounds), merge_stats(b_rounds)
+
+def measure_performance(conn, cursor, create_sql, drop_sql, query_sql, params=(), test_name="", size_label="", index_type="BTREE",
+                        record=True, toggle='drop'):
+    """
+    Mede tempo de execução de consulta com e sem índice,
+    executa planos EXPLAIN e salva resultados (record=False só mede).
+    Com toggle='invisible' o índice já existe (build_tier_indexes()) e é só
+    alternado entre INVISIBLE e VISIBLE, em rodadas ABAB.
+    """
+    if toggle == 'invisible':
+        return _measure_invisible(conn, cursor, drop_sql, query_sql, params, test_name, size_label, index_type, record)
+    try:
+        # Remove índice se existir
+        if drop_sql:
+            try:
+                cursor.execute(drop_sql)
+                conn.commit()
+            except DB_ERRORS:
+                pass
+
+        no_stats = time_query(conn, cursor, query_sql, params)
+
+        # Salva plano explain sem índice
+        if record:
+            explain_plan_no_idx = get_explain_plan(cursor, query_sql, params)
+            save_explain_plan(explain_plan_no_idx, index_type, test_name, size_label, 'no_idx', query_sql)
+
+        # Cria índice
+        if create_sql:
+            cursor.execute(create_sql)
+            conn.commit()
+
+        with_stats = time_query(conn, cursor, query_sql, params)
+
+        # Salva plano explain com índice
+        if record:
+            explain_plan_with_idx = get_explain_plan(cursor, query_sql, params)
+            save_explain_plan(explain_plan_with_idx, index_type, test_name, size_label, 'with_idx', query_sql)
+
+        # Remove índice para próxima rodada
+        if drop_sql:
+            cursor.execute(drop_sql)
+            conn.commit()
+
+        if record:
+            save_times(index_type, test_name, size_label, no_stats, with_stats)
+        return no_stats['mean'], with_stats['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao medir performance: {err}")
+        return None, None
+
+def _measure_invisible(conn, cursor, drop_sql, query_sql, params, test_name, size_label, index_type, record):
+    """measure_performance() no modo de índice invisível; o índice termina invisível."""
+    def set_state(visible):
+        set_index_visible(conn, cursor, drop_sql, visible)
+
+    try:
+        try:
+            no_stats, with_stats = measure_abab(conn, cursor, query_sql, params, query_sql, params, set_state)
+            if record:
+                for visible, state in ((False, 'no_idx'), (True, 'with_idx')):
+                    set_state(visible)
+                    plan = get_explain_plan(cursor, query_sql, params)
+                    save_explain_plan(plan, index_type, test_name, size_label, state, query_sql)
+        finally:
+            # Um erro com o índice visível não pode contaminar as medições seguintes
+            set_state(False)
+
+        if record:
+            save_times(index_type, test_name, size_label, no_stats, with_stats)
+        return no_stats['mean'], with_stats['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao medir performance: {err}")
+        return None, None
+
+def measure_fulltext(conn, cursor, idx_sql, drop_sql, query_with, params_with, query_without, params_without, test_name="", size_label="",
+                     record=True, toggle='drop'):
+    """
+    Mede desempenho específico para FULLTEXT index,
+    comparando MATCH AGAINST e LIKE, incluindo planos EXPLAIN
+    (record=False só mede). Com toggle='invisible' o índice já existe e
+    fica visível durante rodadas ABAB de LIKE e MATCH (o LIKE não o usa).
+    """
+    if toggle == 'invisible':
+        try:
+            try:
+                set_index_visible(conn, cursor, drop_sql, True)
+                no_stats, with_stats = measure_abab(conn, cursor, query_without, params_without,
+                                                    query_with, params_with, lambda visible: None)
+                if record:
+                    explain_no_idx = get_explain_plan(cursor, query_without, params_without)
+                    save_explain_plan(explain_no_idx, 'FULLTEXT', test_name, size_label, 'no_idx', query_without)
+                    explain_with_idx = get_explain_plan(cursor, query_with, params_with)
+                    save_explain_plan(explain_with_idx, 'FULLTEXT', test_name, size_label, 'with_idx', query_with)
+            finally:
+                set_index_visible(conn, cursor, drop_sql, False)
+
+            if record:
+                save_times('FULLTEXT', test_name, size_label, no_stats, with_stats)
+            return no_stats['mean'], with_stats['mean']
+        except DB_ERRORS as err:
+            print(f"Erro ao medir FULLTEXT: {err}")
+            return None, None
+    try:
+        # Remove índice
+        try:
+            cursor.execute(drop_sql)
+            conn.commit()
+        except DB_ERRORS:
+            pass
+
+        # LIKE (sem índice)
+        no_stats = time_query(conn, cursor, query_without, params_without)
+
+        if record:
+            explain_no_idx = get_explain_plan(cursor, query_without, params_without)
+            save_explain_plan(explain_no_idx, 'FULLTEXT', test_name, size_label, 'no_idx', query_without)
+
+        # Cria FULLTEXT index
+        cursor.execute(idx_sql)
+        conn.commit()
+
+        # MATCH AGAINST
+        with_stats = time_query(conn, cursor, query_with, params_with)
+
+        if record:
+            explain_with_idx = get_explain_plan(cursor, query_with, params_with)
+            save_explain_plan(explain_with_idx, 'FULLTEXT', test_name, size_label, 'with_idx', query_with)
+
+        # Remove índice para próxima rodada
+        cursor.execute(drop_sql)
+        conn.commit()
+
+        if record:
+            save_times('FULLTEXT', test_name, size_label, no_stats, with_stats)
+        return no_stats['mean'], with_stats['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao medir FULLTEXT: {err}")
+        return None, None
+
+def _middle_range(cursor, table, column, fraction, where="", params=()):
+    """
+    Intervalo [lo, hi] de `column` que cobre a fração central `fraction` das
+    linhas (filtradas por `where`), para que a faixa sempre caia sobre os dados.
+    """
+    cursor.execute(f"SELECT COUNT(*) FROM {table} {where}", params)
+    count = cursor.fetchone()[0]
+    bounds = []
+    for offset in (int(count * (0.5 - fraction / 2)), max(int(count * (0.5 + fraction / 2)) - 1, 0)):
+        cursor.execute(f"SELECT {column} FROM {table} {where} ORDER BY {column} LIMIT 1 OFFSET %s",
+                       params + (offset,))
+        bounds.append(cursor.fetchone()[0])
+    return tuple(bounds)
+
+def result_rows(cursor, query_sql, params=()):
+    """Número de linhas que a consulta devolve."""
+    cursor.execute(f"SELECT COUNT(*) FROM ({query_sql}) AS q", params)
+    return cursor.fetchone()[0]
+
+def sample_keys(keys, n, distribution=WORKLOAD_DIST, seed=SEED):
+    """
+    Sorteia n chaves (com reposição) de `keys` segundo a distribuição:
+    'uniform'; 'zipf' (a k-ésima chave mais popular tem peso 1/k^ZIPF_S, com
+    a ordem de popularidade embaralhada); 'hot' (HOT_TRAFFIC dos acessos vão
+    para HOT_KEYS das chaves).
+    """
+    rng = np.random.default_rng(seed)
+    size = len(keys)
+    if distribution == 'uniform':
+        idx = rng.integers(0, size, n)
+    elif distribution == 'zipf':
+        weights = 1.0 / np.arange(1, size + 1) ** ZIPF_S
+        idx = rng.permutation(size)[rng.choice(size, n, p=weights / weights.sum())]
+    elif distribution == 'hot':
+        hot = rng.permutation(size)[:max(1, int(size * HOT_KEYS))]
+        idx = np.where(rng.random(n) < HOT_TRAFFIC, hot[rng.integers(0, len(hot), n)], rng.integers(0, size, n))
+    else:
+        raise ValueError(f"Distribuição desconhecida: {distribution}")
+    return [keys[i] for i in idx]
+
+def _first_email(cursor):
+    cursor.execute("SELECT email FROM customers LIMIT 1")
+    return (cursor.fetchone()[0],)
+
+def _sample_emails(cursor, n):
+    cursor.execute("SELECT email FROM customers ORDER BY RAND() LIMIT %s", (n,))
+    return [(email,) for email in sample_keys([email for (email,) in cursor.fetchall()], n)]
+
+def _sample_date_ranges(cursor, n, days=7):
+    """Sorteia n janelas [início, fim] de `days` dias, alinhadas desde o pedido mais antigo."""
+    cursor.execute("SELECT MIN(order_date), MAX(order_date) FROM orders")
+    first, last = (date.fromisoformat(str(value)[:10]) for value in cursor.fetchone())
+    windows = [(f"{first + timedelta(days=d)} 00:00:00", f"{first + timedelta(days=d + days - 1)} 23:59:59")
+               for d in range(0, (last - first).days + 1, days)]
+    return sample_keys(windows, n)
+
+# Cenários de índice sobre customers/orders (o nome do cenário é o nome do
+# índice; 'columns' são as colunas indexadas). 'params' devolve os parâmetros
+# fixos de run_tests(); 'load_params' (opcional) devolve o conjunto sorteado
+# (segundo WORKLOAD_DIST) pelo gerador de carga. 'sweep' (opcional) descreve a
+# coluna varrida pelo teste de seletividade: 'between' (faixa) ou 'greater'
+# (limite inferior), com um 'prefix' (coluna, valor) fixo no índice composto.
+# 'prefix_column' (opcional) é a coluna de um índice de prefixo,
+# cujo comprimento é variado por prefix_sweep().
+# Cenários com 'baseline_sql' comparam consultas diferentes sem índice (LIKE)
+# e com índice (MATCH ... AGAINST). 'backends' (opcional) restringe o cenário
+# a alguns backends; 'sqlite' (opcional) sobrescreve create_sql/drop_sql no SQLite.
+SCENARIOS = {
+    'idx_cust_email': {
+        'index_type': 'BTREE_UNIQUE',
+        'table': 'customers',
+        'columns': ['email'],
+        'create_sql': "CREATE UNIQUE INDEX idx_cust_email ON customers(email)",
+        'drop_sql': "DROP INDEX idx_cust_email ON customers",
+        'query_sql': "SELECT * FROM customers WHERE email = %s",
+        'params': _first_email,
+        'load_params': _sample_emails,
+    },
+    'idx_ord_date': {
+        'index_type': 'BTREE',
+        'table': 'orders',
+        'columns': ['order_date'],
+        'create_sql': "CREATE INDEX idx_ord_date ON orders(order_date)",
+        'drop_sql': "DROP INDEX idx_ord_date ON orders",
+        'query_sql': "SELECT * FROM orders WHERE order_date BETWEEN %s AND %s",
+        'params': lambda cursor: _middle_range(cursor, 'orders', 'order_date', 0.1),
+        'load_params': _sample_date_ranges,
+        'sweep': {'column': 'order_date', 'kind': 'between'},
+    },
+    'idx_ord_status': {
+        'index_type': 'BTREE',
+        'table': 'orders',
+        'columns': ['status'],
+        'create_sql': "CREATE INDEX idx_ord_status ON orders(status)",
+        'drop_sql': "DROP INDEX idx_ord_status ON orders",
+        'query_sql': "SELECT * FROM orders WHERE status = %s",
+        'params': lambda cursor: ('Entregue',),
+        'load_params': lambda cursor, n: [(status,) for status in sample_keys(ORDER_STATUSES, n)],
+    },
+    'idx_ord_total': {
+        'index_type': 'BTREE',
+        'table': 'orders',
+        'columns': ['total'],
+        'create_sql': "CREATE INDEX idx_ord_total ON orders(total)",
+        'drop_sql': "DROP INDEX idx_ord_total ON orders",
+        'query_sql': "SELECT * FROM orders WHERE total > %s",
+        'params': lambda cursor: (500,),
+        'sweep': {'column': 'total', 'kind': 'greater'},
+    },
+    'idx_ord_desc': {
+        'index_type': 'FULLTEXT',
+        'table': 'orders',
+        'columns': ['description'],
+        'create_sql': "CREATE FULLTEXT INDEX idx_ord_desc ON orders(description)",
+        'drop_sql': "DROP INDEX idx_ord_desc ON orders",
+        'query_sql': "SELECT * FROM orders WHERE MATCH(description) AGAINST(%s IN BOOLEAN MODE)",
+        'params': lambda cursor: _fulltext_term(cursor, 'medium'),
+        'baseline_sql': "SELECT * FROM orders WHERE description LIKE %s",
+        'baseline_params': lambda cursor: (_fulltext_like(_fulltext_term(cursor, 'medium')[0]),),
+    },
+    'idx_composto': {
+        'index_type': 'BTREE_COMPOSTO',
+        'table': 'orders',
+        'columns': ['status', 'order_date'],
+        'create_sql': "CREATE INDEX idx_composto ON orders(status, order_date)",
+        'drop_sql': "DROP INDEX idx_composto ON orders",
+        'query_sql': "SELECT * FROM orders WHERE status = %s AND order_date BETWEEN %s AND %s",
+        'params': lambda cursor: ('Entregue',) + _middle_range(cursor, 'orders', 'order_date', 0.1,
+                                                               "WHERE status = %s", ('Entregue',)),
+        'sweep': {'column': 'order_date', 'kind': 'between', 'prefix': ('status', 'Entregue')},
+    },
+    'idx_cobertura': {
+        'index_type': 'BTREE_COBERTURA',
+        'table': 'orders',
+        'columns': ['status', 'order_date', 'total'],
+        'create_sql': "CREATE INDEX idx_cobertura ON orders(status, order_date, total)",
+        'drop_sql': "DROP INDEX idx_cobertura ON orders",
+        'query_sql': "SELECT status, order_date, total FROM orders WHERE status = %s AND order_date BETWEEN %s AND %s",
+        'params': lambda cursor: ('Entregue',) + _middle_range(cursor, 'orders', 'order_date', 0.1,
+                                                               "WHERE status = %s", ('Entregue',)),
+        'sweep': {'column': 'order_date', 'kind': 'between', 'prefix': ('status', 'Entregue')},
+    },
+    'idx_ord_sort': {
+        'index_type': 'BTREE_ORDENACAO',
+        'table': 'orders',
+        'columns': ['order_date'],
+        'create_sql': "CREATE INDEX idx_ord_sort ON orders(order_date)",
+        'drop_sql': "DROP INDEX idx_ord_sort ON orders",
+        'query_sql': "SELECT * FROM orders ORDER BY order_date LIMIT %s",
+        'params': lambda cursor: (100,),
+    },
+    'idx_cust_email_prefix': {
+        'index_type': 'BTREE_PREFIXO',
+        'backends': ('mysql',),
+        'table': 'customers',
+        'columns': ['email'],
+        'create_sql': "CREATE INDEX idx_cust_email_prefix ON customers(email(10))",
+        'drop_sql': "DROP INDEX idx_cust_email_prefix ON customers",
+        'query_sql': "SELECT * FROM customers WHERE email = %s",
+        'params': _first_email,
+        'load_params': _sample_emails,
+        'prefix_column': 'email',
+    },
+    'idx_ord_desc_prefix': {
+        'index_type': 'BTREE_PREFIXO',
+        'backends': ('mysql',),
+        'table': 'orders',
+        'columns': ['description'],
+        'create_sql': "CREATE INDEX idx_ord_desc_prefix ON orders(description(16))",
+        'drop_sql': "DROP INDEX idx_ord_desc_prefix ON orders",
+        'query_sql': "SELECT * FROM orders WHERE description LIKE %s",
+        'params': lambda cursor: (_middle_range(cursor, 'orders', 'description', 0)[0][:12] + '%',),
+        'prefix_column': 'description',
+    },
+    'idx_ord_month': {
+        'index_type': 'EXPRESSAO',
+        'backends': ('sqlite',),
+        'table': 'orders',
+        'columns': ['order_date'],
+        'create_sql': "CREATE INDEX idx_ord_month ON orders(substr(order_date, 1, 7))",
+        'drop_sql': "DROP INDEX IF EXISTS idx_ord_month",
+        'query_sql': "SELECT * FROM orders WHERE substr(order_date, 1, 7) = %s",
+        'params': lambda cursor: (str(_middle_range(cursor, 'orders', 'order_date', 0.1)[0])[:7],),
+    },
+    'idx_ord_pending': {
+        'index_type': 'PARCIAL',
+        'backends': ('sqlite',),
+        'table': 'orders',
+        'columns': ['order_date'],
+        'create_sql': "CREATE INDEX idx_ord_pending ON orders(order_date) WHERE status = 'Pendente'",
+        'drop_sql': "DROP INDEX IF EXISTS idx_ord_pending",
+        'query_sql': "SELECT * FROM orders WHERE status = 'Pendente' AND order_date BETWEEN %s AND %s",
+        'params': lambda cursor: _middle_range(cursor, 'orders', 'order_date', 0.1,
+                                               "WHERE status = %s", ('Pendente',)),
+    },
+}
+
+def scenario_def(name):
+    """
+    Cenário com o SQL de índice do backend configurado (BACKEND.index_sql()),
+    ou None se o backend não o suporta ('backends' no cenário ou tipo de índice).
+    """
+    scenario = SCENARIOS[name]
+    if DB_BACKEND not in scenario.get('backends', BACKENDS):
+        return None
+    index_sql = BACKEND.index_sql(name, scenario)
+    if index_sql is None:
+        return None
+    return dict(scenario, create_sql=index_sql[0], drop_sql=index_sql[1])
+
+def backend_scenarios():
+    """Nomes dos cenários suportados pelo backend configurado."""
+    return [name for name in SCENARIOS if scenario_def(name)]
+
+def scenario_query(scenario, cursor, with_index, n_params=1):
+    """
+    Consulta e lista de parâmetros de um cenário no estado pedido. Com
+    n_params > 1 usa 'load_params', quando o cenário define um sorteio.
+    """
+    if not with_index and 'baseline_sql' in scenario:
+        return scenario['baseline_sql'], [scenario['baseline_params'](cursor)]
+    if n_params > 1 and 'load_params' in scenario:
+        return scenario['query_sql'], scenario['load_params'](cursor, n_params)
+    return scenario['query_sql'], [scenario['params'](cursor)]
+
+def run_scenario(conn, cursor, name, size_label, record=True, toggle='drop'):
+    """
+    Mede um cenário de SCENARIOS com e sem índice; retorna (média sem, média com).
+    toggle='invisible' supõe o índice já criado por build_tier_indexes().
+    """
+    scenario = scenario_def(name)
+    # Confere que os parâmetros fixos selecionam alguma linha
+    check_sql, check_params = scenario_query(scenario, cursor, with_index=False)
+    if not result_rows(cursor, check_sql, check_params[0]):
+        print(f"Aviso: {name} não retorna linhas com {check_params[0]} em {size_label}")
+    if 'baseline_sql' in scenario:
+        return measure_fulltext(
+            conn, cursor,
+            scenario['create_sql'], scenario['drop_sql'],
+            scenario['query_sql'], scenario['params'](cursor),
+            scenario['baseline_sql'], scenario['baseline_params'](cursor),
+            test_name=name, size_label=size_label, record=record, toggle=toggle
+        )
+    return measure_performance(
+        conn, cursor,
+        scenario['create_sql'], scenario['drop_sql'],
+        scenario['query_sql'], scenario['params'](cursor),
+        test_name=name, size_label=size_label, index_type=scenario['index_type'], record=record, toggle=toggle
+    )
+
+def hinted_query(query_sql, table, hint):
+    """Insere uma dica de índice (ex.: 'FORCE INDEX (idx)', 'INDEXED BY idx') logo após 'FROM <table>'."""
+    return query_sql.replace(f"FROM {table} ", f"FROM {table} {hint} ", 1)
+
+def sweep_params(cursor, scenario, target, n_samples, rng):
+    """
+    Sorteia até n_samples conjuntos de parâmetros que selecionam a fração
+    `target` das linhas varridas (as da tabela ou, com 'prefix', as que casam
+    com o prefixo). A faixa é montada sobre os valores reais da coluna
+    (ordenados), então o número de linhas de cada conjunto é conhecido sem
+    consultar o banco. Em 'greater' o limite varia em ±5% das linhas em torno
+    do alvo. Retorna [(params, linhas)], vazio se o alvo não couber nos dados.
+    """
+    spec = scenario['sweep']
+    prefix = (spec['prefix'][1],) if 'prefix' in spec else ()
+    values = sweep_population(cursor, scenario)
+    k = max(1, int(round(target * len(values))))
+    if k >= len(values):
+        return []
+
+    samples = {}
+    if spec['kind'] == 'greater':
+        spread = k // 20
+        positions = np.clip(len(values) - k - 1 + rng.integers(-spread, spread + 1, n_samples), 0, len(values) - 2)
+        for bound in values[positions]:
+            samples[(bound,)] = len(values) - np.searchsorted(values, bound, side='right')
+    else:
+        for start in rng.integers(0, len(values) - k + 1, n_samples):
+            lo, hi = values[start], values[start + k - 1]
+            samples[(lo, hi)] = np.searchsorted(values, hi, side='right') - np.searchsorted(values, lo, side='left')
+    return [(prefix + bounds, int(rows)) for bounds, rows in samples.items() if rows > 0]
+
+def sweep_population(cursor, scenario):
+    """Valores ordenados da coluna varrida, restritos ao prefixo do 'sweep' quando houver."""
+    spec = scenario['sweep']
+    where, prefix = "", ()
+    if 'prefix' in spec:
+        where, prefix = f"WHERE {spec['prefix'][0]} = %s", (spec['prefix'][1],)
+    return _sweep_values(cursor, scenario['table'], spec['column'], where, prefix)
+
+_sweep_cache = {}
+
+def _sweep_values(cursor, table, column, where, prefix):
+    """Valores ordenados da coluna varrida, lidos uma vez por volume."""
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    key = (table, column, where, prefix, cursor.fetchone()[0])
+    if key not in _sweep_cache:
+        cursor.execute(f"SELECT {column} FROM {table} {where}", prefix)
+        _sweep_cache.clear()
+        _sweep_cache[key] = np.sort(np.array([v for (v,) in cursor.fetchall()], dtype=object))
+    return _sweep_cache[key]
+
+def _time_once(conn, cursor, query_cursor, query_sql, params):
+    """Uma execução cronometrada (s), precedida de warm-up ou de esvaziamento do cache."""
+    if CACHE_MODE == 'cold':
+        evict_buffer_pool(conn, cursor)
+    else:
+        execute_and_fetch(query_cursor, query_sql, params, FETCH_MODE)
+    return execute_and_fetch(query_cursor, query_sql, params, FETCH_MODE)[1] / 1e9
+
+def find_crossover(selectivities, scan_times, index_times):
+    """
+    Seletividade a partir da qual o acesso pelo índice deixa de ganhar da
+    varredura completa, interpolada em escala log entre os dois alvos vizinhos.
+    Retorna None se o índice ganha em todos os alvos.
+    """
+    diffs = [wi - ni for ni, wi in zip(scan_times, index_times)]
+    for i, diff in enumerate(diffs):
+        if diff < 0:
+            continue
+        if i == 0:
+            return selectivities[0]
+        lo, hi = math.log10(selectivities[i - 1]), math.log10(selectivities[i])
+        weight = -diffs[i - 1] / (diff - diffs[i - 1])
+        return 10 ** (lo + weight * (hi - lo))
+    return None
+
+SELECTIVITY_HEADER = ['Volume', 'Alvo (%)', 'Seletividade Real (%)', 'Linhas (mediana)', 'Amostras',
+                      'Sem Índice (s)', 'Índice Forçado (s)', 'Otimizador (s)', 'Plano do Otimizador']
+CROSSOVER_HEADER = ['Volume', 'Cenário', 'Crossover do Índice (%)', 'Otimizador Abandona o Índice em (%)']
+
+def selectivity_sweep(conn, cursor, name, size_label, targets=SELECTIVITY_TARGETS, n_samples=SELECTIVITY_SAMPLES):
+    """
+    Varre a seletividade de um cenário com 'sweep': para cada alvo, sorteia
+    faixas que selecionam essa fração das linhas e mede, com o índice criado,
+    a consulta com IGNORE INDEX (varredura), com FORCE INDEX e sem dica (a
+    escolha do otimizador). Grava tempos/selectivity_<cenário>.csv, o gráfico
+    latência × seletividade e os crossovers em tempos/crossover.csv.
+    """
+    scenario = scenario_def(name)
+    table = scenario['table']
+    rng = np.random.default_rng([SEED, len(targets), n_samples])
+    # Seletividade relativa às linhas varridas (só as do prefixo, quando houver)
+    n_rows = len(sweep_population(cursor, scenario))
+    variants = {
+        'scan': hinted_query(scenario['query_sql'], table, BACKEND.index_hint(name, False)),
+        'index': hinted_query(scenario['query_sql'], table, BACKEND.index_hint(name, True)),
+        'optimizer': scenario['query_sql'],
+    }
+
+    try:
+        cursor.execute(scenario['drop_sql'])
+        conn.commit()
+    except DB_ERRORS:
+        pass
+    cursor.execute(scenario['create_sql'])
+    conn.commit()
+    cursor.execute(BACKEND.analyze_sql(table))
+    cursor.fetchall()
+
+    points = []
+    query_cursor = conn.cursor(**FETCH_CURSORS[FETCH_MODE])
+    try:
+        for target in targets:
+            samples = sweep_params(cursor, scenario, target, n_samples, rng)
+            if not samples:
+                print(f"{name}: alvo {target:.4%} não cabe nos dados, ignorado")
+                continue
+            times = {variant: [] for variant in variants}
+            for params, _ in samples:
+                # Variantes intercaladas por parâmetro, para que a deriva afete todas igualmente
+                for variant, sql in variants.items():
+                    times[variant].append(_time_once(conn, cursor, query_cursor, sql, params))
+            access_path = BACKEND.access_path(cursor, variants['optimizer'], samples[0][0])
+            rows = [r for _, r in samples]
+            point = {
+                'target': target,
+                'selectivity': float(np.mean(rows)) / n_rows,
+                'rows': float(np.median(rows)),
+                'samples': len(samples),
+                'plan': access_path,
+                'uses_index': re.search(rf"\b{name}\b", access_path) is not None,
+                **{variant: float(np.median(t)) for variant, t in times.items()},
+            }
+            points.append(point)
+            print(f"{name} {target:.4%} ({point['selectivity']:.4%} real): varredura {point['scan']:.5f}s, "
+                  f"índice {point['index']:.5f}s, otimizador {point['optimizer']:.5f}s [{access_path}]")
+    finally:
+        query_cursor.close()
+        cursor.execute(scenario['drop_sql'])
+        conn.commit()
+    if not points:
+        return None
+
+    selectivities = [p['selectivity'] for p in points]
+    crossover = find_crossover(selectivities, [p['scan'] for p in points], [p['index'] for p in points])
+    abandoned = next((p['selectivity'] for p in points if not p['uses_index']), None)
+    save_selectivity(name, size_label, points, crossover, abandoned)
+    plot_selectivity(name, size_label, points, crossover)
+    return crossover
+
+def save_selectivity(name, size_label, points, crossover, abandoned):
+    """Grava os pontos da varredura e o resumo de crossovers em tempos/."""
+    filename = os.path.join(TIMES_DIR, f'selectivity_{backend_prefix()}{name}.csv')
+    file_exists = os.path.isfile(filename)
+    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if not file_exists:
+            writer.writerow(SELECTIVITY_HEADER)
+        for p in points:
+            writer.writerow([size_label, round(p['target'] * 100, 4), round(p['selectivity'] * 100, 4),
+                             p['rows'], p['samples'], round(p['scan'], 6), round(p['index'], 6),
+                             round(p['optimizer'], 6), p['plan']])
+
+    filename = os.path.join(TIMES_DIR, f'{backend_prefix()}crossover.csv')
+    file_exists = os.path.isfile(filename)
+    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if not file_exists:
+            writer.writerow(CROSSOVER_HEADER)
+        writer.writerow([size_label, name,
+                         round(crossover * 100, 4) if crossover is not None else '',
+                         round(abandoned * 100, 4) if abandoned is not None else ''])
+    print(f"{name} ({size_label}): crossover do índice em "
+          + (f"{crossover:.3%}" if crossover is not None else "nenhum alvo (índice sempre ganha)")
+          + ", otimizador abandona o índice em "
+          + (f"{abandoned:.3%}" if abandoned is not None else "nenhum alvo"))
+
+def plot_selectivity(name, size_label, points, crossover):
+    """Gráfico latência × seletividade (escala log) com e sem o índice."""
+    x = [p['selectivity'] * 100 for p in points]
+    plt.figure(figsize=(10, 6))
+    plt.plot(x, [p['scan'] for p in points], '--o', label='Sem índice (IGNORE INDEX)')
+    plt.plot(x, [p['index'] for p in points], '-o', label='Com índice (FORCE INDEX)')
+    plt.plot(x, [p['optimizer'] for p in points], ':s', label='Escolha do otimizador')
+    if crossover is not None:
+        plt.axvline(crossover * 100, color='red', linestyle=':', label=f"Crossover ({crossover:.2%})")
+    plt.xscale('log')
+    plt.xlabel("Seletividade (% das linhas)")
+    plt.ylabel("Tempo de Execução (s)")
+    plt.title(f"{BACKEND.name} {SCENARIOS[name]['index_type']} {name} — Latência × seletividade ({size_label} pedidos)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(CHARTS_DIR, f"selectivity_{backend_prefix()}{name}_{size_label}.png"))
+    plt.close()
+
+def run_selectivity(names, targets=SELECTIVITY_TARGETS, n_samples=SELECTIVITY_SAMPLES):
+    """Varredura de seletividade dos cenários pedidos em cada volume de SIZES."""
+    create_database()
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    try:
+        reset_schema(conn, cursor)
+        for nc, no in SIZES:
+            prepare_tier(conn, cursor, nc, no)
+            for name in names:
+                selectivity_sweep(conn, cursor, name, f"{no}", targets, n_samples)
+    finally:
+        cursor.close()
+        conn.close()
+
+PREFIX_HEADER = ['Volume', 'Cenário', 'Prefixo (caracteres)', 'Valores Distintos', 'Seletividade (%)',
+                 'Seletividade da Coluna (%)', 'Tamanho (bytes)', 'Criação (s)', 'Mediana (s)', 'Linhas Examinadas']
+
+def prefix_sweep(conn, cursor, name, size_label, lengths=PREFIX_LENGTHS):
+    """
+    Para cada comprimento de prefixo, a seletividade do prefixo (valores
+    distintos / linhas), o tamanho e o tempo de criação do índice e a mediana
+    e as linhas examinadas da consulta do cenário com esse índice.
+    """
+    scenario = SCENARIOS[name]
+    table, column = scenario['table'], scenario['prefix_column']
+    try:
+        cursor.execute(scenario['drop_sql'])
+        conn.commit()
+    except DB_ERRORS:
+        pass
+
+    cursor.execute(f"SELECT COUNT(*), COUNT(DISTINCT {column}) FROM {table}")
+    total, distinct_full = cursor.fetchone()
+    column_selectivity = distinct_full / total if total else 0.0
+    query_sql, params = scenario['query_sql'], scenario['params'](cursor)
+
+    points = []
+    for length in lengths:
+        cursor.execute(f"SELECT COUNT(DISTINCT LEFT({column}, %s)) FROM {table}", (length,))
+        distinct = cursor.fetchone()[0]
+        t0 = time.perf_counter()
+        cursor.execute(f"CREATE INDEX {name} ON {table}({column}({length}))")
+        conn.commit()
+        build = time.perf_counter() - t0
+        size = index_size_bytes(cursor, {'table': table, 'index_type': scenario['index_type']}, name)
+        stats = time_query(conn, cursor, query_sql, params)
+        cursor.execute(scenario['drop_sql'])
+        conn.commit()
+        points.append({'length': length, 'distinct': distinct, 'selectivity': distinct / total if total else 0.0,
+                       'size': size, 'build': build, 'median': stats['median'],
+                       'examined': stats['counters'].get('ps_rows_examined', '')})
+        print(f"{name} ({size_label}) prefixo {length}: seletividade {points[-1]['selectivity']:.2%} "
+              f"(coluna {column_selectivity:.2%}), {size / 1024 ** 2:.1f} MB, consulta {stats['median']:.6f}s")
+    return points, column_selectivity
+
+def save_prefix(name, size_label, points, column_selectivity):
+    """Acrescenta os pontos da varredura de prefixo em tempos/prefix.csv."""
+    filename = os.path.join(TIMES_DIR, 'prefix.csv')
+    file_exists = os.path.isfile(filename)
+    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if not file_exists:
+            writer.writerow(PREFIX_HEADER)
+        for p in points:
+            writer.writerow([size_label, name, p['length'], p['distinct'], round(p['selectivity'] * 100, 4),
+                             round(column_selectivity * 100, 4), p['size'], round(p['build'], 6),
+                             round(p['median'], 6), p['examined']])
+
+def plot_prefix(name, size_label, points, column_selectivity):
+    """Seletividade e tamanho do índice em função do comprimento do prefixo."""
+    x = [p['length'] for p in points]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(x, [p['selectivity'] * 100 for p in points], '-o', label='Seletividade do prefixo')
+    ax.axhline(column_selectivity * 100, color='gray', linestyle=':', label='Seletividade da coluna')
+    ax.set_xlabel("Comprimento do prefixo (caracteres)")
+    ax.set_ylabel("Seletividade (%)")
+    ax.grid(True)
+    size_ax = ax.twinx()
+    size_ax.plot(x, [p['size'] / 1024 ** 2 for p in points], '--s', color='tab:orange', label='Tamanho do índice')
+    size_ax.set_ylabel("Tamanho do índice (MB)")
+    lines = ax.get_legend_handles_labels()
+    size_lines = size_ax.get_legend_handles_labels()
+    ax.legend(lines[0] + size_lines[0], lines[1] + size_lines[1], loc='lower right')
+    plt.title(f"{name} — Tamanho × seletividade do prefixo ({size_label} pedidos)")
+    fig.tight_layout()
+    fig.savefig(os.path.join(CHARTS_DIR, f"prefix_{name}_{size_label}.png"))
+    plt.close(fig)
+
+def run_prefix(names, lengths=PREFIX_LENGTHS):
+    """Varredura de comprimento de prefixo dos cenários pedidos em cada volume de SIZES."""
+    create_database()
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    try:
+        reset_schema(conn, cursor)
+        for nc, no in SIZES:
+            prepare_tier(conn, cursor, nc, no)
+            for name in names:
+                points, column_selectivity = prefix_sweep(conn, cursor, name, f"{no}", lengths)
+                save_prefix(name, f"{no}", points, column_selectivity)
+                plot_prefix(name, f"{no}", points, column_selectivity)
+    finally:
+        cursor.close()
+        conn.close()
+
+# Matriz FULLTEXT: modos de busca × parser × termos escolhidos pela frequência
+# de documentos (DF) em uma amostra de orders.description. Os candidatos são
+# palavras indexáveis e pares de palavras adjacentes (buscados como frase):
+# o texto lorem do gerador tem um vocabulário pequeno, com todas as palavras em
+# ~10% das linhas, então os termos raros e médios costumam ser frases. Aspas só
+# são operador de frase no BOOLEAN MODE; nos demais modos cada classe usa a
+# palavra isolada de DF mais próxima, e a classe stopword_adjacent fica de fora.
+FULLTEXT_INDEX = 'idx_ft_matrix'
+FULLTEXT_PARSERS = {
+    'builtin': f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON orders(description)",
+    'ngram': f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON orders(description) WITH PARSER ngram",
+}
+FULLTEXT_MODES = {
+    'natural': "SELECT * FROM orders WHERE MATCH(description) AGAINST(%s IN NATURAL LANGUAGE MODE)",
+    'boolean': "SELECT * FROM orders WHERE MATCH(description) AGAINST(%s IN BOOLEAN MODE)",
+    'expansion': "SELECT * FROM orders WHERE MATCH(description) AGAINST(%s WITH QUERY EXPANSION)",
+}
+FULLTEXT_PHRASE_MODES = ('boolean',)
+# Classe do termo -> DF alvo (fração das linhas); None = a frase mais frequente
+# com uma stopword do InnoDB (que não é indexada) ao lado de uma palavra indexada
+FULLTEXT_TERM_CLASSES = {'rare': 0.001, 'medium': 0.01, 'common': 0.1, 'stopword_adjacent': None}
+# Consultas booleanas com vários termos, montadas a partir dos termos das classes
+FULLTEXT_MULTI_TERM = {
+    'and': lambda t: f"+{t['common']} +{t['medium']}",
+    'or': lambda t: f"{t['medium']} {t['rare']}",
+    'not': lambda t: f"+{t['common']} -{t['medium']}",
+}
+FULLTEXT_LIKE_SQL = "SELECT * FROM orders WHERE description LIKE %s"
+
+def _fulltext_like(term):
+    """Padrão LIKE equivalente a um termo (palavra ou "frase")."""
+    return "%" + term.strip('"') + "%"
+
+_fulltext_cache = {}
+
+def _fulltext_candidates(cursor, sample):
+    """
+    DF dos candidatos de fulltext_terms() na amostra: (palavras, frases,
+    frases com stopword, número de descrições). Calculada uma vez por volume,
+    para que a consulta com índice e o LIKE de um cenário usem o mesmo termo.
+    """
+    cursor.execute("SELECT COUNT(*) FROM orders")
+    key = (cursor.fetchone()[0], sample)
+    if key in _fulltext_cache:
+        return _fulltext_cache[key]
+    min_token, stopwords = 3, set()
+    if DB_BACKEND == 'mysql':
+        cursor.execute("SELECT @@innodb_ft_min_token_size")
+        min_token = int(cursor.fetchone()[0])
+        cursor.execute("SELECT value FROM information_schema.INNODB_FT_DEFAULT_STOPWORD")
+        stopwords = {value for (value,) in cursor.fetchall()}
+    cursor.execute("SELECT description FROM orders ORDER BY id LIMIT %s", (sample,))
+    docs = [text for (text,) in cursor.fetchall() if text]
+
+    words, pairs, stopword_pairs = Counter(), Counter(), Counter()
+    for text in docs:
+        doc_words, doc_pairs, doc_stopword_pairs = set(), set(), set()
+        # Frases só dentro de um trecho sem pontuação, para o LIKE equivalente casar
+        for chunk in re.split(r"[^\w\s]+", text.lower()):
+            raw = chunk.split()
+            tokens = [t if len(t) >= min_token and t not in stopwords else None for t in raw]
+            doc_words.update(t for t in tokens if t)
+            doc_pairs.update(f'"{a} {b}"' for a, b in zip(tokens, tokens[1:]) if a and b)
+            doc_stopword_pairs.update(
+                f'"{a} {b}"' for (a, ta), (b, tb) in zip(zip(raw, tokens), zip(raw[1:], tokens[1:]))
+                if (a in stopwords and tb) or (ta and b in stopwords))
+        words.update(doc_words)
+        pairs.update(doc_pairs)
+        stopword_pairs.update(doc_stopword_pairs)
+    _fulltext_cache.clear()
+    _fulltext_cache[key] = words, pairs, stopword_pairs, len(docs) or 1
+    return _fulltext_cache[key]
+
+def fulltext_terms(cursor, sample=FULLTEXT_SAMPLE, phrases=True):
+    """
+    Escolhe um termo por classe de FULLTEXT_TERM_CLASSES: o candidato com a DF
+    mais próxima do alvo (em escala log) em uma amostra de `sample` descrições.
+    Palavras abaixo de innodb_ft_min_token_size ou na lista de stopwords do
+    InnoDB não são indexadas e ficam de fora; stopword_adjacent é a frase mais
+    frequente formada por uma stopword e uma palavra indexada. Com
+    phrases=False só palavras isoladas são candidatas e stopword_adjacent é
+    omitida. Retorna {classe: (termo, DF)}.
+    """
+    words, pairs, stopword_pairs, n = _fulltext_candidates(cursor, sample)
+    candidates = sorted({**words, **pairs}.items() if phrases else words.items())
+    terms = {}
+    for name, target in FULLTEXT_TERM_CLASSES.items():
+        if target is None:
+            if not phrases or not stopword_pairs:
+                continue
+            term, df = max(sorted(stopword_pairs.items()), key=lambda item: item[1])
+        else:
+            term, df = min(candidates, key=lambda item: abs(math.log(item[1] / n / target)))
+        terms[name] = (term, df / n)
+    # Sem frases, classes vizinhas podem cair na mesma palavra: fica a de alvo mais próximo
+    for name, (term, df) in list(terms.items()):
+        rivals = [other for other, (t, _) in terms.items() if t == term and FULLTEXT_TERM_CLASSES[other]]
+        if len(rivals) > 1 and name != min(rivals, key=lambda c: abs(math.log(df / FULLTEXT_TERM_CLASSES[c]))):
+            del terms[name]
+    return terms
+
+def _fulltext_term(cursor, name):
+    return (fulltext_terms(cursor)[name][0],)
+
+FULLTEXT_HEADER = ['Volume', 'Parser', 'Modo', 'Classe', 'Consulta', 'DF (%)', 'Linhas', 'Mediana (s)',
+                   'P95 (s)', 'Linhas Examinadas']
+FULLTEXT_BUILD_HEADER = ['Volume', 'Parser', 'Criação (s)', 'Tamanho Auxiliar (bytes)', 'Linhas Inseridas',
+                         'Inserção (linhas/s)', 'Tamanho após Inserção (bytes)', 'Consulta antes do OPTIMIZE (s)',
+                         'OPTIMIZE (s)', 'Tamanho após OPTIMIZE (bytes)', 'Consulta após OPTIMIZE (s)']
+
+def _fulltext_point(conn, cursor, parser, mode, term_class, query_sql, term, df):
+    stats = time_query(conn, cursor, query_sql, (term,))
+    point = {'parser': parser, 'mode': mode, 'class': term_class, 'term': term, 'df': df,
+             'rows': result_rows(cursor, query_sql, (term,)), 'median': stats['median'], 'p95': stats['p95'],
+             'examined': stats['counters'].get('ps_rows_examined', '')}
+    print(f"FULLTEXT {parser}/{mode} {term_class} {term}: {point['rows']} linhas, {stats['median']:.6f}s")
+    return point
+
+def fulltext_optimize_cost(conn, cursor, n_rows):
+    """
+    Insere n_rows pedidos novos (lotes de 1000 com commit) com o índice
+    FULLTEXT_INDEX criado e mede a consulta booleana do termo comum antes e
+    depois de um OPTIMIZE TABLE com innodb_optimize_fulltext_only (só o
+    índice FULLTEXT é reorganizado, até 10000 palavras por chamada). Os
+    pedidos inseridos são removidos no fim e as variáveis globais restauradas.
+    """
+    query_sql = FULLTEXT_MODES['boolean']
+    term = _fulltext_term(cursor, 'common')
+    target = {'table': 'orders', 'index_type': 'FULLTEXT'}
+    start = table_count(cursor, 'orders')
+    cursor.execute("SELECT MAX(id) FROM orders")
+    last_id = cursor.fetchone()[0] or 0
+    columns, rows = _write_rows('orders', start, n_rows, customer_id_range(cursor))
+    insert_sql = f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    cursor.execute("SELECT @@innodb_optimize_fulltext_only, @@innodb_ft_num_word_optimize")
+    only, words = cursor.fetchone()
+    result = {'inserted': n_rows}
+    try:
+        t0 = time.perf_counter()
+        for i in range(0, n_rows, 1000):
+            cursor.executemany(insert_sql, rows[i:i + 1000])
+            conn.commit()
+        elapsed = time.perf_counter() - t0
+        result['insert_rate'] = n_rows / elapsed if elapsed else 0.0
+        result['size_inserted'] = index_size_bytes(cursor, target, FULLTEXT_INDEX)
+        result['query_before'] = time_query(conn, cursor, query_sql, term)['median']
+
+        cursor.execute("SET GLOBAL innodb_optimize_fulltext_only = ON")
+        cursor.execute("SET GLOBAL innodb_ft_num_word_optimize = 10000")
+        t0 = time.perf_counter()
+        cursor.execute("OPTIMIZE TABLE orders")
+        cursor.fetchall()
+        result['optimize'] = time.perf_counter() - t0
+        result['size_optimized'] = index_size_bytes(cursor, target, FULLTEXT_INDEX)
+        result['query_after'] = time_query(conn, cursor, query_sql, term)['median']
+    finally:
+        cursor.execute(f"SET GLOBAL innodb_optimize_fulltext_only = {int(only)}")
+        cursor.execute(f"SET GLOBAL innodb_ft_num_word_optimize = {int(words)}")
+        cursor.execute("DELETE FROM orders WHERE id > %s", (last_id,))
+        conn.commit()
+    print(f"FULLTEXT: {n_rows} inserções a {result['insert_rate']:,.0f} linhas/s; OPTIMIZE em "
+          f"{result['optimize']:.2f}s; consulta {result['query_before']:.6f}s -> {result['query_after']:.6f}s")
+    return result
+
+def fulltext_matrix(conn, cursor, size_label, parsers, modes, insert_fraction=FULLTEXT_INSERT_FRACTION):
+    """
+    Mede, para cada parser: o tempo de criação e o tamanho das tabelas
+    auxiliares do índice, cada modo de busca com um termo de cada classe de
+    DF, as consultas booleanas com vários termos e, com insert_fraction > 0,
+    o custo do OPTIMIZE TABLE após inserções em massa. O LIKE de cada termo
+    é medido uma vez, sem índice. Retorna (pontos, custos de construção).
+    """
+    try:
+        cursor.execute(f"DROP INDEX {FULLTEXT_INDEX} ON orders")
+        conn.commit()
+    except DB_ERRORS:
+        pass
+    terms = fulltext_terms(cursor)
+    word_terms = fulltext_terms(cursor, phrases=False)
+    for name, (term, df) in terms.items():
+        print(f"Termo {name}: {term} (DF {df:.2%}); sem frase: {word_terms.get(name, ('-', 0))[0]}")
+    points = [_fulltext_point(conn, cursor, '-', 'like', name, FULLTEXT_LIKE_SQL, _fulltext_like(term), df)
+              for name, (term, df) in terms.items()]
+    query_terms = {name: term for name, (term, _) in terms.items()}
+
+    builds = []
+    for parser in parsers:
+        t0 = time.perf_counter()
+        with phase('index_ddl'):
+            cursor.execute(FULLTEXT_PARSERS[parser])
+            conn.commit()
+        build = {'parser': parser, 'build': time.perf_counter() - t0,
+                 'size': index_size_bytes(cursor, {'table': 'orders', 'index_type': 'FULLTEXT'}, FULLTEXT_INDEX)}
+        print(f"FULLTEXT {parser}: criado em {build['build']:.2f}s, {build['size'] / 1024 ** 2:.1f} MB auxiliares")
+        try:
+            for mode in modes:
+                mode_terms = terms if mode in FULLTEXT_PHRASE_MODES else word_terms
+                for name, (term, df) in mode_terms.items():
+                    points.append(_fulltext_point(conn, cursor, parser, mode, name, FULLTEXT_MODES[mode], term, df))
+            for name, build_query in FULLTEXT_MULTI_TERM.items():
+                points.append(_fulltext_point(conn, cursor, parser, 'boolean', f"multi_{name}",
+                                              FULLTEXT_MODES['boolean'], build_query(query_terms), ''))
+            if insert_fraction > 0:
+                n_rows = max(int(int(size_label) * insert_fraction), 1)
+                build.update(fulltext_optimize_cost(conn, cursor, n_rows))
+        finally:
+            cursor.execute(f"DROP INDEX {FULLTEXT_INDEX} ON orders")
+            conn.commit()
+        builds.append(build)
+    return points, builds
+
+def save_fulltext(size_label, points, builds):
+    """Acrescenta a matriz em tempos/fulltext.csv e os custos de construção em tempos/fulltext_build.csv."""
+    for name, header, rows in (
+        ('fulltext.csv', FULLTEXT_HEADER,
+         [[size_label, p['parser'], p['mode'], p['class'], p['term'],
+           round(p['df'] * 100, 4) if p['df'] != '' else '', p['rows'], round(p['median'], 6),
+           round(p['p95'], 6), p['examined']] for p in points]),
+        ('fulltext_build.csv', FULLTEXT_BUILD_HEADER,
+         [[size_label, b['parser'], round(b['build'], 3), b['size'], b.get('inserted', ''),
+           round(b['insert_rate'], 1) if 'insert_rate' in b else '', b.get('size_inserted', ''),
+           round(b['query_before'], 6) if 'query_before' in b else '',
+           round(b['optimize'], 3) if 'optimize' in b else '', b.get('size_optimized', ''),
+           round(b['query_after'], 6) if 'query_after' in b else ''] for b in builds]),
+    ):
+        filename = os.path.join(TIMES_DIR, name)
+        file_exists = os.path.isfile(filename)
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(header)
+            writer.writerows(rows)
+
+def plot_fulltext(size_label, points):
+    """Mediana de cada classe de consulta, por parser e modo (barras agrupadas, escala log)."""
+    classes = list(dict.fromkeys(p['class'] for p in points))
+    series = list(dict.fromkeys((p['parser'], p['mode']) for p in points))
+    medians = {(p['parser'], p['mode'], p['class']): p['median'] for p in points}
+    width = 0.8 / len(series)
+    x = np.arange(len(classes))
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for i, (parser, mode) in enumerate(series):
+        ax.bar(x + i * width, [medians.get((parser, mode, c), 0) for c in classes], width,
+               label=mode if parser == '-' else f"{parser} / {mode}")
+    ax.set_xticks(x + width * (len(series) - 1) / 2)
+    ax.set_xticklabels(classes)
+    ax.set_yscale('log')
+    ax.set_ylabel("Mediana (s)")
+    ax.legend(fontsize='small')
+    ax.grid(True, axis='y')
+    plt.title(f"FULLTEXT — modo × parser × classe de termo ({size_label} pedidos)")
+    fig.tight_layout()
+    fig.savefig(os.path.join(CHARTS_DIR, f"fulltext_{size_label}.png"))
+    plt.close(fig)
+
+def run_fulltext(parsers, modes, insert_fraction=FULLTEXT_INSERT_FRACTION):
+    """Matriz FULLTEXT (fulltext_matrix()) em cada volume de SIZES."""
+    create_database()
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    try:
+        reset_schema(conn, cursor)
+        for nc, no in SIZES:
+            prepare_tier(conn, cursor, nc, no)
+            points, builds = fulltext_matrix(conn, cursor, f"{no}", parsers, modes, insert_fraction)
+            save_fulltext(f"{no}", points, builds)
+            plot_fulltext(f"{no}", points)
+    finally:
+        cursor.close()
+        conn.close()
+
+# Índice da paginação: a chave (order_date, id) é única, então o keyset é estável
+PAGINATION_INDEX = {
+    'index_type': 'BTREE',
+    'create_sql': "CREATE INDEX idx_ord_page ON orders(order_date, id)",
+    'drop_sql': "DROP INDEX idx_ord_page ON orders",
+}
+PAGE_OFFSET_SQL = "SELECT * FROM orders ORDER BY order_date, id LIMIT %s OFFSET %s"
+PAGE_KEYSET_SQL = "SELECT * FROM orders WHERE (order_date, id) > (%s, %s) ORDER BY order_date, id LIMIT %s"
+
+PAGINATION_HEADER = ['Volume', 'Página', 'Offset (linhas)', 'OFFSET (s)', 'Keyset (s)', 'OFFSET / Keyset',
+                     'Plano OFFSET', 'Plano Keyset']
+
+def page_depths(n_rows, page_size, n_points):
+    """Páginas medidas: espaçamento geométrico da 1ª até a última página."""
+    last_page = max(-(-n_rows // page_size), 1)
+    return sorted({int(p) for p in np.geomspace(1, last_page, n_points).round()} | {last_page})
+
+def pagination_sweep(conn, cursor, size_label, page_size=PAGE_SIZE, n_points=PAGINATION_POINTS):
+    """
+    Latência de uma página em cada profundidade: LIMIT/OFFSET (o servidor lê
+    e descarta as linhas anteriores) contra keyset (continua a partir da
+    última chave (order_date, id) da página anterior), ambos com o índice
+    (order_date, id). Confere que as duas estratégias devolvem a mesma página.
+    """
+    create_sql, drop_sql = BACKEND.index_sql('idx_ord_page', PAGINATION_INDEX)
+    try:
+        cursor.execute(drop_sql)
+        conn.commit()
+    except DB_ERRORS:
+        pass
+    cursor.execute(create_sql)
+    conn.commit()
+    cursor.execute(BACKEND.analyze_sql('orders'))
+    cursor.fetchall()
+
+    points = []
+    try:
+        for page in page_depths(table_count(cursor, 'orders'), page_size, n_points):
+            offset = (page - 1) * page_size
+            offset_params = (page_size, offset)
+            if offset:
+                cursor.execute("SELECT order_date, id FROM orders ORDER BY order_date, id LIMIT 1 OFFSET %s",
+                               (offset - 1,))
+                keyset_sql, keyset_params = PAGE_KEYSET_SQL, cursor.fetchone() + (page_size,)
+            else:
+                keyset_sql, keyset_params = PAGE_OFFSET_SQL, offset_params
+
+            cursor.execute(PAGE_OFFSET_SQL, offset_params)
+            offset_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(keyset_sql, keyset_params)
+            if [row[0] for row in cursor.fetchall()] != offset_ids:
+                print(f"Aviso: OFFSET e keyset devolvem páginas diferentes na página {page}")
+
+            offset_stats = time_query(conn, cursor, PAGE_OFFSET_SQL, offset_params)
+            keyset_stats = time_query(conn, cursor, keyset_sql, keyset_params)
+            points.append({
+                'page': page, 'offset': offset,
+                'offset_time': offset_stats['median'], 'keyset_time': keyset_stats['median'],
+                'offset_plan': BACKEND.access_path(cursor, PAGE_OFFSET_SQL, offset_params),
+                'keyset_plan': BACKEND.access_path(cursor, keyset_sql, keyset_params),
+            })
+            print(f"Página {page} ({size_label}): OFFSET {offset_stats['median']:.6f}s, "
+                  f"keyset {keyset_stats['median']:.6f}s")
+    finally:
+        cursor.execute(drop_sql)
+        conn.commit()
+    return points
+
+def save_pagination(size_label, points):
+    """Acrescenta os pontos da paginação em tempos/[<backend>_]pagination.csv."""
+    filename = os.path.join(TIMES_DIR, f'{backend_prefix()}pagination.csv')
+    file_exists = os.path.isfile(filename)
+    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if not file_exists:
+            writer.writerow(PAGINATION_HEADER)
+        for p in points:
+            writer.writerow([size_label, p['page'], p['offset'], round(p['offset_time'], 6),
+                             round(p['keyset_time'], 6),
+                             round(p['offset_time'] / p['keyset_time'], 2) if p['keyset_time'] else '',
+                             p['offset_plan'], p['keyset_plan']])
+
+def plot_pagination(size_label, points):
+    """Latência por profundidade de página (escala log-log), OFFSET × keyset."""
+    x = [p['page'] for p in points]
+    plt.figure(figsize=(10, 6))
+    plt.plot(x, [p['offset_time'] for p in points], '--o', label='LIMIT/OFFSET')
+    plt.plot(x, [p['keyset_time'] for p in points], '-o', label='Keyset (order_date, id)')
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel("Página")
+    plt.ylabel("Tempo de Execução (s)")
+    plt.title(f"{BACKEND.name} Paginação — OFFSET × keyset ({size_label} pedidos)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(CHARTS_DIR, f"pagination_{backend_prefix()}{size_label}.png"))
+    plt.close()
+
+def run_pagination(page_size=PAGE_SIZE, n_points=PAGINATION_POINTS):
+    """Paginação OFFSET × keyset em cada volume de SIZES."""
+    create_database()
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    try:
+        reset_schema(conn, cursor)
+        for nc, no in SIZES:
+            prepare_tier(conn, cursor, nc, no)
+            points = pagination_sweep(conn, cursor, f"{no}", page_size, n_points)
+            save_pagination(f"{no}", points)
+            plot_pagination(f"{no}", points)
+    finally:
+        cursor.close()
+        conn.close()
+
+class LatencyHistogram:
+    """
+    Histograma de latências no estilo HDR: buckets logarítmicos com precisão
+    relativa fixa (LATENCY_PRECISION), memória constante e merge barato entre
+    threads. Valores em nanossegundos.
+    """
+
+    def __init__(self, precision=None):
+        self.precision = precision or LATENCY_PRECISION
+        self._log_base = math.log1p(self.precision)
+        self.counts = {}
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_ns):
+        bucket = int(math.log(max(value_ns, 1)) / self._log_base)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.max = max(self.max, value_ns)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def _bucket_value(self, bucket):
+        return math.exp((bucket + 1) * self._log_base)
+
+    def percentile(self, pct):
+        """Menor valor (limite superior do bucket) que cobre pct% das amostras."""
+        if not self.total:
+            return 0.0
+        target = self.total * pct / 100
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_value(bucket), self.max)
+        return float(self.max)
+
+    def write_hgrm(self, path):
+        """Grava a distribuição de percentis no formato texto do HdrHistogram (.hgrm), em ms."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>18}\n\n")
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                pct = seen / self.total
+                inverse = 1 / (1 - pct) if pct < 1 else float('inf')
+                value_ms = min(self._bucket_value(bucket), self.max) / 1e6
+                f.write(f"{value_ms:12.3f} {pct:14.12f} {seen:10d} {inverse:18.2f}\n")
+            f.write(f"#[Max = {self.max / 1e6:.3f}, Total count = {self.total}]\n")
+
+def _reset_load_cursor(conn, query_cursor):
+    """
+    Descarta o cursor de um cliente da carga após um erro, com o resultado
+    que tenha ficado sem ler, e reconecta se a conexão caiu. Retorna um cursor novo.
+    """
+    try:
+        query_cursor.close()
+        conn.consume_results()
+    except DB_ERRORS:
+        pass
+    if not conn.is_connected():
+        conn.reconnect(attempts=3, delay=1)
+    return conn.cursor(**FETCH_CURSORS[FETCH_MODE])
+
+def _load_client(conn_pool, query_sql, params_list, deadline_ns, seed, schedule=None):
+    """
+    Cliente do gerador de carga. Em circuito fechado (schedule=None) emite a
+    próxima consulta assim que a anterior termina. Em circuito aberto pega o
+    próximo horário agendado em schedule() e mede a latência a partir dele,
+    não do envio (evita coordinated omission); as requisições com erro também
+    entram no histograma. Após um erro o cursor é refeito (e a conexão
+    reaberta, se caiu); LOAD_MAX_ERRORS erros seguidos encerram o cliente.
+    """
+    hist = LatencyHistogram()
+    errors = 0
+    consecutive = 0
+    rng = np.random.default_rng(seed)
+    conn = conn_pool.get()
+    try:
+        query_cursor = conn.cursor(**FETCH_CURSORS[FETCH_MODE])
+        while True:
+            if schedule is None:
+                start = time.perf_counter_ns()
+                if start >= deadline_ns:
+                    break
+            else:
+                start = schedule()
+                if start >= deadline_ns:
+                    break
+                delay = start - time.perf_counter_ns()
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+            params = params_list[rng.integers(len(params_list))]
+            try:
+                execute_and_fetch(query_cursor, query_sql, params)
+            except DB_ERRORS as err:
+                errors += 1
+                consecutive += 1
+                if schedule is not None:
+                    hist.record(time.perf_counter_ns() - start)
+                if consecutive >= LOAD_MAX_ERRORS:
+                    print(f"Cliente da carga encerrado após {consecutive} erros seguidos: {err}")
+                    break
+                try:
+                    query_cursor = _reset_load_cursor(conn, query_cursor)
+                except DB_ERRORS as reset_err:
+                    print(f"Cliente da carga encerrado, conexão perdida: {reset_err}")
+                    break
+                continue
+            consecutive = 0
+            hist.record(time.perf_counter_ns() - start)
+        try:
+            query_cursor.close()
+        except DB_ERRORS:
+            pass
+    finally:
+        conn_pool.put(conn)
+    return hist, errors
+
+def run_load(query_sql, params_list, clients, duration, rate=None):
+    """
+    Executa `clients` threads, cada uma com sua conexão do pool, por
+    `duration` segundos. Sem `rate` o circuito é fechado; com `rate` as
+    chegadas seguem uma taxa fixa (req/s) compartilhada pelas threads.
+    Retorna (histograma combinado, número de erros, duração real).
+    """
+    conn_pool = open_connection_pool(clients, **connection_options())
+    schedule = None
+    try:
+        started = time.perf_counter_ns()
+        deadline = started + int(duration * 1e9)
+        if rate:
+            slots = itertools.count()
+            lock = threading.Lock()
+            interval_ns = 1e9 / rate
+
+            def schedule():
+                with lock:
+                    return started + int(next(slots) * interval_ns)
+
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            futures = [
+                executor.submit(_load_client, conn_pool, query_sql, params_list, deadline, [SEED, i], schedule)
+                for i in range(clients)
+            ]
+            hist, errors = LatencyHistogram(), 0
+            for future in futures:
+                client_hist, client_errors = future.result()
+                hist.merge(client_hist)
+                errors += client_errors
+        elapsed = (time.perf_counter_ns() - started) / 1e9
+    finally:
+        close_connection_pool(conn_pool)
+    return hist, errors, elapsed
+
+LOAD_HEADER = ['Volume', 'Modo', 'Estado', 'Clientes', 'Taxa Alvo (req/s)', 'QPS',
+               'P50 (ms)', 'P90 (ms)', 'P99 (ms)', 'P99.9 (ms)', 'Máx (ms)', 'Erros']
+
+def load_test(name, client_counts, duration, rate=None):
+    """
+    Gerador de carga concorrente para um cenário de SCENARIOS, com e sem o
+    índice. Circuito fechado: um ponto por número de clientes (QPS). Circuito
+    aberto (rate): taxa fixa com o maior número de clientes. Grava um .hgrm por
+    ponto e o resumo em carga/load_<cenário>.csv.
+    """
+    scenario = SCENARIOS[name]
+    mode = 'aberto' if rate else 'fechado'
+    if rate:
+        client_counts = [max(client_counts)]
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    size_label = str(table_count(cursor, 'orders'))
+    filename = os.path.join(LOAD_DIR, f'load_{name}.csv')
+    file_exists = os.path.isfile(filename)
+    try:
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(LOAD_HEADER)
+            for with_index in (False, True):
+                state = 'com_indice' if with_index else 'sem_indice'
+                try:
+                    cursor.execute(scenario['drop_sql'])
+                    conn.commit()
+                except DB_ERRORS:
+                    pass
+                if with_index:
+                    cursor.execute(scenario['create_sql'])
+                    conn.commit()
+                query_sql, params_list = scenario_query(scenario, cursor, with_index, LOAD_PARAM_SAMPLE)
+
+                for clients in client_counts:
+                    hist, errors, elapsed = run_load(query_sql, params_list, clients, duration, rate)
+                    qps = hist.total / elapsed if elapsed else 0
+                    pcts = [hist.percentile(p) / 1e6 for p in (50, 90, 99, 99.9)]
+                    writer.writerow([size_label, mode, state, clients, rate or '', round(qps, 1)]
+                                    + [round(p, 3) for p in pcts] + [round(hist.max / 1e6, 3), errors])
+                    csvfile.flush()
+                    suffix = f"{rate}rps" if rate else f"{clients}c"
+                    hist.write_hgrm(os.path.join(LOAD_DIR, f"{name}_{size_label}_{mode}_{suffix}_{state}.hgrm"))
+                    print(f"{name} [{state}] {mode}, {clients} clientes: {qps:,.0f} QPS, "
+                          f"p50 {pcts[0]:.2f} ms, p99 {pcts[2]:.2f} ms, erros {errors}")
+    finally:
+        try:
+            cursor.execute(scenario['drop_sql'])
+            conn.commit()
+        except DB_ERRORS:
+            pass
+        cursor.close()
+        conn.close()
+
+LOOKUP_SQL = "SELECT * FROM customers WHERE email = %s"
+LOOKUP_STRATEGIES = ['text', 'prepared', 'in_list', 'temp_join']
+BATCHED_LOOKUPS = ('in_list', 'temp_join')
+
+def open_lookup(conn, strategy):
+    """
+    Prepara uma estratégia de busca pontual por email. Retorna (lookup, close):
+    lookup(keys) busca uma chave ('text', 'prepared') ou um lote de chaves
+    ('in_list', 'temp_join') e devolve as linhas encontradas.
+    """
+    if strategy == 'prepared':
+        # Protocolo binário: PREPARE uma vez, só EXECUTE por chave
+        cursor = conn.cursor(prepared=True)
+    else:
+        cursor = conn.cursor()
+
+    if strategy in ('text', 'prepared'):
+        def lookup(keys):
+            cursor.execute(LOOKUP_SQL, (keys[0],))
+            return cursor.fetchall()
+        return lookup, cursor.close
+
+    if strategy == 'in_list':
+        def lookup(keys):
+            placeholders = ", ".join(["%s"] * len(keys))
+            cursor.execute(f"SELECT * FROM customers WHERE email IN ({placeholders})", tuple(keys))
+            return cursor.fetchall()
+        return lookup, cursor.close
 
-def create_database():
-    """Cria o banco de dados caso não exista."""
-    try:
-        root_cnx = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        root_cur = root_cnx.cursor()
-        root_cur.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
-        root_cur.close()
-        root_cnx.close()
-    except mysql.connector.Error as err:
-        print(f"Erro ao criar banco de dados: {err}")
-        raise
+    if strategy == 'temp_join':
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS lookup_keys")
+        cursor.execute("CREATE TEMPORARY TABLE lookup_keys (email VARCHAR(100) NOT NULL, KEY (email)) ENGINE=MEMORY")
 
-def get_connection():
-    """Retorna conexão com o banco de dados."""
-    return mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME
-    )
+        def lookup(keys):
+            cursor.execute("DELETE FROM lookup_keys")
+            cursor.executemany("INSERT INTO lookup_keys (email) VALUES (%s)", [(k,) for k in keys])
+            cursor.execute("SELECT c.* FROM lookup_keys k JOIN customers c ON c.email = k.email")
+            return cursor.fetchall()
 
-def reset_schema(conn, cursor):
-    """Cria esquema limpo com as tabelas customers e orders."""
+        def close():
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS lookup_keys")
+            cursor.close()
+        return lookup, close
+
+    raise ValueError(f"Estratégia desconhecida: {strategy}")
+
+def run_lookups(conn, strategy, keys, batch_size, duration):
+    """
+    Busca as chaves em lotes de batch_size (1 nas estratégias por chave) até
+    acabarem as chaves ou `duration` segundos. Retorna (histograma por
+    chamada, chaves buscadas, linhas encontradas, duração real).
+    """
+    lookup, close = open_lookup(conn, strategy)
+    hist = LatencyHistogram()
+    done = found = 0
     try:
-        cursor.execute("DROP TABLE IF EXISTS orders")
-        cursor.execute("DROP TABLE IF EXISTS customers")
-        cursor.execute("""
-        CREATE TABLE customers (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100),
-            email VARCHAR(100),
-            birth_date DATE,
-            address TEXT
-        ) ENGINE=InnoDB;
-        """)
-        cursor.execute("""
-        CREATE TABLE orders (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            customer_id INT,
-            total DECIMAL(10,2),
-            description TEXT,
-            order_date DATETIME,
-            status VARCHAR(20),
-            FOREIGN KEY (customer_id) REFERENCES customers(id)
-        ) ENGINE=InnoDB;
-        """)
-        conn.commit()
-    except mysql.connector.Error as err:
-        print(f"Erro ao resetar schema: {err}")
-        raise
+        lookup(keys[:batch_size])  # Warm-up
+        started = time.perf_counter_ns()
+        deadline = started + int(duration * 1e9)
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            t0 = time.perf_counter_ns()
+            found += len(lookup(batch))
+            end = time.perf_counter_ns()
+            hist.record(end - t0)
+            done += len(batch)
+            if end >= deadline:
+                break
+        elapsed = (time.perf_counter_ns() - started) / 1e9
+    finally:
+        close()
+    return hist, done, found, elapsed
+
+LOOKUP_HEADER = ['Volume', 'Estado', 'Estratégia', 'Lote', 'Chaves', 'Encontradas', 'Lookups/s',
+                 'Latência por Chave (ms)', 'P50 por Chamada (ms)', 'P99 por Chamada (ms)']
 
-def populate(conn, cursor, n_customers, n_orders):
-    """Popula as tabelas com dados fictícios usando Faker."""
+def lookup_benchmark(n_keys, batch_sizes, duration, strategies=LOOKUP_STRATEGIES):
+    """
+    Busca pontual de alto volume no cenário idx_cust_email: sorteia n_keys
+    emails (segundo WORKLOAD_DIST) e compara, com e sem o índice, protocolo
+    texto por chave, prepared statement por chave, IN (...) em lotes e JOIN
+    com tabela temporária em lotes. Grava carga/lookup.csv.
+    """
+    scenario = SCENARIOS['idx_cust_email']
+    conn = get_connection(**connection_options())
+    cursor = conn.cursor()
+    size_label = str(table_count(cursor, 'orders'))
+    keys = [email for (email,) in scenario['load_params'](cursor, n_keys)]
+    filename = os.path.join(LOAD_DIR, 'lookup.csv')
+    file_exists = os.path.isfile(filename)
     try:
-        cursor.execute("DELETE FROM orders")
-        cursor.execute("DELETE FROM customers")
-        conn.commit()
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(LOOKUP_HEADER)
+            for with_index in (False, True):
+                state = 'com_indice' if with_index else 'sem_indice'
+                try:
+                    cursor.execute(scenario['drop_sql'])
+                    conn.commit()
+                except DB_ERRORS:
+                    pass
+                if with_index:
+                    cursor.execute(scenario['create_sql'])
+                    conn.commit()
 
-        fake = Faker('pt_BR')
-        batch_size = 1000
-
-        # Insere clientes
-        for i in range(0, n_customers, batch_size):
-            batch = min(batch_size, n_customers - i)
-            custs = [
-                (fake.name(), fake.unique.email(), fake.date_of_birth(), fake.address())
-                for _ in range(batch)
-            ]
-            cursor.executemany(
-                "INSERT INTO customers (name, email, birth_date, address) VALUES (%s, %s, %s, %s)",
-                custs
-            )
+                for strategy in strategies:
+                    for batch_size in (batch_sizes if strategy in BATCHED_LOOKUPS else [1]):
+                        hist, done, found, elapsed = run_lookups(conn, strategy, keys, batch_size, duration)
+                        rate = done / elapsed if elapsed else 0
+                        per_key = elapsed / done * 1000 if done else 0
+                        writer.writerow([size_label, state, strategy, batch_size, done, found, round(rate, 1),
+                                         round(per_key, 4), round(hist.percentile(50) / 1e6, 3),
+                                         round(hist.percentile(99) / 1e6, 3)])
+                        csvfile.flush()
+                        print(f"{state} {strategy} (lote {batch_size}): {rate:,.0f} lookups/s, "
+                              f"{per_key:.4f} ms/chave, {done} chaves, {found} encontradas")
+    finally:
+        try:
+            cursor.execute(scenario['drop_sql'])
             conn.commit()
-            print(f"Inseridos {i + batch} de {n_customers} clientes")
+        except DB_ERRORS:
+            pass
+        cursor.close()
+        conn.close()
 
-        # Busca IDs para pedidos
-        cursor.execute("SELECT id FROM customers")
-        ids = [r[0] for r in cursor.fetchall()]
-
-        # Insere pedidos
-        for i in range(0, n_orders, batch_size):
-            batch = min(batch_size, n_orders - i)
-            orders = [
-                (
-                    fake.random_element(ids),
-                    round(fake.pydecimal(left_digits=4, right_digits=2, min_value=10, max_value=1000), 2),
-                    fake.text(max_nb_chars=200),
-                    fake.date_time_this_year(),
-                    fake.random_element(['Pendente', 'Processando', 'Enviado', 'Entregue'])
-                )
-                for _ in range(batch)
-            ]
-            cursor.executemany(
-                "INSERT INTO orders (customer_id, total, description, order_date, status) VALUES (%s, %s, %s, %s, %s)",
-                orders
-            )
-            conn.commit()
-            print(f"Inseridos {i + batch} de {n_orders} pedidos")
-    except mysql.connector.Error as err:
-        print(f"Erro ao popular banco: {err}")
-        raise
+# Cache de resultados do lado da aplicação (o MySQL 8 removeu o query cache).
+# A chave é o SQL normalizado + os parâmetros; cada entrada guarda as tabelas
+# lidas pela consulta, e uma escrita em uma tabela invalida todas as entradas
+# que a leram.
+_SQL_TABLES = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+`?(\w+)", re.IGNORECASE)
 
-def get_explain_plan(cursor, query, params=()):
-    """Retorna o plano EXPLAIN da query executada."""
-    try:
-        cursor.execute("EXPLAIN " + query, params)
-        plan = cursor.fetchall()
-        return plan, cursor.description
-    except mysql.connector.Error as err:
-        print(f"Erro ao obter plano EXPLAIN: {err}")
-        return None, None
+def normalize_sql(sql):
+    """SQL sem espaços redundantes nem ';' final, para que variações de formatação caiam na mesma chave."""
+    return re.sub(r"\s+", " ", sql).strip().rstrip(';').strip()
 
-def save_explain_plan(plan_data, filename):
-    """Salva o plano EXPLAIN em arquivo CSV para análise."""
-    if plan_data is None:
-        return
-    
-    plan, description = plan_data
-    if plan is None:
-        return
+def sql_tables(sql):
+    """Tabelas citadas em FROM/JOIN/INTO/UPDATE (em minúsculas)."""
+    return {table.lower() for table in _SQL_TABLES.findall(sql)}
 
-    filepath = os.path.join(EXPLAIN_DIR, filename)
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        # Obtém os cabeçalhos da descrição do cursor
-        if description:
-            headers = [desc[0] for desc in description]
-            writer.writerow(headers)
-        # Escreve as linhas do plano
-        writer.writerows(plan)
+def _result_size(rows):
+    """Estimativa (bytes) da memória ocupada por uma lista de linhas: lista, tuplas e valores."""
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row) for row in rows)
 
-def measure_performance(conn, cursor, create_sql, drop_sql, query_sql, params=(), test_name="", size_label="", index_type="BTREE"):
+class ResultCache:
     """
-    Mede tempo de execução de consulta com e sem índice,
-    executa planos EXPLAIN e salva resultados.
+    LRU de resultados com limite de entradas e de memória (estimada por
+    _result_size()) e TTL em segundos (0 = sem expiração). Resultados maiores
+    que o limite de memória não são guardados. invalidate(table) descarta
+    as entradas que leram a tabela.
     """
-    try:
-        # Remove índice se existir
-        if drop_sql:
-            try:
-                cursor.execute(drop_sql)
-                conn.commit()
-            except mysql.connector.Error:
-                pass
 
-        # Warm-up sem índice
-        cursor.execute(query_sql, params)
-        cursor.fetchall()
+    def __init__(self, max_entries=None, max_mb=None, ttl=None):
+        self.max_entries = max_entries or RESULT_CACHE_ENTRIES
+        self.max_bytes = (max_mb or RESULT_CACHE_MB) * 1024 ** 2
+        self.ttl = RESULT_CACHE_TTL if ttl is None else ttl
+        self.entries = OrderedDict()  # chave -> (linhas, tabelas, bytes, expira em)
+        self.by_table = {}  # tabela -> chaves que a leram
+        self.bytes = self.peak_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidated': 0, 'too_large': 0}
+        self._lock = threading.Lock()
 
-        no_idx_times = []
-        for _ in range(N_RUNS):
-            t0 = time.time()
-            cursor.execute(query_sql, params)
-            cursor.fetchall()
-            no_idx_times.append(time.time() - t0)
-        no_idx_avg = sum(no_idx_times[1:]) / (N_RUNS - 1)  # descarta warm-up
+    @staticmethod
+    def key(sql, params=()):
+        return normalize_sql(sql), tuple(params)
 
-        # Salva plano explain sem índice
-        explain_plan_no_idx = get_explain_plan(cursor, query_sql, params)
-        save_explain_plan(explain_plan_no_idx, f'{index_type}_{test_name}_{size_label}_no_idx.csv')
+    def _remove(self, key):
+        _, tables, size, _ = self.entries.pop(key)
+        self.bytes -= size
+        for table in tables:
+            keys = self.by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
 
-        # Cria índice
-        if create_sql:
-            cursor.execute(create_sql)
-            conn.commit()
+    def get(self, sql, params=()):
+        """Retorna (True, linhas) em um acerto ou (False, None)."""
+        key = self.key(sql, params)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[3] is not None and entry[3] <= time.monotonic():
+                self._remove(key)
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, entry[0]
 
-        # Warm-up com índice
-        cursor.execute(query_sql, params)
-        cursor.fetchall()
+    def put(self, sql, params, rows):
+        key = self.key(sql, params)
+        size = _result_size(rows)
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.stats['too_large'] += 1
+                return
+            tables = sql_tables(sql)
+            expires = time.monotonic() + self.ttl if self.ttl else None
+            self.entries[key] = (rows, tables, size, expires)
+            self.bytes += size
+            for table in tables:
+                self.by_table.setdefault(table, set()).add(key)
+            # Despeja as menos usadas até caber nos dois limites
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.stats['evictions'] += 1
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
 
-        with_idx_times = []
-        for _ in range(N_RUNS):
-            t0 = time.time()
-            cursor.execute(query_sql, params)
-            cursor.fetchall()
-            with_idx_times.append(time.time() - t0)
-        with_idx_avg = sum(with_idx_times[1:]) / (N_RUNS - 1)
+    def invalidate(self, table):
+        """Descarta as entradas que leram `table`; retorna quantas."""
+        with self._lock:
+            keys = list(self.by_table.pop(table.lower(), ()))
+            for key in keys:
+                if key in self.entries:
+                    self._remove(key)
+            self.stats['invalidated'] += len(keys)
+            return len(keys)
 
-        # Salva plano explain com índice
-        explain_plan_with_idx = get_explain_plan(cursor, query_sql, params)
-        save_explain_plan(explain_plan_with_idx, f'{index_type}_{test_name}_{size_label}_with_idx.csv')
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
 
-        # Remove índice para próxima rodada
-        if drop_sql:
-            cursor.execute(drop_sql)
-            conn.commit()
+def cached_fetch(cache, cursor, sql, params=()):
+    """Executa a leitura pelo cache (cache=None lê direto do banco). Retorna (linhas, acerto)."""
+    if cache is not None:
+        hit, rows = cache.get(sql, params)
+        if hit:
+            return rows, True
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    if cache is not None:
+        cache.put(sql, params, rows)
+    return rows, False
 
-        # Salvando tempos em CSV (append)
-        filename = os.path.join(TIMES_DIR, f'times_{index_type}_{test_name}.csv')
-        file_exists = os.path.isfile(filename)
+def cached_write(cache, conn, cursor, sql, params=()):
+    """
+    Executa uma escrita com commit e, em seguida, invalida no cache as
+    entradas das tabelas escritas (depois do commit, para que uma leitura
+    concorrente não guarde de novo o estado anterior).
+    """
+    cursor.execute(sql, params)
+    conn.commit()
+    if cache is not None:
+        for table in sql_tables(sql):
+            cache.invalidate(table)
+
+# Escritas do teste misto por tabela: coluna alterada pelo UPDATE
+MIXED_UPDATE_COLUMN = {'customers': 'name', 'orders': 'status'}
+
+def run_mixed(conn, cursor, scenario, query_sql, params_list, n_ops, write_ratio, write_rows, duration, cache=None):
+    """
+    Carga mista de um cliente: cada operação é uma escrita com probabilidade
+    write_ratio e, nas demais, uma leitura do cenário com parâmetros de
+    params_list. As escritas se alternam entre INSERT (de write_rows), UPDATE
+    e DELETE das linhas inseridas pela própria carga; as que sobram são
+    removidas no fim. Para em n_ops operações ou `duration` segundos.
+    Retorna (histograma de leituras, histograma de escritas, operações, duração).
+    """
+    table = scenario['table']
+    columns, rows = write_rows
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    update_column = MIXED_UPDATE_COLUMN[table]
+    update_sql = f"UPDATE {table} SET {update_column} = %s WHERE id = %s"
+    update_value = columns.index(update_column)
+
+    rng = np.random.default_rng(SEED)
+    is_write = rng.random(n_ops) < write_ratio
+    picks = rng.integers(len(params_list), size=n_ops)
+    reads, writes = LatencyHistogram(), LatencyHistogram()
+    inserted, next_row, n_writes, done = [], 0, 0, 0
+    try:
+        started = time.perf_counter_ns()
+        deadline = started + int(duration * 1e9)
+        for write, pick in zip(is_write, picks):
+            t0 = time.perf_counter_ns()
+            if not write:
+                cached_fetch(cache, cursor, query_sql, params_list[pick])
+                reads.record(time.perf_counter_ns() - t0)
+            else:
+                kind = n_writes % 3 if inserted else 0
+                if kind == 0:
+                    cached_write(cache, conn, cursor, insert_sql, rows[next_row])
+                    inserted.append(cursor.lastrowid)
+                    next_row += 1
+                elif kind == 1:
+                    row = rows[int(rng.integers(len(rows)))]
+                    cached_write(cache, conn, cursor, update_sql,
+                                 (row[update_value], inserted[int(rng.integers(len(inserted)))]))
+                else:
+                    cached_write(cache, conn, cursor, f"DELETE FROM {table} WHERE id = %s", (inserted.pop(0),))
+                writes.record(time.perf_counter_ns() - t0)
+                n_writes += 1
+            done += 1
+            if time.perf_counter_ns() >= deadline:
+                break
+        elapsed = (time.perf_counter_ns() - started) / 1e9
+    finally:
+        for row_id in inserted:
+            cursor.execute(f"DELETE FROM {table} WHERE id = %s", (row_id,))
+        conn.commit()
+    return reads, writes, done, elapsed
+
+# Caminhos comparados pelo teste de cache: (índice criado, cache na frente)
+RESULT_CACHE_PATHS = {
+    'sem_indice': (False, False),
+    'com_indice': (True, False),
+    'cache': (False, True),
+    'cache_indice': (True, True),
+}
+RESULT_CACHE_HEADER = ['Volume', 'Cenário', 'Caminho', 'Operações', 'Escritas (%)', 'TTL (s)', 'Ops/s',
+                       'Acertos (%)', 'Leitura P50 (ms)', 'Leitura P99 (ms)', 'Escrita P50 (ms)',
+                       'Escrita P99 (ms)', 'Entradas', 'Memória do Cache (MB)', 'Pico do Cache (MB)',
+                       'Despejos', 'Expiradas', 'Invalidadas', 'Grandes Demais']
+
+def result_cache_benchmark(names, n_ops, write_ratio, duration, ttl=None):
+    """
+    Compara, nos cenários pedidos e sobre os dados já populados, a leitura
+    sem índice, com índice e através do ResultCache (sem e com o índice)
+    sob a mesma carga mista de leituras e escritas (run_mixed()). Reporta
+    taxa de acerto, latências, memória do cache e invalidações em
+    carga/result_cache.csv.
+    """
+    ttl = RESULT_CACHE_TTL if ttl is None else ttl
+    conn = get_connection()
+    cursor = conn.cursor()
+    size_label = str(table_count(cursor, 'orders'))
+    customer_ids = customer_id_range(cursor)
+    filename = os.path.join(LOAD_DIR, 'result_cache.csv')
+    file_exists = os.path.isfile(filename)
+    try:
         with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             if not file_exists:
-                writer.writerow(['Volume', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)'])
-            improvement = ((no_idx_avg - with_idx_avg) / no_idx_avg * 100) if no_idx_avg else 0
-            writer.writerow([size_label, round(no_idx_avg, 4), round(with_idx_avg, 4), round(improvement, 2)])
+                writer.writerow(RESULT_CACHE_HEADER)
+            for name in names:
+                scenario = scenario_def(name)
+                table = scenario['table']
+                # Linhas geradas além do volume atual (posições ainda não usadas)
+                start = table_count(cursor, table) + 10 * int(size_label)
+                write_rows = _write_rows(table, start, n_ops, customer_ids)
+                for path, (with_index, with_cache) in RESULT_CACHE_PATHS.items():
+                    try:
+                        cursor.execute(scenario['drop_sql'])
+                        conn.commit()
+                    except DB_ERRORS:
+                        pass
+                    if with_index:
+                        cursor.execute(scenario['create_sql'])
+                        conn.commit()
+                    query_sql, params_list = scenario_query(scenario, cursor, with_index, LOAD_PARAM_SAMPLE)
+                    cache = ResultCache(ttl=ttl) if with_cache else None
+                    reads, writes, done, elapsed = run_mixed(conn, cursor, scenario, query_sql, params_list,
+                                                             n_ops, write_ratio, write_rows, duration, cache)
+                    rate = done / elapsed if elapsed else 0
+                    stats = cache.stats if cache else {}
+                    hit_rate = cache.hit_rate() * 100 if cache else None
+                    writer.writerow([
+                        size_label, name, path, done, round(write_ratio * 100, 2), ttl, round(rate, 1),
+                        round(hit_rate, 2) if cache else '',
+                        round(reads.percentile(50) / 1e6, 3), round(reads.percentile(99) / 1e6, 3),
+                        round(writes.percentile(50) / 1e6, 3), round(writes.percentile(99) / 1e6, 3),
+                        len(cache.entries) if cache else '',
+                        round(cache.bytes / 1024 ** 2, 2) if cache else '',
+                        round(cache.peak_bytes / 1024 ** 2, 2) if cache else '',
+                    ] + [stats.get(key, '') for key in ('evictions', 'expired', 'invalidated', 'too_large')])
+                    csvfile.flush()
+                    print(f"{name} [{path}]: {rate:,.0f} ops/s, leitura p50 {reads.percentile(50) / 1e6:.3f} ms "
+                          f"p99 {reads.percentile(99) / 1e6:.3f} ms"
+                          + (f", acertos {hit_rate:.1f}%, {len(cache.entries)} entradas "
+                             f"({cache.peak_bytes / 1024 ** 2:.1f} MB no pico), "
+                             f"{stats['invalidated']} invalidadas" if cache else ""))
+                try:
+                    cursor.execute(scenario['drop_sql'])
+                    conn.commit()
+                except DB_ERRORS:
+                    pass
+    finally:
+        cursor.close()
+        conn.close()
 
-        return no_idx_avg, with_idx_avg
-    except mysql.connector.Error as err:
-        print(f"Erro ao medir performance: {err}")
-        return None, None
+# Alvo HASH do teste de escrita: cópia de orders em uma tabela MEMORY (sem a
+# coluna TEXT, não suportada pela engine), com índice HASH em customer_id.
+# 'gain' aponta a célula de leitura do mesmo índice: mem_hash_eq (igualdade em
+# customer_id, HASH × BTREE na mesma cópia MEMORY).
+HASH_WRITE_TARGET = {
+    'index_type': 'HASH',
+    'table': 'orders_memory',
+    'columns': ['customer_id'],
+    'create_sql': "CREATE INDEX idx_hash USING HASH ON orders_memory(customer_id)",
+    'drop_sql': "DROP INDEX idx_hash ON orders_memory",
+    'gain': ('MEMORY_HASH', 'mem_hash_eq'),
+}
+MEMORY_COLUMNS = ['customer_id', 'total', 'order_date', 'status']
+
+def create_memory_copy(conn, cursor):
+    """Cria orders_memory (ENGINE=MEMORY) com todas as linhas de orders, sem índices secundários."""
+    cursor.execute("SET SESSION max_heap_table_size = 4 * 1024 * 1024 * 1024")
+    cursor.execute("DROP TABLE IF EXISTS orders_memory")
+    cursor.execute("""
+    CREATE TABLE orders_memory (
+        id INT AUTO_INCREMENT,
+        customer_id INT,
+        total DECIMAL(10,2),
+        order_date DATETIME,
+        status VARCHAR(20),
+        PRIMARY KEY USING HASH (id)
+    ) ENGINE=MEMORY
+    """)
+    cursor.execute("INSERT INTO orders_memory SELECT id, customer_id, total, order_date, status FROM orders")
+    conn.commit()
 
-def measure_fulltext(conn, cursor, idx_sql, drop_sql, query_with, params_with, query_without, params_without, test_name="", size_label=""):
+def write_targets():
+    """Índices avaliados no teste de custo de escrita: os cenários do backend mais o HASH."""
+    targets = {name: scenario_def(name) for name in backend_scenarios()}
+    targets['idx_hash'] = HASH_WRITE_TARGET
+    return targets
+
+def _write_rows(table, start, count, customer_ids):
+    """Linhas novas para os testes de escrita, geradas a partir da posição `start`."""
+    if table == 'customers':
+        return CUSTOMER_COLUMNS, columns_to_rows(generate_customers(start, count), CUSTOMER_COLUMNS)
+    columns = ORDER_COLUMNS if table == 'orders' else MEMORY_COLUMNS
+    return columns, columns_to_rows(generate_orders(start, count, customer_ids), columns)
+
+def index_size_bytes(cursor, target, index_name):
     """
-    Mede desempenho específico para FULLTEXT index,
-    comparando MATCH AGAINST e LIKE, incluindo planos EXPLAIN.
+    Tamanho em disco do índice: mysql.innodb_index_stats para B-Tree InnoDB,
+    tablespaces auxiliares fts_* para FULLTEXT e INDEX_LENGTH para MEMORY.
     """
-    try:
-        # Remove índice
-        try:
-            cursor.execute(drop_sql)
-            conn.commit()
-        except mysql.connector.Error:
-            pass
+    table = target['table']
+    if target['index_type'] == 'HASH':
+        cursor.execute(
+            "SELECT INDEX_LENGTH FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (DB_NAME, table)
+        )
+        return int(cursor.fetchone()[0])
+    if target['index_type'] == 'FULLTEXT':
+        cursor.execute("""
+        SELECT COALESCE(SUM(ts.ALLOCATED_SIZE), 0)
+        FROM information_schema.INNODB_TABLESPACES ts
+        JOIN information_schema.INNODB_TABLES t ON t.NAME = %s
+        WHERE ts.NAME LIKE CONCAT(%s, '/fts_', LPAD(LOWER(HEX(t.TABLE_ID)), 16, '0'), '%')
+        """, (f"{DB_NAME}/{table}", DB_NAME))
+        return int(cursor.fetchone()[0])
+    cursor.execute(f"ANALYZE TABLE {table}")
+    cursor.fetchall()
+    cursor.execute("""
+    SELECT stat_value * @@innodb_page_size FROM mysql.innodb_index_stats
+    WHERE database_name = %s AND table_name = %s AND index_name = %s AND stat_name = 'size'
+    """, (DB_NAME, table, index_name))
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
 
-        # Warm-up LIKE (sem índice)
-        cursor.execute(query_without, params_without)
-        cursor.fetchall()
+def measure_write_throughput(conn, cursor, table, columns, rows, update_rows, update_columns):
+    """
+    INSERT, UPDATE (das colunas indexadas) e DELETE de len(rows) linhas, uma
+    por comando com commit, como uma aplicação OLTP. O UPDATE grava os valores
+    de update_rows (linhas geradas distintas, para não violar UNIQUE). As
+    linhas inseridas são removidas no DELETE, então o volume termina como
+    começou. Retorna ops/s por operação.
+    """
+    placeholders = ", ".join(["%s"] * len(columns))
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    update_sql = f"UPDATE {table} SET {', '.join(f'{c} = %s' for c in update_columns)} WHERE id = %s"
+    positions = [columns.index(c) for c in update_columns]
+    rates = {}
 
-        no_idx_times = []
-        for _ in range(N_RUNS):
-            t0 = time.time()
-            cursor.execute(query_without, params_without)
-            cursor.fetchall()
-            no_idx_times.append(time.time() - t0)
-        no_idx_avg = sum(no_idx_times[1:]) / (N_RUNS - 1)
+    ids = []
+    t0 = time.perf_counter()
+    for row in rows:
+        cursor.execute(insert_sql, row)
+        conn.commit()
+        ids.append(cursor.lastrowid)
+    rates['insert'] = len(rows) / (time.perf_counter() - t0)
 
-        explain_no_idx = get_explain_plan(cursor, query_without, params_without)
-        save_explain_plan(explain_no_idx, f'FULLTEXT_{test_name}_{size_label}_no_idx.csv')
+    t0 = time.perf_counter()
+    for row_id, row in zip(ids, update_rows):
+        cursor.execute(update_sql, tuple(row[p] for p in positions) + (row_id,))
+        conn.commit()
+    rates['update'] = len(ids) / (time.perf_counter() - t0)
 
-        # Cria FULLTEXT index
-        cursor.execute(idx_sql)
+    t0 = time.perf_counter()
+    for row_id in ids:
+        cursor.execute(f"DELETE FROM {table} WHERE id = %s", (row_id,))
         conn.commit()
+    rates['delete'] = len(ids) / (time.perf_counter() - t0)
+    return rates
 
-        # Warm-up MATCH AGAINST
-        cursor.execute(query_with, params_with)
-        cursor.fetchall()
+def _ddl_writer(table, start, customer_ids, stop, result):
+    """
+    Escritor concorrente do teste de DDL online: INSERTs com commit até `stop`,
+    com linhas novas geradas a partir da posição `start` (sem repetir valores).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    columns, rows = _write_rows(table, start, 1000, customer_ids)
+    placeholders = ", ".join(["%s"] * len(columns))
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    latencies, ids = [], []
+    started = time.perf_counter()
+    try:
+        while not stop.is_set():
+            if len(ids) == len(rows):
+                rows += _write_rows(table, start + len(rows), 1000, customer_ids)[1]
+            t0 = time.perf_counter()
+            cursor.execute(insert_sql, rows[len(ids)])
+            conn.commit()
+            latencies.append(time.perf_counter() - t0)
+            ids.append(cursor.lastrowid)
+        elapsed = time.perf_counter() - started
+        for i in range(0, len(ids), 1000):
+            chunk = ids[i:i + 1000]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            conn.commit()
+        result['ops'] = len(latencies) / elapsed if elapsed else 0
+        result['max_ms'] = max(latencies) * 1000 if latencies else 0
+    except DB_ERRORS as err:
+        result['error'] = str(err)
+    finally:
+        cursor.close()
+        conn.close()
 
-        with_idx_times = []
-        for _ in range(N_RUNS):
-            t0 = time.time()
-            cursor.execute(query_with, params_with)
-            cursor.fetchall()
-            with_idx_times.append(time.time() - t0)
-        with_idx_avg = sum(with_idx_times[1:]) / (N_RUNS - 1)
+def measure_online_ddl(conn, cursor, target, start, customer_ids):
+    """
+    Cria o índice com ALGORITHM=INPLACE, LOCK=NONE enquanto um escritor insere
+    na mesma tabela. Retorna (tempo do DDL, ops/s do escritor, maior pausa do
+    escritor em ms) ou None se a engine/índice não suporta DDL online.
+    """
+    stop = threading.Event()
+    result = {}
+    writer = threading.Thread(target=_ddl_writer, args=(target['table'], start, customer_ids, stop, result))
+    writer.start()
+    time.sleep(0.5)  # escritor em regime antes do DDL
+    try:
+        t0 = time.perf_counter()
+        cursor.execute(f"{target['create_sql']} ALGORITHM=INPLACE LOCK=NONE")
+        conn.commit()
+        ddl_time = time.perf_counter() - t0
+    except DB_ERRORS as err:
+        print(f"DDL online não suportado para {target['create_sql']}: {err}")
+        ddl_time = None
+    finally:
+        time.sleep(0.5)
+        stop.set()
+        writer.join()
+    if ddl_time is None or 'error' in result:
+        return None
+    return ddl_time, result['ops'], result['max_ms']
 
-        explain_with_idx = get_explain_plan(cursor, query_with, params_with)
-        save_explain_plan(explain_with_idx, f'FULLTEXT_{test_name}_{size_label}_with_idx.csv')
+def read_gain(index_type, name, size_label):
+    """Melhoria de leitura (%) do índice no volume, da célula mais recente do journal (backend e semente atuais)."""
+    cell = latest_cells().get((index_type, name), {}).get(size_label)
+    return float(cell[0]['Melhoria (%)']) if cell else None
 
-        # Remove índice para próxima rodada
-        cursor.execute(drop_sql)
-        conn.commit()
+WRITE_COST_HEADER = ['Volume', 'Índice', 'Tipo', 'Criação (s)', 'Tamanho (bytes)',
+                     'INSERT/s Sem', 'INSERT/s Com', 'UPDATE/s Sem', 'UPDATE/s Com',
+                     'DELETE/s Sem', 'DELETE/s Com', 'DDL Online (s)', 'Escrita Durante DDL (ops/s)',
+                     'Pausa Máx Escrita (ms)', 'Ganho Leitura (%)']
 
-        # Salvando tempos em CSV (append)
-        filename = os.path.join(TIMES_DIR, f'times_FULLTEXT_{test_name}.csv')
-        file_exists = os.path.isfile(filename)
+def measure_write_cost(n_ops):
+    """
+    Custo de escrita de cada índice em cada volume: tempo de criação, tamanho
+    em disco, vazão de INSERT/UPDATE/DELETE com e sem o índice e comportamento
+    do DDL online sob um escritor concorrente. Compara com o ganho de leitura
+    registrado no journal e grava tempos/write_cost.csv.
+    """
+    create_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+    reset_schema(conn, cursor)
+    filename = os.path.join(TIMES_DIR, 'write_cost.csv')
+    file_exists = os.path.isfile(filename)
+    summary = []
+    try:
         with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             if not file_exists:
-                writer.writerow(['Volume', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)'])
-            improvement = ((no_idx_avg - with_idx_avg) / no_idx_avg * 100) if no_idx_avg else 0
-            writer.writerow([size_label, round(no_idx_avg, 4), round(with_idx_avg, 4), round(improvement, 2)])
+                writer.writerow(WRITE_COST_HEADER)
+            for nc, no in SIZES:
+                size_label = f"{no}"
+                print(f"\nCusto de escrita com {nc} clientes e {no} pedidos...")
+                prepare_tier(conn, cursor, nc, no)
+                create_memory_copy(conn, cursor)
+                customer_ids = customer_id_range(cursor)
 
-        return no_idx_avg, with_idx_avg
-    except mysql.connector.Error as err:
-        print(f"Erro ao medir FULLTEXT: {err}")
-        return None, None
+                for name, target in write_targets().items():
+                    table = target['table']
+                    # Linhas geradas além do volume atual (posições ainda não usadas)
+                    start = (nc if table == 'customers' else no) + 10 * no
+                    columns, rows = _write_rows(table, start, n_ops, customer_ids)
+                    update_rows = _write_rows(table, start + n_ops, n_ops, customer_ids)[1]
+                    try:
+                        try:
+                            cursor.execute(target['drop_sql'])
+                            conn.commit()
+                        except DB_ERRORS:
+                            pass
+                        without = measure_write_throughput(conn, cursor, table, columns, rows, update_rows,
+                                                           target['columns'])
+
+                        t0 = time.perf_counter()
+                        cursor.execute(target['create_sql'])
+                        conn.commit()
+                        build_time = time.perf_counter() - t0
+                        size = index_size_bytes(cursor, target, name)
+                        with_idx = measure_write_throughput(conn, cursor, table, columns, rows, update_rows,
+                                                            target['columns'])
+
+                        cursor.execute(target['drop_sql'])
+                        conn.commit()
+                        online = measure_online_ddl(conn, cursor, target, start + 2 * n_ops, customer_ids)
+                        try:
+                            cursor.execute(target['drop_sql'])
+                            conn.commit()
+                        except DB_ERRORS:
+                            pass
+                    except DB_ERRORS as err:
+                        print(f"Erro ao medir custo de escrita de {name}: {err}")
+                        continue
+
+                    gain = read_gain(*target.get('gain', (target['index_type'], name)), size_label)
+                    ddl_time, ddl_ops, ddl_pause = online if online else ('', '', '')
+                    writer.writerow(
+                        [size_label, name, target['index_type'], round(build_time, 4), size]
+                        + [round(rates[op], 1) for op in ('insert', 'update', 'delete')
+                           for rates in (without, with_idx)]
+                        + [round(ddl_time, 4) if online else '', round(ddl_ops, 1) if online else '',
+                           round(ddl_pause, 2) if online else '', gain if gain is not None else '']
+                    )
+                    csvfile.flush()
+                    insert_cost = (1 - with_idx['insert'] / without['insert']) * 100
+                    summary.append((size_label, name, gain, insert_cost, build_time, size))
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS orders_memory")
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+    print(f"\n{'Volume':>8} {'Índice':<16} {'Ganho leitura':>14} {'Custo INSERT':>13} {'Criação (s)':>12} {'Tamanho (MB)':>13}")
+    for size_label, name, gain, insert_cost, build_time, size in summary:
+        gain_txt = f"{gain:.1f}%" if gain is not None else "-"
+        print(f"{size_label:>8} {name:<16} {gain_txt:>14} {insert_cost:>12.1f}% {build_time:>12.2f} {size / 2**20:>13.2f}")
+    return summary
 
-def plot_results(results, sizes, test_name, index_type=""):
+def plot_results(results, sizes, test_name, index_type="", backend=DB_BACKEND):
     """
     Gera gráficos de comparação de tempos e melhoria percentual,
     salva arquivos PNG.
     """
+    prefix = backend_prefix(backend)
     x = list(range(len(sizes)))
     labels = [f"{no:,} pedidos" for _, no in sizes]
 
@@ -318,7 +4132,7 @@ def plot_results(results, sizes, test_name, index_type=""):
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(os.path.join(CHARTS_DIR, f"{index_type}_{test_name}_exec_time.png"))
+    plt.savefig(os.path.join(CHARTS_DIR, f"{prefix}{index_type}_{test_name}_exec_time.png"))
     plt.close()
 
     # Gráfico de melhoria percentual
@@ -331,273 +4145,561 @@ def plot_results(results, sizes, test_name, index_type=""):
     plt.title(f"{index_type} {test_name} — Melhoria percentual com índice")
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(os.path.join(CHARTS_DIR, f"{index_type}_{test_name}_improvement.png"))
+    plt.savefig(os.path.join(CHARTS_DIR, f"{prefix}{index_type}_{test_name}_improvement.png"))
     plt.close()
 
-def run_tests():
-    """Executa sequência completa de testes para todos os índices e volumes."""
-    try:
-        sizes = [
-            (10000, 50000),     # Pequeno
-            (20000, 100000),    # Médio
-            (50000, 250000),    # Grande
-            (100000, 500000),   # Muito Grande
-        ]
-        
-        results = {
-            'idx_cust_email': [],
-            'idx_ord_date': [],
-            'idx_ord_status': [],
-            'idx_ord_total': [],
-            'idx_ord_desc': [],
-            'idx_composto': [],
-            'idx_hash': []
-        }
-
-        # Mapeia os nomes dos índices para seus tipos
-        index_types = {
-            'idx_cust_email': 'BTREE_UNIQUE',
-            'idx_ord_date': 'BTREE',
-            'idx_ord_status': 'BTREE',
-            'idx_ord_total': 'BTREE',
-            'idx_ord_desc': 'FULLTEXT',
-            'idx_composto': 'BTREE_COMPOSTO',
-            'idx_hash': 'HASH'
-        }
+# Volumes testados: (clientes, pedidos)
+SIZES = [
+    (10000, 50000),     # Pequeno
+    (20000, 100000),    # Médio
+    (50000, 250000),    # Grande
+    (100000, 500000),   # Muito Grande
+]
+
+def prepare_tier(conn, cursor, n_customers, n_orders):
+    """Deixa o banco com o volume pedido: restaura o snapshot ou popula (e salva o snapshot)."""
+    if not supports('snapshots'):
+        populate(conn, cursor, n_customers, n_orders)
+    elif not restore_snapshot(conn, cursor, n_customers, n_orders):
+        populate(conn, cursor, n_customers, n_orders)
+        save_snapshot(conn, cursor, n_customers, n_orders)
+
+# Cenários HASH × BTREE sobre a cópia MEMORY de orders (create_memory_copy(),
+# volume inteiro): o mesmo índice em 'column' é criado USING BTREE ("sem") e
+# USING HASH ("com"). mem_hash_dup usa uma chave com poucos valores distintos,
+# em que cada busca no HASH percorre uma cadeia longa de colisões.
+MEMORY_SCENARIOS = {
+    'mem_hash_eq': {
+        'column': 'customer_id',
+        'query_sql': "SELECT * FROM orders_memory WHERE customer_id = %s",
+        'params': lambda cursor: (_middle_range(cursor, 'orders_memory', 'customer_id', 0)[0],),
+    },
+    'mem_hash_range': {
+        'column': 'customer_id',
+        'query_sql': "SELECT * FROM orders_memory WHERE customer_id BETWEEN %s AND %s",
+        'params': lambda cursor: _middle_range(cursor, 'orders_memory', 'customer_id', 0.01),
+    },
+    'mem_hash_dup': {
+        'column': 'status',
+        'query_sql': "SELECT COUNT(*) FROM orders_memory WHERE status = %s",
+        'params': lambda cursor: ('Entregue',),
+    },
+}
+
+def run_memory_scenario(conn, cursor, name, size_label):
+    """
+    HASH × BTREE em MEMORY: cenário de MEMORY_SCENARIOS com o índice USING
+    BTREE ("sem") e USING HASH ("com") na mesma coluna. Retorna (média sem, média com).
+    """
+    scenario = MEMORY_SCENARIOS[name]
+    stats = {}
+    try:
+        create_memory_copy(conn, cursor)
+        params = scenario['params'](cursor)
+        for state, using in (('no_idx', 'BTREE'), ('with_idx', 'HASH')):
+            cursor.execute(f"CREATE INDEX idx_mem USING {using} ON orders_memory({scenario['column']})")
+            conn.commit()
+            stats[using] = time_query(conn, cursor, scenario['query_sql'], params)
+            save_explain_plan(get_explain_plan(cursor, scenario['query_sql'], params), 'MEMORY_HASH', name,
+                              size_label, state, scenario['query_sql'])
+            cursor.execute("DROP INDEX idx_mem ON orders_memory")
+            conn.commit()
+        save_times('MEMORY_HASH', name, size_label, stats['BTREE'], stats['HASH'])
+        return stats['BTREE']['mean'], stats['HASH']['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao testar {name}: {err}")
+        return None, None
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS orders_memory")
+        conn.commit()
+
+def run_mem_hash_eq(conn, cursor, size_label):
+    return run_memory_scenario(conn, cursor, 'mem_hash_eq', size_label)
+
+def run_mem_hash_range(conn, cursor, size_label):
+    return run_memory_scenario(conn, cursor, 'mem_hash_range', size_label)
+
+def run_mem_hash_dup(conn, cursor, size_label):
+    return run_memory_scenario(conn, cursor, 'mem_hash_dup', size_label)
+
+AHI_KEYS = 1000  # Chaves por consulta no teste do adaptive hash index
+
+def ahi_searches(cursor):
+    """(buscas resolvidas pelo AHI, buscas que foram à B-Tree) em INNODB_METRICS."""
+    cursor.execute("""
+    SELECT NAME, COUNT FROM information_schema.INNODB_METRICS
+    WHERE NAME IN ('adaptive_hash_searches', 'adaptive_hash_searches_btree')
+    """)
+    counts = dict(cursor.fetchall())
+    return counts.get('adaptive_hash_searches', 0), counts.get('adaptive_hash_searches_btree', 0)
+
+def run_ahi_scenario(conn, cursor, size_label):
+    """
+    ADAPTIVE HASH INDEX: AHI_KEYS buscas pontuais pela chave primária de
+    orders (sorteadas segundo WORKLOAD_DIST) em uma consulta IN (...),
+    repetida por time_query(), com innodb_adaptive_hash_index OFF ("sem") e
+    ON ("com"). O valor original da variável e os contadores do módulo
+    adaptive_hash_index que estavam desligados são restaurados ao final.
+    """
+    cursor.execute("SELECT MIN(id), MAX(id) FROM orders")
+    lo, hi = cursor.fetchone()
+    keys = sorted(set(sample_keys(range(lo, hi + 1), AHI_KEYS)))
+    query_sql = f"SELECT SUM(total) FROM orders WHERE id IN ({', '.join(['%s'] * len(keys))})"
+    params = tuple(keys)
+
+    cursor.execute("SELECT @@GLOBAL.innodb_adaptive_hash_index")
+    original = cursor.fetchone()[0]
+    cursor.execute("""
+    SELECT NAME FROM information_schema.INNODB_METRICS
+    WHERE SUBSYSTEM = 'adaptive_hash_index' AND STATUS <> 'enabled'
+    """)
+    disabled = [name for (name,) in cursor.fetchall()]
+    try:
+        cursor.execute("SET GLOBAL innodb_monitor_enable = 'module_adaptive_hash'")
+        stats = {}
+        for state, enabled in (('no_idx', 'OFF'), ('with_idx', 'ON')):
+            cursor.execute(f"SET GLOBAL innodb_adaptive_hash_index = {enabled}")
+            before = ahi_searches(cursor)
+            stats[enabled] = time_query(conn, cursor, query_sql, params)
+            hits, misses = (after - b for after, b in zip(ahi_searches(cursor), before))
+            if hits + misses:
+                print(f"AHI {enabled} ({size_label}): {hits / (hits + misses):.1%} das buscas pelo hash")
+            save_explain_plan(get_explain_plan(cursor, query_sql, params), 'AHI', 'ahi_lookup',
+                              size_label, state, query_sql)
+        save_times('AHI', 'ahi_lookup', size_label, stats['OFF'], stats['ON'])
+        return stats['OFF']['mean'], stats['ON']['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao testar adaptive hash index: {err}")
+        return None, None
+    finally:
+        cursor.execute(f"SET GLOBAL innodb_adaptive_hash_index = {int(original)}")
+        for name in disabled:
+            cursor.execute("SET GLOBAL innodb_monitor_disable = %s", (name,))
+
+PARTITION_TABLE = 'orders_part'
+
+def create_partitioned_copy(conn, cursor):
+    """
+    Copia orders para orders_part, particionada por RANGE COLUMNS(order_date)
+    com uma partição por mês dos dados. InnoDB não aceita FK em tabelas
+    particionadas e exige a coluna de partição na chave primária, por isso a
+    cópia. Retorna o número de partições.
+    """
+    cursor.execute("SELECT MIN(order_date), MAX(order_date) FROM orders")
+    lo, hi = cursor.fetchone()
+    partitions = []
+    year, month = lo.year, lo.month
+    while (year, month) <= (hi.year, hi.month):
+        name = f"p{year:04d}{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append(f"PARTITION {name} VALUES LESS THAN ('{year:04d}-{month:02d}-01')")
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+    cursor.execute(f"DROP TABLE IF EXISTS {PARTITION_TABLE}")
+    cursor.execute(f"""
+    CREATE TABLE {PARTITION_TABLE} (
+        id INT NOT NULL,
+        customer_id INT,
+        total DECIMAL(10,2),
+        description TEXT,
+        order_date DATETIME NOT NULL,
+        status VARCHAR(20),
+        PRIMARY KEY (id, order_date)
+    ) ENGINE=InnoDB
+    PARTITION BY RANGE COLUMNS(order_date) ({", ".join(partitions)})
+    """)
+    cursor.execute(f"INSERT INTO {PARTITION_TABLE} SELECT id, customer_id, total, description, order_date, status FROM orders")
+    conn.commit()
+    return len(partitions)
+
+def run_partition_scenario(conn, cursor, size_label):
+    """
+    PARTICIONAMENTO: a faixa central de 10% das datas (a de idx_ord_date) em
+    orders com um índice comum em order_date ("sem") e em orders_part, sem
+    índice secundário, lendo só as partições da faixa ("com"). Retorna
+    (média sem, média com).
+    """
+    query_plain = "SELECT * FROM orders WHERE order_date BETWEEN %s AND %s"
+    query_part = f"SELECT * FROM {PARTITION_TABLE} WHERE order_date BETWEEN %s AND %s"
+    try:
+        n_partitions = create_partitioned_copy(conn, cursor)
+        params = _middle_range(cursor, 'orders', 'order_date', 0.1)
+        cursor.execute("CREATE INDEX idx_part_plain ON orders(order_date)")
+        conn.commit()
+
+        no_stats = time_query(conn, cursor, query_plain, params)
+        with_stats = time_query(conn, cursor, query_part, params)
+
+        plan_plain = get_explain_plan(cursor, query_plain, params)
+        save_explain_plan(plan_plain, 'PARTICAO', 'part_ord_date', size_label, 'no_idx', query_plain)
+        plan_part = get_explain_plan(cursor, query_part, params)
+        save_explain_plan(plan_part, 'PARTICAO', 'part_ord_date', size_label, 'with_idx', query_part)
+        if plan_part and plan_part['json']:
+            read = sum(len(t.get('partitions', [])) for t in _plan_tables(json.loads(plan_part['json'])))
+            print(f"Poda de partições ({size_label}): {read} de {n_partitions} partições lidas")
+
+        save_times('PARTICAO', 'part_ord_date', size_label, no_stats, with_stats)
+        return no_stats['mean'], with_stats['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao testar particionamento: {err}")
+        return None, None
+    finally:
+        for cleanup in ("DROP INDEX idx_part_plain ON orders", f"DROP TABLE IF EXISTS {PARTITION_TABLE}"):
+            try:
+                cursor.execute(cleanup)
+                conn.commit()
+            except DB_ERRORS:
+                pass
+
+def set_fk_index(conn, cursor, present):
+    """Cria ou remove o índice de orders.customer_id (BACKEND.fk_index_sql)."""
+    for sql in BACKEND.fk_index_sql[present]:
+        cursor.execute(sql)
+    conn.commit()
+
+# Consultas de JOIN/agregação sobre a FK orders.customer_id, medidas sem e
+# com o índice da FK por run_fk_scenario()
+FK_SCENARIOS = {
+    'join_fk': {
+        'query_sql': "SELECT c.id, c.name, COUNT(*), SUM(o.total) FROM customers c "
+                     "JOIN orders o ON o.customer_id = c.id WHERE c.id BETWEEN %s AND %s GROUP BY c.id, c.name",
+        'params': lambda cursor: _middle_range(cursor, 'customers', 'id', 0.01),
+    },
+    'group_fk': {
+        'query_sql': "SELECT customer_id, COUNT(*) FROM orders GROUP BY customer_id",
+        'params': lambda cursor: (),
+    },
+}
+
+def run_fk_scenario(conn, cursor, name, size_label):
+    """
+    JOIN/agregação de FK_SCENARIOS sem e com o índice de orders.customer_id;
+    ao final o índice volta ao estado do esquema (BACKEND.fk_indexed).
+    """
+    query_sql = FK_SCENARIOS[name]['query_sql']
+    params = FK_SCENARIOS[name]['params'](cursor)
+    try:
+        try:
+            set_fk_index(conn, cursor, False)
+        except DB_ERRORS:
+            pass
+        no_stats = time_query(conn, cursor, query_sql, params)
+        save_explain_plan(get_explain_plan(cursor, query_sql, params), 'JOIN_FK', name, size_label, 'no_idx', query_sql)
+
+        set_fk_index(conn, cursor, True)
+        with_stats = time_query(conn, cursor, query_sql, params)
+        save_explain_plan(get_explain_plan(cursor, query_sql, params), 'JOIN_FK', name, size_label, 'with_idx', query_sql)
+
+        save_times('JOIN_FK', name, size_label, no_stats, with_stats)
+        return no_stats['mean'], with_stats['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao testar {name}: {err}")
+        return None, None
+    finally:
+        try:
+            set_fk_index(conn, cursor, BACKEND.fk_indexed)
+        except DB_ERRORS:
+            pass
+
+def run_join_fk(conn, cursor, size_label):
+    return run_fk_scenario(conn, cursor, 'join_fk', size_label)
+
+def run_group_fk(conn, cursor, size_label):
+    return run_fk_scenario(conn, cursor, 'group_fk', size_label)
+
+# Mesma junção com hash join (sem índice na tabela interna) e com nested
+# loop pelo índice da FK, forçados por optimizer hints (MySQL 8.0.20+)
+JOIN_HASH_SQL = ("SELECT /*+ JOIN_ORDER(c, o) {hint} */ c.id, COUNT(*), SUM(o.total) FROM customers c "
+                 "JOIN orders o ON o.customer_id = c.id WHERE c.id BETWEEN %s AND %s GROUP BY c.id")
+JOIN_HINTS = {
+    'hash': "BNL(o) NO_JOIN_INDEX(o)",
+    'nested_loop': "NO_BNL(o) JOIN_INDEX(o fk_orders_customer)",
+}
+
+def run_join_hash_scenario(conn, cursor, size_label):
+    """
+    HASH JOIN × NESTED LOOP: junção de 10% dos clientes com seus pedidos por
+    hash join ("sem" índice) e por nested loop sobre o índice da FK ("com").
+    Retorna (média sem, média com).
+    """
+    params = _middle_range(cursor, 'customers', 'id', 0.1)
+    stats = {}
+    try:
+        for state, (strategy, hint) in zip(('no_idx', 'with_idx'), JOIN_HINTS.items()):
+            query_sql = JOIN_HASH_SQL.format(hint=hint)
+            stats[strategy] = time_query(conn, cursor, query_sql, params)
+            save_explain_plan(get_explain_plan(cursor, query_sql, params), 'JOIN_ALGORITMO', 'join_hash',
+                              size_label, state, query_sql)
+        save_times('JOIN_ALGORITMO', 'join_hash', size_label, stats['hash'], stats['nested_loop'])
+        return stats['hash']['mean'], stats['nested_loop']['mean']
+    except DB_ERRORS as err:
+        print(f"Erro ao testar hash join: {err}")
+        return None, None
+
+# Células do journal medidas fora de SCENARIOS: nome -> (tipo de índice, função, recurso do backend)
+CUSTOM_CELLS = {
+    'mem_hash_eq': ('MEMORY_HASH', run_mem_hash_eq, 'memory'),
+    'mem_hash_range': ('MEMORY_HASH', run_mem_hash_range, 'memory'),
+    'mem_hash_dup': ('MEMORY_HASH', run_mem_hash_dup, 'memory'),
+    'ahi_lookup': ('AHI', run_ahi_scenario, 'ahi'),
+    'part_ord_date': ('PARTICAO', run_partition_scenario, 'partitions'),
+    'join_fk': ('JOIN_FK', run_join_fk, None),
+    'group_fk': ('JOIN_FK', run_group_fk, None),
+    'join_hash': ('JOIN_ALGORITMO', run_join_hash_scenario, 'hash_join'),
+}
+
+def parse_only(only, sizes=SIZES):
+    """Separa o filtro --only (ex.: 'idx_ord_date,500000') em cenários e volumes."""
+    names, size_labels = set(), set()
+    for token in filter(None, (t.strip() for t in (only or '').split(','))):
+        if token in SCENARIOS or token in CUSTOM_CELLS:
+            names.add(token)
+        elif token in {str(no) for _, no in sizes}:
+            size_labels.add(token)
+        else:
+            raise ValueError(f"--only: '{token}' não é cenário nem volume conhecido")
+    return names, size_labels
+
+def run_tests(only=None, force=False):
+    """
+    Executa sequência completa de testes para todos os índices e volumes.
+    Cada (cenário, volume) é uma célula do journal: células concluídas com a
+    mesma semente e configuração são puladas (force=True refaz), e volumes
+    sem célula pendente nem chegam a ser preparados (sem nenhuma pendente, o
+    esquema nem é recriado). `only` restringe os
+    cenários e/ou volumes. Ao final, CSVs e gráficos são gerados do journal.
+    """
+    try:
+        names, size_labels = parse_only(only)
+        cells = [(name, SCENARIOS[name]['index_type']) for name in backend_scenarios()]
+        cells += [(name, index_type) for name, (index_type, _, feature) in CUSTOM_CELLS.items()
+                  if feature is None or supports(feature)]
+        if names:
+            cells = [(name, index_type) for name, index_type in cells if name in names]
 
         create_database()
-        conn = get_connection()
+        conn = get_connection(**connection_options())
         cursor = conn.cursor()
 
-        reset_schema(conn, cursor)
+        set_server_version(conn)
+        toggle = index_toggle_mode(conn)
+        print(f"Alternância de índices: {toggle}")
 
-        for nc, no in sizes:
+        run_start = time.perf_counter()
+        data_time = 0.0
+
+        # Células pendentes de cada volume antes de mexer nos dados: sem
+        # nenhuma, o esquema (e os dados já carregados) fica intacto
+        tiers = []
+        for nc, no in SIZES:
             size_label = f"{no}"
-            print(f"\nTestando com {nc} clientes e {no} pedidos...")
-            populate(conn, cursor, nc, no)
-
-            cursor.execute("SELECT email FROM customers LIMIT 1")
-            sample_email = cursor.fetchone()[0]
-
-            # UNIQUE customers.email
-            ni, wi = measure_performance(
-                conn, cursor,
-                "CREATE UNIQUE INDEX idx_cust_email ON customers(email)",
-                "DROP INDEX idx_cust_email ON customers",
-                "SELECT * FROM customers WHERE email = %s",
-                (sample_email,),
-                test_name='idx_cust_email',
-                size_label=size_label,
-                index_type='BTREE_UNIQUE'
-            )
-            if ni is not None and wi is not None:
-                results['idx_cust_email'].append((ni, wi))
-
-            # B-Tree orders.order_date
-            ni, wi = measure_performance(
-                conn, cursor,
-                "CREATE INDEX idx_ord_date ON orders(order_date)",
-                "DROP INDEX idx_ord_date ON orders",
-                "SELECT * FROM orders WHERE order_date BETWEEN %s AND %s",
-                ('2023-01-01', '2023-12-31'),
-                test_name='idx_ord_date',
-                size_label=size_label,
-                index_type='BTREE'
-            )
-            if ni is not None and wi is not None:
-                results['idx_ord_date'].append((ni, wi))
-
-            # B-Tree orders.status
-            ni, wi = measure_performance(
-                conn, cursor,
-                "CREATE INDEX idx_ord_status ON orders(status)",
-                "DROP INDEX idx_ord_status ON orders",
-                "SELECT * FROM orders WHERE status = %s",
-                ('Entregue',),
-                test_name='idx_ord_status',
-                size_label=size_label,
-                index_type='BTREE'
-            )
-            if ni is not None and wi is not None:
-                results['idx_ord_status'].append((ni, wi))
-
-            # B-Tree orders.total
-            ni, wi = measure_performance(
-                conn, cursor,
-                "CREATE INDEX idx_ord_total ON orders(total)",
-                "DROP INDEX idx_ord_total ON orders",
-                "SELECT * FROM orders WHERE total > %s",
-                (500,),
-                test_name='idx_ord_total',
-                size_label=size_label,
-                index_type='BTREE'
-            )
-            if ni is not None and wi is not None:
-                results['idx_ord_total'].append((ni, wi))
-
-            # FULLTEXT orders.description
-            ni, wi = measure_fulltext(
-                conn, cursor,
-                "CREATE FULLTEXT INDEX idx_ord_desc ON orders(description)",
-                "DROP INDEX idx_ord_desc ON orders",
-                "SELECT * FROM orders WHERE MATCH(description) AGAINST(%s IN BOOLEAN MODE)",
-                ('importante',),
-                "SELECT * FROM orders WHERE description LIKE %s",
-                ('%importante%',),
-                test_name='idx_ord_desc',
-                size_label=size_label
-            )
-            if ni is not None and wi is not None:
-                results['idx_ord_desc'].append((ni, wi))
-                
-            # ÍNDICE COMPOSTO orders (status, order_date)
-            try:
-                # Removemos qualquer índice anterior primeiro para evitar erros
-                try:
-                    cursor.execute("DROP INDEX idx_composto ON orders")
-                    conn.commit()
-                except mysql.connector.Error:
-                    pass  # Ignora erros se o índice não existir
-                
-                # Consulta sem índice composto
-                cursor.execute("SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31' LIMIT 1")
-                cursor.fetchall()  # Warm-up
-                
-                no_idx_times = []
-                for _ in range(N_RUNS):
-                    t0 = time.time()
-                    cursor.execute("SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31'")
-                    cursor.fetchall()
-                    no_idx_times.append(time.time() - t0)
-                no_idx_avg = sum(no_idx_times[1:]) / (N_RUNS - 1)
-                
-                # Salva plano explain sem índice
-                explain_no_idx = get_explain_plan(cursor, "SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31'")
-                save_explain_plan(explain_no_idx, f'BTREE_COMPOSTO_idx_composto_{size_label}_no_idx.csv')
-                
-                # Cria índice composto
-                cursor.execute("CREATE INDEX idx_composto ON orders(status, order_date)")
-                conn.commit()
-                
-                # Consulta com índice composto
-                cursor.execute("SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31' LIMIT 1")
-                cursor.fetchall()  # Warm-up
-                
-                with_idx_times = []
-                for _ in range(N_RUNS):
-                    t0 = time.time()
-                    cursor.execute("SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31'")
-                    cursor.fetchall()
-                    with_idx_times.append(time.time() - t0)
-                with_idx_avg = sum(with_idx_times[1:]) / (N_RUNS - 1)
-                
-                # Salva plano explain com índice
-                explain_with_idx = get_explain_plan(cursor, "SELECT * FROM orders WHERE status = 'Entregue' AND order_date BETWEEN '2023-01-01' AND '2023-12-31'")
-                save_explain_plan(explain_with_idx, f'BTREE_COMPOSTO_idx_composto_{size_label}_with_idx.csv')
-                
-                # Salva resultados
-                filename = os.path.join(TIMES_DIR, f'times_BTREE_COMPOSTO_idx_composto.csv')
-                file_exists = os.path.isfile(filename)
-                with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    if not file_exists:
-                        writer.writerow(['Volume', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)'])
-                    improvement = ((no_idx_avg - with_idx_avg) / no_idx_avg * 100) if no_idx_avg else 0
-                    writer.writerow([size_label, round(no_idx_avg, 4), round(with_idx_avg, 4), round(improvement, 2)])
-                
-                results['idx_composto'].append((no_idx_avg, with_idx_avg))
-                
-                # Remove índice para próxima iteração
-                cursor.execute("DROP INDEX idx_composto ON orders")
-                conn.commit()
-                
-            except mysql.connector.Error as err:
-                print(f"Erro ao testar índice composto: {err}")
-                
-            # ÍNDICE HASH (simulado via MEMORY ENGINE)
-            try:
-                # Remove tabela se existir
-                cursor.execute("DROP TABLE IF EXISTS orders_memory")
-                conn.commit()
-                
-                # Cria tabela com engine MEMORY
-                cursor.execute("""
-                CREATE TABLE orders_memory (
-                    id INT,
-                    customer_id INT,
-                    total DECIMAL(10,2),
-                    status VARCHAR(20),
-                    PRIMARY KEY USING HASH (id)
-                ) ENGINE=MEMORY
-                """)
-                conn.commit()
-                
-                # Insere dados de amostra
-                cursor.execute("INSERT INTO orders_memory SELECT id, customer_id, total, status FROM orders LIMIT 1000")
-                conn.commit()
-                
-                # Teste sem usar índice hash (consulta por coluna não indexada)
-                cursor.execute("SELECT * FROM orders_memory WHERE total > 500 LIMIT 1")
-                cursor.fetchall()  # Warm-up
-                
-                no_idx_times = []
-                for _ in range(N_RUNS):
-                    t0 = time.time()
-                    cursor.execute("SELECT * FROM orders_memory WHERE total > 500")
-                    cursor.fetchall()
-                    no_idx_times.append(time.time() - t0)
-                no_idx_avg = sum(no_idx_times[1:]) / (N_RUNS - 1)
-                
-                # Teste usando índice hash (consulta pela chave primária)
-                cursor.execute("SELECT * FROM orders_memory WHERE id = 100 LIMIT 1")
-                cursor.fetchall()  # Warm-up
-                
-                with_idx_times = []
-                for _ in range(N_RUNS):
-                    t0 = time.time()
-                    cursor.execute("SELECT * FROM orders_memory WHERE id = 100")
-                    cursor.fetchall()
-                    with_idx_times.append(time.time() - t0)
-                with_idx_avg = sum(with_idx_times[1:]) / (N_RUNS - 1)
-                
-                # Salva planos explain
-                explain_no_idx = get_explain_plan(cursor, "SELECT * FROM orders_memory WHERE total > 500")
-                save_explain_plan(explain_no_idx, f'HASH_idx_hash_{size_label}_no_idx.csv')
-                
-                explain_with_idx = get_explain_plan(cursor, "SELECT * FROM orders_memory WHERE id = 100")
-                save_explain_plan(explain_with_idx, f'HASH_idx_hash_{size_label}_with_idx.csv')
-                
-                # Salvando tempos em CSV
-                filename = os.path.join(TIMES_DIR, f'times_HASH_idx_hash.csv')
-                file_exists = os.path.isfile(filename)
-                with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    if not file_exists:
-                        writer.writerow(['Volume', 'Sem Índice (s)', 'Com Índice (s)', 'Melhoria (%)'])
-                    improvement = ((no_idx_avg - with_idx_avg) / no_idx_avg * 100) if no_idx_avg else 0
-                    writer.writerow([size_label, round(no_idx_avg, 4), round(with_idx_avg, 4), round(improvement, 2)])
-                
-                results['idx_hash'].append((no_idx_avg, with_idx_avg))
-                
-                # Limpeza
-                cursor.execute("DROP TABLE IF EXISTS orders_memory")
-                conn.commit()
-                
-            except mysql.connector.Error as err:
-                print(f"Erro ao testar índice HASH: {err}")
+            if size_labels and size_label not in size_labels:
+                continue
+            tiers.append((nc, no, size_label, [(name, index_type) for name, index_type in cells
+                                               if force or not journal_done(index_type, name, size_label)]))
+        if any(pending for *_, pending in tiers):
+            reset_schema(conn, cursor)
 
-        # Gera gráficos para cada índice
-        for idx_name, times in results.items():
-            if times:
-                plot_results(times, sizes, idx_name, index_types[idx_name])
+        for nc, no, size_label, pending in tiers:
+            if not pending:
+                print(f"\n{nc} clientes e {no} pedidos: todas as células já estão no journal, pulando")
+                continue
+
+            print(f"\nTestando com {nc} clientes e {no} pedidos ({len(pending)} células pendentes)...")
+            t0 = time.perf_counter()
+            prepare_tier(conn, cursor, nc, no)
+            data_time += time.perf_counter() - t0
+
+            # Modo invisível: cada índice é criado uma vez por volume e só alternado
+            built = [name for name, _ in pending if name in SCENARIOS] if toggle == 'invisible' else []
+            try:
+                build_tier_indexes(conn, cursor, built)
+                for name, index_type in pending:
+                    journal_start(index_type, name, size_label)
+                    if name in CUSTOM_CELLS:
+                        CUSTOM_CELLS[name][1](conn, cursor, size_label)
+                    else:
+                        run_scenario(conn, cursor, name, size_label, toggle=toggle)
+            finally:
+                drop_tier_indexes(conn, cursor, built)
 
         cursor.close()
         conn.close()
 
+        total_time = time.perf_counter() - run_start
+        print(f"\nTempo total: {total_time:.1f}s (preparação de dados: {data_time:.1f}s, "
+              f"{data_time / total_time * 100 if total_time else 0:.0f}%)")
+        report_peak_rss(workers=POP_WORKERS > 1)
         print("\nTestes concluídos com sucesso.")
     except Exception as e:
         print(f"Erro durante a execução: {e}")
         raise
+    finally:
+        export_results()
+
+def benchmark_workers(n_customers, n_orders, worker_counts):
+    """Relatório de escalabilidade: tempo de carga completa para cada número de workers."""
+    create_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+    results = []
+    for workers in worker_counts:
+        print(f"\nPopulando {n_customers} clientes e {n_orders} pedidos com {workers} worker(s)...")
+        reset_schema(conn, cursor)
+        t0 = time.perf_counter()
+        populate(conn, cursor, n_customers, n_orders, incremental=False, workers=workers)
+        results.append((workers, time.perf_counter() - t0))
+    cursor.close()
+    conn.close()
+
+    n_rows = n_customers + n_orders
+    base = results[0][1]
+    print(f"\nEscalabilidade da carga ({LOAD_MODE}, {n_rows} linhas):")
+    print(f"  {'Workers':>7} {'Tempo (s)':>10} {'Linhas/s':>12} {'Aceleração':>11}")
+    for workers, elapsed in results:
+        print(f"  {workers:>7} {elapsed:>10.2f} {n_rows / elapsed:>12,.0f} {base / elapsed:>10.2f}x")
+    return results
+
+# Fases de funções inteiras: envolvidas aqui, e não no corpo, para não mexer no
+# código de medição (MEASUREMENT_CODE entra no hash do journal; inspect.getsource()
+# segue __wrapped__ até a função original)
+populate = phase('populate')(populate)
+time_query = phase('query')(time_query)
+get_explain_plan = phase('explain')(get_explain_plan)
+plot_results = phase('plot')(plot_results)
+export_results = phase('report')(export_results)
+
+# Subcomandos que dependem de recursos do MySQL (threads concorrentes,
+# LOAD DATA, buffer pool, prepared statements do servidor, índices de prefixo)
+MYSQL_ONLY_COMMANDS = {'bench-workers', 'load', 'write-cost', 'bp-sweep', 'lookup', 'prefix', 'fulltext'}
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Análise de desempenho de índices MySQL")
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('run', help="Executa a bateria completa de testes (padrão)")
+    p.add_argument('--only', help="Cenários e/ou volumes a executar, separados por vírgulas (ex.: idx_ord_date,500000)")
+    p.add_argument('--force', action='store_true', help="Refaz as células já concluídas no journal")
+    sub.add_parser('report', help="Regera CSVs de tempos e gráficos a partir do journal")
+    p = sub.add_parser('analyze', help="Modelos de escala e comparação com uma baseline (sai com 1 se houver regressão)")
+    p.add_argument('--baseline', help="Baseline com a qual comparar a execução atual")
+    p.add_argument('--save-baseline', help="Grava a execução atual como baseline com este nome")
+    p.add_argument('--threshold', type=float, default=0.1, help="Piora relativa da mediana que conta como regressão")
+    p.add_argument('--alpha', type=float, default=0.01, help="Nível de significância do teste de Mann-Whitney")
+    p = sub.add_parser('bench-gen', help="Compara a vazão dos geradores de dados Faker e NumPy")
+    p.add_argument('--customers', type=int, default=10000)
+    p.add_argument('--orders', type=int, default=50000)
+    p = sub.add_parser('bench-workers', help="Mede o tempo de carga com 1/2/4/8 workers")
+    p.add_argument('--customers', type=int, default=100000)
+    p.add_argument('--orders', type=int, default=500000)
+    p.add_argument('--workers', default='1,2,4,8', help="Lista separada por vírgulas")
+    p = sub.add_parser('plans-diff', help="Aponta mudanças de plano entre volumes e entre execuções")
+    p.add_argument('--run', help="Execução analisada (padrão: a mais recente)")
+    p.add_argument('--baseline', help="Execução de referência para comparar")
+    p.add_argument('--cost-threshold', type=float, default=0.2,
+                   help="Variação relativa de custo estimado considerada mudança (só com --baseline)")
+    p = sub.add_parser('load', help="Carga concorrente sobre um cenário, com e sem índice")
+    p.add_argument('--scenario', required=True, choices=list(SCENARIOS))
+    p.add_argument('--clients', default='1,2,4,8,16,32,64', help="Lista separada por vírgulas")
+    p.add_argument('--duration', type=float, default=10.0, help="Segundos por ponto")
+    p.add_argument('--rate', type=float, help="Taxa fixa de chegada (req/s): ativa o circuito aberto")
+    p = sub.add_parser('write-cost', help="Custo de criação e de escrita de cada índice, por volume")
+    p.add_argument('--ops', type=int, default=2000, help="Linhas por fase de INSERT/UPDATE/DELETE")
+    p = sub.add_parser('bp-sweep', help="Reexecuta os cenários com o buffer pool em frações do tamanho dos dados")
+    p.add_argument('--fractions', default='0.1,0.5,2.0', help="Frações do tamanho dos dados, separadas por vírgulas")
+    p = sub.add_parser('selectivity', help="Latência × seletividade com e sem índice e o ponto de crossover")
+    p.add_argument('--scenario', default=','.join(n for n, s in SCENARIOS.items() if 'sweep' in s),
+                   help="Cenários com varredura de seletividade, separados por vírgulas")
+    p.add_argument('--targets', default=','.join(str(t) for t in SELECTIVITY_TARGETS),
+                   help="Frações das linhas a selecionar, separadas por vírgulas")
+    p.add_argument('--samples', type=int, default=SELECTIVITY_SAMPLES, help="Parâmetros sorteados por alvo")
+    p = sub.add_parser('lookup', help="Busca pontual por email: texto, prepared, IN (...) e JOIN com tabela temporária")
+    p.add_argument('--keys', type=int, default=20000, help="Emails sorteados para a busca")
+    p.add_argument('--batch', default='100,1000', help="Tamanhos de lote de IN (...) e da tabela temporária")
+    p.add_argument('--duration', type=float, default=10, help="Segundos máximos por estratégia e estado")
+    p.add_argument('--strategies', default=','.join(LOOKUP_STRATEGIES), help="Estratégias, separadas por vírgulas")
+    p = sub.add_parser('fulltext', help="Matriz FULLTEXT: modo de busca × parser × DF do termo, criação e OPTIMIZE")
+    p.add_argument('--parsers', default=','.join(FULLTEXT_PARSERS), help="Parsers, separados por vírgulas")
+    p.add_argument('--modes', default=','.join(FULLTEXT_MODES), help="Modos de busca, separados por vírgulas")
+    p.add_argument('--insert-fraction', type=float, default=FULLTEXT_INSERT_FRACTION,
+                   help="Pedidos inseridos antes do OPTIMIZE, como fração do volume (0 = não mede)")
+    p = sub.add_parser('result-cache', help="Cache de resultados (LRU + TTL) × índice sob carga mista de leitura e escrita")
+    p.add_argument('--scenario', default='idx_cust_email,idx_ord_status,idx_ord_date',
+                   help="Cenários lidos pela carga, separados por vírgulas")
+    p.add_argument('--ops', type=int, default=5000, help="Operações por cenário e caminho")
+    p.add_argument('--writes', type=float, default=RESULT_CACHE_WRITES, help="Fração de escritas (0-1)")
+    p.add_argument('--duration', type=float, default=30, help="Segundos máximos por cenário e caminho")
+    p.add_argument('--ttl', type=float, default=RESULT_CACHE_TTL, help="Validade das entradas (s, 0 = sem expiração)")
+    p = sub.add_parser('pagination', help="Latência por profundidade de página: LIMIT/OFFSET × keyset em (order_date, id)")
+    p.add_argument('--page-size', type=int, default=PAGE_SIZE, help="Linhas por página")
+    p.add_argument('--points', type=int, default=PAGINATION_POINTS, help="Profundidades medidas, até a última página")
+    p = sub.add_parser('prefix', help="Tamanho × seletividade de índices de prefixo por comprimento do prefixo")
+    p.add_argument('--scenario', default=','.join(n for n, s in SCENARIOS.items() if 'prefix_column' in s),
+                   help="Cenários de índice de prefixo, separados por vírgulas")
+    p.add_argument('--lengths', default=','.join(str(n) for n in PREFIX_LENGTHS),
+                   help="Comprimentos de prefixo, separados por vírgulas")
+    args = parser.parse_args(argv)
+    if DB_BACKEND != 'mysql' and args.command in MYSQL_ONLY_COMMANDS:
+        parser.error(f"'{args.command}' depende de recursos do MySQL (DB_BACKEND={DB_BACKEND})")
+
+    # Fases e perfis do harness (tempos/metrics.jsonl e textfile do Prometheus), também após sys.exit()
+    atexit.register(write_metrics, args.command or 'run')
+
+    if args.command == 'bench-gen':
+        benchmark_generators(args.customers, args.orders)
+    elif args.command == 'bench-workers':
+        benchmark_workers(args.customers, args.orders, [int(w) for w in args.workers.split(',')])
+    elif args.command == 'load':
+        load_test(args.scenario, [int(c) for c in args.clients.split(',')], args.duration, args.rate)
+    elif args.command == 'write-cost':
+        measure_write_cost(args.ops)
+    elif args.command == 'bp-sweep':
+        buffer_pool_sweep([float(f) for f in args.fractions.split(',')])
+    elif args.command == 'selectivity':
+        names = args.scenario.split(',')
+        unknown = [n for n in names if 'sweep' not in SCENARIOS.get(n, {})]
+        if unknown:
+            parser.error(f"cenários sem varredura de seletividade: {', '.join(unknown)}")
+        run_selectivity(names, [float(t) for t in args.targets.split(',')], args.samples)
+    elif args.command == 'lookup':
+        lookup_benchmark(args.keys, [int(b) for b in args.batch.split(',')], args.duration,
+                         args.strategies.split(','))
+    elif args.command == 'fulltext':
+        parsers, modes = args.parsers.split(','), args.modes.split(',')
+        unknown = [p for p in parsers if p not in FULLTEXT_PARSERS] + [m for m in modes if m not in FULLTEXT_MODES]
+        if unknown:
+            parser.error(f"parsers/modos desconhecidos: {', '.join(unknown)}")
+        run_fulltext(parsers, modes, args.insert_fraction)
+    elif args.command == 'result-cache':
+        names = args.scenario.split(',')
+        unknown = [n for n in names if n not in SCENARIOS or 'baseline_sql' in SCENARIOS[n] or not scenario_def(n)]
+        if unknown:
+            parser.error(f"cenários sem suporte ao cache de resultados: {', '.join(unknown)}")
+        result_cache_benchmark(names, args.ops, args.writes, args.duration, args.ttl)
+    elif args.command == 'pagination':
+        run_pagination(args.page_size, args.points)
+    elif args.command == 'prefix':
+        names = args.scenario.split(',')
+        unknown = [n for n in names if 'prefix_column' not in SCENARIOS.get(n, {})]
+        if unknown:
+            parser.error(f"cenários sem índice de prefixo: {', '.join(unknown)}")
+        run_prefix(names, [int(n) for n in args.lengths.split(',')])
+    elif args.command == 'plans-diff':
+        if diff_plans(args.run, args.baseline, args.cost_threshold):
+            sys.exit(1)
+    elif args.command == 'report':
+        export_results()
+    elif args.command == 'analyze':
+        if analyze(args.baseline, args.save_baseline, args.threshold, args.alpha):
+            sys.exit(1)
+    elif args.command == 'run':
+        try:
+            parse_only(args.only)
+        except ValueError as err:
+            parser.error(str(err))
+        run_tests(args.only, args.force)
+    else:
+        run_tests()
 
 if __name__ == "__main__":
-    run_tests()
+    main()